@@ -38,10 +38,19 @@
 # ***** END LICENSE BLOCK *****
 import os
 import sys
-from io_scene_niftools import addon_updater_ops
+
+try:
+    import bpy
+except ImportError:
+    # imported by a worker process (eg. of the kf import), which only uses the file and key readers
+    bpy = None
+
 from io_scene_niftools.utils import logging, debugging
 from io_scene_niftools.utils.logging import NifLog
-from io_scene_niftools.utils.decorators import register_modules, unregister_modules
+
+if bpy:
+    from io_scene_niftools import addon_updater_ops
+    from io_scene_niftools.utils.decorators import register_modules, unregister_modules
 
 # Blender addon info.
 bl_info = {
@@ -85,7 +94,7 @@ def retrieve_ordered_submodules():
     return [update, properties, operators, ui]
 
 
-MODS = retrieve_ordered_submodules()
+MODS = retrieve_ordered_submodules() if bpy else []
 
 
 def register():
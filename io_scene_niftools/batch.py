@@ -0,0 +1,359 @@
+"""Headless batch import and export of many files, spread over several Blender worker processes.
+
+Run with::
+
+    blender --background --python io_scene_niftools/batch.py -- --glob "meshes/**/*.nif" --operation reexport \
+        --output-dir out --workers 8 --report report.json
+
+or give a json manifest with --manifest, see :func:`get_jobs`.
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import argparse
+import glob
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+if __name__ == "__main__":
+    # run as a script, so make sure that the addon can be imported even if it is not installed
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from io_scene_niftools.utils.consts import LOGGER_PLUGIN
+
+# marks the lines of a worker's output that are meant for the coordinator, among blender's own output
+READY_PREFIX = "NIFTOOLS_BATCH_READY"
+RESULT_PREFIX = "NIFTOOLS_BATCH_RESULT "
+
+OPERATIONS = ("import", "export", "reexport")
+
+# file extension of the output of each operation
+OUTPUT_EXTENSIONS = {"import": ".blend", "export": ".nif", "reexport": ".nif"}
+
+
+def get_jobs(manifest, base_dir=""):
+    """Return the list of jobs of a manifest, which is a dict like::
+
+        {"operation": "reexport", "output_dir": "out", "root": "meshes",
+         "import": {"scale_correction": 0.1}, "export": {"game": "SKYRIM"},
+         "files": ["meshes/a.nif", {"input": "meshes/b.nif", "output": "b.nif", "export": {"game": "OBLIVION"}}],
+         "glob": ["meshes/clutter/**/*.nif"]}
+
+    Every file may override the operation, output and operator properties. Outputs default to the input's path
+    relative to root (the common folder of all inputs), inside output_dir. Relative paths are relative to base_dir."""
+    def get_path(path):
+        return os.path.normpath(os.path.join(base_dir, path))
+
+    entries = [entry if isinstance(entry, dict) else {"input": entry} for entry in manifest.get("files", ())]
+    for pattern in manifest.get("glob", ()):
+        entries.extend({"input": path} for path in sorted(glob.glob(get_path(pattern), recursive=True)))
+    if not entries:
+        return []
+
+    inputs = [get_path(entry["input"]) for entry in entries]
+    root = get_path(manifest["root"]) if "root" in manifest else os.path.commonpath(
+        [os.path.dirname(path) for path in inputs])
+    output_dir = manifest.get("output_dir")
+    jobs = []
+    for job_id, (entry, input_path) in enumerate(zip(entries, inputs)):
+        operation = entry.get("operation", manifest.get("operation", "import"))
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}' for {input_path}, expected one of {OPERATIONS}")
+        output_path = entry.get("output")
+        if output_path:
+            output_path = get_path(os.path.join(output_dir or "", output_path))
+        elif output_dir:
+            output_path = os.path.splitext(os.path.relpath(input_path, root))[0] + OUTPUT_EXTENSIONS[operation]
+            output_path = get_path(os.path.join(output_dir, output_path))
+        elif operation != "import":
+            raise ValueError(f"No output for {input_path}, give an output or an output_dir")
+        jobs.append({
+            "id": job_id,
+            "operation": operation,
+            "input": input_path,
+            "output": output_path,
+            "import": dict(manifest.get("import", {}), **entry.get("import", {})),
+            "export": dict(manifest.get("export", {}), **entry.get("export", {})),
+        })
+    return jobs
+
+
+def get_report(results, seconds, workers):
+    """Return the json report of a batch run."""
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {
+        "seconds": seconds,
+        "workers": workers,
+        "summary": summary,
+        "files": sorted(results, key=lambda result: result["id"]),
+    }
+
+
+class Worker:
+    """A Blender process that runs jobs it reads from its stdin, one at a time."""
+
+    def __init__(self, command):
+        self.command = command
+        self.process = None
+        self.lines = None
+
+    def start(self, timeout):
+        """Starts the process, if it is not running, and waits until it can take jobs."""
+        if self.process and self.process.poll() is None:
+            return
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, encoding="utf-8", errors="replace", bufsize=1)
+        self.lines = queue.Queue()
+        threading.Thread(target=self.read_lines, args=(self.process, self.lines), daemon=True).start()
+        if self.wait_for(READY_PREFIX, timeout) is None:
+            self.stop()
+            raise RuntimeError("Worker did not start")
+
+    @staticmethod
+    def read_lines(process, lines):
+        for line in process.stdout:
+            if line.startswith((READY_PREFIX, RESULT_PREFIX)):
+                lines.put(line)
+        # tell the waiting thread that the process is gone
+        lines.put(None)
+
+    def wait_for(self, prefix, timeout):
+        """Returns the next line that starts with prefix, or None if the process ended or timed out."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return None
+            if line is None:
+                # the output is closed, so the process is exiting
+                self.process.wait()
+                return None
+            if line.startswith(prefix):
+                return line[len(prefix):]
+
+    def run(self, job, timeout):
+        """Runs a job and returns its result, restarting the process on the next job if it crashed or timed out."""
+        start = time.perf_counter()
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+        line = self.wait_for(RESULT_PREFIX, timeout)
+        if line is not None:
+            return json.loads(line)
+        if self.process.poll() is None:
+            self.stop()
+            status, error = "timeout", f"No result after {timeout} seconds"
+        else:
+            status, error = "crashed", f"Worker exited with code {self.process.returncode}"
+            self.process = None
+        return {"status": status, "seconds": time.perf_counter() - start, "warnings": [], "errors": [error]}
+
+    def stop(self):
+        if self.process:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+
+def run_jobs(jobs, command, workers, timeout, retries, start_timeout=120):
+    """Runs the jobs on a pool of worker processes, and returns their results."""
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+    results = []
+
+    def work():
+        worker = Worker(command)
+        try:
+            while True:
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                attempts = 0
+                while True:
+                    attempts += 1
+                    try:
+                        worker.start(start_timeout)
+                        result = worker.run(job, timeout)
+                    except (OSError, RuntimeError) as e:
+                        result = {"status": "crashed", "seconds": 0.0, "warnings": [], "errors": [str(e)]}
+                    # only a crash or timeout may be worth another try, on a fresh process
+                    if result["status"] in ("ok", "cancelled", "error") or attempts > retries:
+                        break
+                result.update(id=job["id"], operation=job["operation"], input=job["input"], output=job["output"],
+                              attempts=attempts)
+                print(f"[{result['status']}] {job['input']} ({result['seconds']:.2f}s)", flush=True)
+                results.append(result)
+        finally:
+            worker.stop()
+
+    threads = [threading.Thread(target=work) for _ in range(min(workers, len(jobs)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class LogCollector(logging.Handler):
+    """Collects the warnings and errors of the addon while a job runs."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.warnings = []
+        self.errors = []
+
+    def emit(self, record):
+        if record.levelno >= logging.ERROR:
+            self.errors.append(record.getMessage())
+        else:
+            self.warnings.append(record.getMessage())
+
+
+def run_job(job):
+    """Runs one job in this Blender process and returns its result."""
+    import bpy
+
+    collector = LogCollector()
+    logger = logging.getLogger(LOGGER_PLUGIN)
+    logger.addHandler(collector)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        if job["operation"] == "export":
+            bpy.ops.wm.open_mainfile(filepath=job["input"])
+        else:
+            bpy.ops.wm.read_homefile(use_empty=True)
+            if "CANCELLED" in bpy.ops.import_scene.nif(filepath=job["input"], **job["import"]):
+                status = "cancelled"
+        if status == "ok" and job["output"]:
+            os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+            if job["operation"] == "import":
+                bpy.ops.wm.save_as_mainfile(filepath=job["output"])
+            elif "CANCELLED" in bpy.ops.export_scene.nif(filepath=job["output"], **job["export"]):
+                status = "cancelled"
+    except Exception:
+        status = "error"
+        collector.errors.append(traceback.format_exc())
+    finally:
+        logger.removeHandler(collector)
+    return {"status": status, "seconds": time.perf_counter() - start,
+            "warnings": collector.warnings, "errors": collector.errors}
+
+
+def run_worker():
+    """Runs the jobs given on stdin, until it is closed."""
+    import addon_utils
+
+    addon_utils.enable("io_scene_niftools", default_set=True, persistent=True)
+    # every job loads another file, so caching parsed files would only cost a copy and memory
+    from io_scene_niftools.file_io.cache import file_cache
+    file_cache.resize(0)
+    print(READY_PREFIX, flush=True)
+    for line in sys.stdin:
+        if line.strip():
+            print(RESULT_PREFIX + json.dumps(run_job(json.loads(line))), flush=True)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="blender --background --python batch.py --",
+                                     description="Import and export nif files in bulk.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="json manifest of the files and operator properties")
+    source.add_argument("--glob", action="append", help="input files, ** matches any number of folders")
+    source.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--operation", choices=OPERATIONS, default="import")
+    parser.add_argument("--output-dir", help="folder for the outputs, which keep their path relative to --root")
+    parser.add_argument("--root", help="folder the output paths are relative to, by default that of all inputs")
+    parser.add_argument("--import-props", type=json.loads, default={}, help="json of import operator properties")
+    parser.add_argument("--export-props", type=json.loads, default={}, help="json of export operator properties")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds a single file may take")
+    parser.add_argument("--retries", type=int, default=1, help="times a file is retried after a crash or timeout")
+    parser.add_argument("--report", default="batch_report.json")
+    parser.add_argument("--blender", help="blender executable for the workers, by default the running one")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.worker:
+        run_worker()
+        return 0
+
+    if args.manifest:
+        with open(args.manifest) as manifest_file:
+            jobs = get_jobs(json.load(manifest_file), os.path.dirname(os.path.abspath(args.manifest)))
+    else:
+        manifest = {"glob": args.glob, "operation": args.operation,
+                    "import": args.import_props, "export": args.export_props}
+        if args.output_dir:
+            manifest["output_dir"] = args.output_dir
+        if args.root:
+            manifest["root"] = args.root
+        jobs = get_jobs(manifest, os.getcwd())
+
+    if args.blender:
+        blender = args.blender
+    else:
+        import bpy
+        blender = bpy.app.binary_path
+    command = [blender, "--background", "--factory-startup", "--python", os.path.abspath(__file__), "--", "--worker"]
+    print(f"Running {len(jobs)} files on {args.workers} workers", flush=True)
+    start = time.perf_counter()
+    results = run_jobs(jobs, command, args.workers, args.timeout, args.retries)
+    report = get_report(results, time.perf_counter() - start, args.workers)
+    with open(args.report, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Finished: {report['summary']}, report written to {args.report}", flush=True)
+    return 0 if len(results) == report["summary"].get("ok", 0) else 1
+
+
+if __name__ == "__main__":
+    # blender passes the arguments after "--" on to the script
+    sys.exit(main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]))
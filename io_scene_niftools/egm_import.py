@@ -42,6 +42,7 @@ import bpy
 from io_scene_niftools.file_io.egm import EGMFile
 from io_scene_niftools.modules.nif_import.animation.morph import MorphAnimation
 from io_scene_niftools.nif_common import NifCommon
+from io_scene_niftools.utils.profiling import NifProfiler
 from io_scene_niftools.utils.singleton import NifOp, EGMData
 from io_scene_niftools.utils.logging import NifError, NifLog
 
@@ -61,7 +62,8 @@ class EgmImport(NifCommon):
             egm_path = NifOp.props.filepath
 
             if egm_path:
-                EGMData.init(EGMFile.load_egm(egm_path))
+                with NifProfiler.phase("load"):
+                    EGMData.init(EGMFile.load_egm(egm_path))
                 # scale the data
                 EGMData.data.apply_scale(NifOp.props.scale_correction)
                 # TODO [morph][egm] if there is an egm, the assumption is that there is only one mesh in the nif
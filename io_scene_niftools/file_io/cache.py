@@ -0,0 +1,217 @@
+"""This module caches parsed files, so importing the same file again does not have to parse it again"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import collections
+import os
+import weakref
+
+import pyffi
+from pyffi.formats.egm import EgmFormat
+from pyffi.formats.nif import NifFormat
+from pyffi.object_models.xml.array import _ListWrap
+from pyffi.object_models.xml.bit_struct import BitStructBase
+from pyffi.object_models.xml.struct_ import StructBase
+
+from io_scene_niftools.utils.logging import NifLog
+
+BASIC, LINK, STRUCT, ARRAY, BITS = range(5)
+
+# environment variable for the number of parsed files that are kept between imports, 0 turns the cache off
+ENV_FILE_CACHE = "NIFTOOLS_FILE_CACHE"
+DEFAULT_MAX_FILES = 4
+
+
+class DataCopier:
+    """Copies parsed pyffi data without reading it again.
+    pyffi's own deepcopy does not handle all blocks, and neither copy.deepcopy nor pickle work on its classes, so
+    structures are rebuilt attribute by attribute, skipping the constructors and remapping links to the copied blocks."""
+
+    kinds = {}
+    attribute_names = {}
+
+    @classmethod
+    def get_kind(cls, value_type):
+        kind = cls.kinds.get(value_type)
+        if kind is None:
+            if issubclass(value_type, StructBase):
+                kind = STRUCT
+            elif issubclass(value_type, _ListWrap):
+                kind = ARRAY
+            elif issubclass(value_type, BitStructBase):
+                kind = BITS
+            elif issubclass(value_type, NifFormat.Ref):
+                kind = LINK
+            else:
+                kind = BASIC
+            cls.kinds[value_type] = kind
+        return kind
+
+    @classmethod
+    def get_attribute_names(cls, struct_type):
+        names = cls.attribute_names.get(struct_type)
+        if names is None:
+            # the attribute list includes the inherited attributes, and may hold the same name more than once
+            names = list(dict.fromkeys(f"_{attr.name}_value_" for attr in struct_type._attribute_list))
+            cls.attribute_names[struct_type] = names
+        return names
+
+    @staticmethod
+    def copy_basic(src):
+        value = object.__new__(type(src))
+        value.__dict__.update(src.__dict__)
+        return value
+
+    @classmethod
+    def copy(cls, src, parent=None, clones=None):
+        """Return a copy of src. Links point to the blocks in clones, which maps id(block) to its (empty) copy."""
+        value_type = type(src)
+        kind = cls.get_kind(value_type)
+        if kind == BASIC:
+            return cls.copy_basic(src)
+        if kind == STRUCT:
+            value = clones.get(id(src)) if clones else None
+            if value is None:
+                value = value_type.__new__(value_type)
+            value.arg = src.arg
+            value._items = []
+            for name in cls.get_attribute_names(value_type):
+                item = cls.copy(getattr(src, name), value, clones)
+                setattr(value, name, item)
+                value._items.append(item)
+            return value
+        if kind == ARRAY:
+            value = value_type.__new__(value_type)
+            value.__dict__.update(src.__dict__)
+            value._parent = weakref.ref(parent) if parent is not None else None
+            # iterating an array of basic types yields their values, so use the list methods for the items
+            if src and cls.get_kind(type(list.__getitem__(src, 0))) == BASIC:
+                items = [cls.copy_basic(item) for item in list.__iter__(src)]
+            else:
+                items = [cls.copy(item, value, clones) for item in list.__iter__(src)]
+            list.extend(value, items)
+            return value
+        if kind == LINK:
+            value = cls.copy_basic(src)
+            n_block = src.get_value()
+            value.set_value(None if n_block is None else clones[id(n_block)])
+            return value
+        # bit structs are small, so simply construct them and set their fields
+        value = value_type()
+        for item, src_item in zip(value._items, src._items):
+            item._value = src_item._value
+        return value
+
+    @classmethod
+    def copy_nif(cls, data):
+        """Return a copy of nif or kf data, with its own blocks."""
+        copy = NifFormat.Data(data.version, data.user_version, data.user_version_2)
+        copy.header = cls.copy(data.header)
+        copy.modification = data.modification
+        clones = {id(n_block): type(n_block).__new__(type(n_block)) for n_block in data.blocks}
+        copy.blocks = [cls.copy(n_block, None, clones) for n_block in data.blocks]
+        copy.roots = [clones[id(n_block)] for n_block in data.roots]
+        return copy
+
+    @classmethod
+    def copy_egm(cls, data):
+        """Return a copy of egm data."""
+        copy = EgmFormat.Data(data.version)
+        copy.header = cls.copy(data.header)
+        copy.sym_morphs = [cls.copy(morph) for morph in data.sym_morphs]
+        copy.asym_morphs = [cls.copy(morph) for morph in data.asym_morphs]
+        return copy
+
+
+class FileCache:
+    """Least recently used cache of parsed files.
+    Files are keyed by absolute path, size, modification time and pyffi version, so any change to the file on disk
+    (or to the parser) invalidates its entry. The importers change the data they are handed (scale correction, merged
+    skeleton roots), so the cached data itself is never handed out, only copies of it. Copying takes a fair part of the
+    time of parsing, so with max_files 0 files are parsed on every load and handed out without a copy."""
+
+    def __init__(self, max_files=None):
+        self.files = collections.OrderedDict()
+        self.max_files = self.get_default_max_files() if max_files is None else max_files
+
+    @staticmethod
+    def get_default_max_files():
+        """Return the cache size set in the environment, or the default size."""
+        value = os.environ.get(ENV_FILE_CACHE, "")
+        try:
+            return max(0, int(value)) if value else DEFAULT_MAX_FILES
+        except ValueError:
+            NifLog.warn(f"Ignoring {ENV_FILE_CACHE}={value}, expected a number of files")
+            return DEFAULT_MAX_FILES
+
+    def resize(self, max_files):
+        """Keep at most max_files files from now on, dropping the least recently used ones."""
+        self.max_files = max_files
+        while len(self.files) > max(0, max_files):
+            self.files.popitem(last=False)
+
+    @staticmethod
+    def get_key(file_path, variant=None):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), variant, stat.st_size, stat.st_mtime_ns, pyffi.__version__
+
+    def clear(self):
+        self.files.clear()
+
+    def load(self, file_path, read, copy, variant=None):
+        """Return a copy of the parsed file, calling read(file_path) only if it is not cached yet.
+        Files that can be read in several ways (eg. partially) are cached separately for each variant."""
+        if self.max_files <= 0:
+            return read(file_path)
+        key = self.get_key(file_path, variant)
+        data = self.files.get(key)
+        if data is None:
+            data = read(file_path)
+            # drop stale entries of the same file
+            for old_key in [old_key for old_key in self.files if old_key[:2] == key[:2]]:
+                del self.files[old_key]
+            self.files[key] = data
+            while len(self.files) > self.max_files:
+                self.files.popitem(last=False)
+        else:
+            NifLog.info(f"Using cached {file_path}")
+            self.files.move_to_end(key)
+        return copy(data)
+
+
+file_cache = FileCache()
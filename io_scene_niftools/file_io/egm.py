@@ -39,6 +39,7 @@
 
 
 from pyffi.formats.egm import EgmFormat
+from io_scene_niftools.file_io.cache import DataCopier, file_cache
 from io_scene_niftools.utils.logging import NifLog, NifError
 
 
@@ -49,7 +50,11 @@ class EGMFile:
     def load_egm(file_path):
         """Loads an egm file from the given path"""
         NifLog.info(f"Loading {file_path}")
+        return file_cache.load(file_path, EGMFile.read_egm, DataCopier.copy_egm)
 
+    @staticmethod
+    def read_egm(file_path):
+        """Parses the egm file at the given path"""
         egm_file = EgmFormat.Data()
 
         # open keyframe file for binary reading
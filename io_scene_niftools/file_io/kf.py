@@ -38,7 +38,11 @@
 # ***** END LICENSE BLOCK *****
 
 
+import pyffi.spells.nif.fix
 from pyffi.formats.nif import NifFormat
+from io_scene_niftools.file_io.cache import DataCopier, file_cache
+from io_scene_niftools.utils.blocks import BlockIndex
+from io_scene_niftools.utils.keys import get_key_times, get_sequence_keys
 from io_scene_niftools.utils.logging import NifLog, NifError
 
 
@@ -49,7 +53,11 @@ class KFFile:
     def load_kf(file_path):
         """Loads a Kf file from the given path"""
         NifLog.info(f"Loading {file_path}")
+        return file_cache.load(file_path, KFFile.read_kf, DataCopier.copy_nif)
 
+    @staticmethod
+    def read_kf(file_path):
+        """Parses the Kf file at the given path"""
         kf_file = NifFormat.Data()
 
         # open keyframe file for binary reading
@@ -67,3 +75,19 @@ class KFFile:
                 raise NifError("Not a KF file.")
 
         return kf_file
+
+    @staticmethod
+    def decode_keys(kf_file, scale):
+        """Scales kf data and decodes its keys into picklable arrays.
+        Returns the sorted key times of the file and the SequenceKeys of each root."""
+        # same as NifCommon.apply_scale, which needs blender
+        toaster = pyffi.spells.nif.NifToaster()
+        toaster.scale = scale
+        pyffi.spells.nif.fix.SpellScale(data=kf_file, toaster=toaster).recurse()
+        index = BlockIndex(kf_file.roots)
+        return get_key_times(index), [get_sequence_keys(kf_root) for kf_root in kf_file.roots]
+
+    @staticmethod
+    def read_kf_keys(file_path, scale):
+        """Parses the Kf file at the given path and decodes its keys, runs in a worker process of the kf import"""
+        return KFFile.decode_keys(KFFile.read_kf(file_path), scale)
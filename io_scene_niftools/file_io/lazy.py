@@ -0,0 +1,177 @@
+"""This module reads selected blocks of a nif, without decoding the rest of the file"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import mmap
+
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.utils.logging import NifLog, NifError
+
+
+class LazyNifReader:
+    """Reads the header of a nif and decodes its blocks on demand.
+    From 20.2.0.7 on, the header stores the size of every block, so any block can be found without decoding the blocks
+    before it. Links are only resolved between the blocks that were decoded, all other links are left empty."""
+
+    # blocks that a skeleton import never looks at, along with everything they link to
+    skeleton_skip_types = (NifFormat.NiProperty, NifFormat.NiCollisionObject)
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.data = NifFormat.Data()
+        self.file = open(file_path, "rb")
+        self.stream = None
+        try:
+            self.read_header()
+            # blocks are only read from memory on demand
+            self.stream = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.close()
+            raise
+        # maps block index to block, and to the indices of the blocks it links to
+        self.blocks = {}
+        self.links = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self.file.close()
+
+    def read_header(self):
+        """Reads the header and calculates the offset of every block."""
+        self.data.inspect_version_only(self.file)
+        if self.data.version >= 0:
+            NifLog.info(f"NIF file version: {self.data.version:x}")
+        elif self.data.version == -1:
+            raise NifError("Unsupported NIF version.")
+        else:
+            raise NifError("Not a NIF file.")
+        self.data.header.read(self.file, data=self.data)
+        self.data._string_list = list(self.data.header.strings)
+        self.offsets = []
+        if self.has_block_sizes():
+            offset = self.file.tell()
+            for size in self.data.header.block_size:
+                self.offsets.append(offset)
+                offset += size
+            self.footer_offset = offset
+
+    def has_block_sizes(self):
+        return self.data.version >= 0x14020007
+
+    def get_block_type(self, index):
+        block_type = self.data.header.block_types[self.data.header.block_type_index[index] & 0xfff].decode("ascii")
+        # data stream types carry their usage and access flags
+        block_type = block_type.split("\x01")[0]
+        try:
+            return getattr(NifFormat, block_type)
+        except AttributeError:
+            raise NifError(f"Unknown block type '{block_type}'.")
+
+    def get_block(self, index):
+        """Decodes the block at index, if it has not been decoded yet."""
+        n_block = self.blocks.get(index)
+        if n_block is None:
+            n_block = self.get_block_type(index)()
+            self.stream.seek(self.offsets[index])
+            self.data._link_stack = []
+            n_block.read(self.stream, self.data)
+            if isinstance(n_block, NifFormat.NiDataStream):
+                block_type = self.data.header.block_types[self.data.header.block_type_index[index] & 0xfff]
+                usage, access = block_type.decode("ascii").split("\x01")[1:]
+                n_block.usage = int(usage)
+                n_block.access.populate_attribute_values(int(access), self.data)
+            self.blocks[index] = n_block
+            self.links[index] = self.data._link_stack
+        return n_block
+
+    def get_links(self, index):
+        """Returns the indices of the blocks that the block at index links to."""
+        self.get_block(index)
+        return [link for link in self.links[index] if link >= 0]
+
+    def get_roots(self):
+        self.stream.seek(self.footer_offset)
+        self.data._link_stack = []
+        NifFormat.Footer().read(self.stream, self.data)
+        return [link for link in self.data._link_stack if link >= 0]
+
+    def read(self, keep=None):
+        """Decodes the roots and all blocks that can be reached from them through blocks for which
+        keep(index, parent_index) is True, and returns them as nif data."""
+        roots = self.get_roots()
+        stack = list(reversed(roots))
+        visited = set()
+        while stack:
+            index = stack.pop()
+            if index in visited:
+                continue
+            visited.add(index)
+            stack.extend(link for link in reversed(self.get_links(index))
+                         if link not in visited and (keep is None or keep(link, index)))
+
+        data = self.data
+        data._block_dct = self.blocks
+        for index in sorted(visited):
+            # links to blocks that were not decoded are left empty
+            data._link_stack = [link if link in visited else -1 for link in self.links[index]]
+            self.blocks[index].fix_links(data)
+        data._link_stack = []
+        data.blocks = [self.blocks[index] for index in sorted(visited)]
+        data.roots = [self.blocks[index] for index in roots]
+        NifLog.info(f"Decoded {len(data.blocks)} of {data.header.num_blocks} blocks")
+        return data
+
+    def is_skeleton_block(self, index, parent_index):
+        """Returns whether a skeleton import may need the block at index."""
+        block_type = self.get_block_type(index)
+        if issubclass(block_type, self.skeleton_skip_types):
+            return False
+        if issubclass(block_type, NifFormat.NiGeometryData):
+            # the data of skinned geometry can be needed to fix up differing bind poses
+            return any(issubclass(self.get_block_type(link), NifFormat.NiSkinInstance)
+                       for link in self.get_links(parent_index))
+        return True
@@ -40,6 +40,8 @@
 
 from pyffi.formats.nif import NifFormat
 
+from io_scene_niftools.file_io.cache import DataCopier, file_cache
+from io_scene_niftools.file_io.lazy import LazyNifReader
 from io_scene_niftools.utils.logging import NifLog, NifError
 
 
@@ -50,7 +52,11 @@ class NifFile:
     def load_nif(file_path):
         """Loads a nif from the given file path"""
         NifLog.info(f"Importing {file_path}")
+        return file_cache.load(file_path, NifFile.read_nif, DataCopier.copy_nif)
 
+    @staticmethod
+    def read_nif(file_path):
+        """Parses the nif at the given file path"""
         data = NifFormat.Data()
 
         # open file for binary reading
@@ -68,3 +74,19 @@ class NifFile:
                 raise NifError("Not a NIF file.")
 
         return data
+
+    @staticmethod
+    def load_skeleton(file_path):
+        """Loads only the blocks of a nif that a skeleton import needs"""
+        NifLog.info(f"Importing skeleton of {file_path}")
+        return file_cache.load(file_path, NifFile.read_skeleton, DataCopier.copy_nif, variant="SKELETON_ONLY")
+
+    @staticmethod
+    def read_skeleton(file_path):
+        """Parses the nodes, skinning and animation blocks of the nif at the given file path"""
+        with LazyNifReader(file_path) as reader:
+            if reader.has_block_sizes():
+                NifLog.info("Reading skeleton blocks")
+                return reader.read(reader.is_skeleton_block)
+        # older nifs do not store block sizes, so every block must be read to find the next one
+        return NifFile.read_nif(file_path)
@@ -47,6 +47,7 @@ from io_scene_niftools.modules.nif_export import armature
 from io_scene_niftools.modules.nif_export.animation.transform import TransformAnimation
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
+from io_scene_niftools.utils.profiling import NifProfiler
 from io_scene_niftools.utils.singleton import NifOp, NifData
 from io_scene_niftools.utils.logging import NifLog, NifError
 from io_scene_niftools.modules.nif_export import scene
@@ -83,7 +84,8 @@ class KfExport(NifCommon):
             math.set_bone_orientation(b_armature.data.niftools.axis_forward, b_armature.data.niftools.axis_up)
 
         NifLog.info("Creating keyframe tree")
-        kf_root = self.transform_anim.export_kf_root(b_armature)
+        with NifProfiler.phase("keyframes"):
+            kf_root = self.transform_anim.export_kf_root(b_armature)
 
         # write kf (and xkf if asked)
         ext = ".kf"
@@ -96,7 +98,7 @@ class KfExport(NifCommon):
         self.apply_scale(data, round(1 / NifOp.props.scale_correction))
 
         kffile = os.path.join(directory, prefix + filebase + ext)
-        with open(kffile, "wb") as stream:
+        with NifProfiler.phase("write"), open(kffile, "wb") as stream:
             data.write(stream)
 
         NifLog.info("Finished successfully")
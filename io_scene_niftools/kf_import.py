@@ -37,15 +37,20 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import itertools
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-import pyffi.spells.nif.fix
+import bpy
 
 from io_scene_niftools.file_io.kf import KFFile
 from io_scene_niftools.modules.nif_export import armature
 from io_scene_niftools.modules.nif_import.animation.transform import TransformAnimation
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
+from io_scene_niftools.utils.profiling import NifProfiler
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog, NifError
 
@@ -71,18 +76,43 @@ class KfImport(NifCommon):
                 math.set_bone_orientation(b_armature.data.niftools.axis_forward, b_armature.data.niftools.axis_up)
                 # get nif space bind pose of armature here for all anims
                 self.transform_anim.get_bind_data(b_armature)
-            for kf_file in kf_files:
-                kfdata = KFFile.load_kf(kf_file)
-
-                self.apply_scale(kfdata, NifOp.props.scale_correction)
-
-                # calculate and set frames per second
-                self.transform_anim.set_frames_per_second(kfdata.roots)
-                for kf_root in kfdata.roots:
-                    self.transform_anim.import_kf_root(kf_root, b_armature)
+            NifLog.info(f"Scale Correction set to {NifOp.props.scale_correction}")
+            kf_keys = self.decode_kf_files(kf_files, NifOp.props.scale_correction)
+            for kf_file, (key_times, sequences) in zip(kf_files, kf_keys):
+                with NifProfiler.phase("animation", os.path.basename(kf_file)):
+                    # calculate and set frames per second
+                    self.transform_anim.set_frames_per_second_from_times(key_times)
+                    for sequence_keys in sequences:
+                        self.transform_anim.import_sequence_keys(sequence_keys, b_armature)
 
         except NifError:
             return {'CANCELLED'}
 
         NifLog.info("Finished successfully")
         return {'FINISHED'}
+
+    @staticmethod
+    def decode_kf_files(kf_files, scale):
+        """Yields the key times and sequence keys of each kf file, in order.
+        Several files are parsed and decoded by worker processes, so that only the fcurves are written here."""
+        decoded = 0
+        if len(kf_files) > 1:
+            context = multiprocessing.get_context("spawn")
+            if bpy.app.version < (2, 91, 0):
+                # older versions do not point sys.executable to their python
+                context.set_executable(bpy.app.binary_path_python)
+            try:
+                with ProcessPoolExecutor(min(len(kf_files), os.cpu_count() or 1), mp_context=context) as executor:
+                    results = executor.map(KFFile.read_kf_keys, kf_files, itertools.repeat(scale))
+                    for kf_file in kf_files:
+                        # only the wait for each worker is timed here, as workers do not share the profiler
+                        with NifProfiler.phase("decode", os.path.basename(kf_file)):
+                            kf_keys = next(results)
+                        yield kf_keys
+                        decoded += 1
+            except (BrokenProcessPool, OSError) as e:
+                NifLog.warn(f"Could not decode kf files in parallel ({e}), decoding them one by one")
+        for kf_file in kf_files[decoded:]:
+            with NifProfiler.phase("decode", os.path.basename(kf_file)):
+                kf_keys = KFFile.decode_keys(KFFile.load_kf(kf_file), scale)
+            yield kf_keys
@@ -37,6 +37,7 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import numpy as np
 from pyffi.formats.nif import NifFormat
 from pyffi.formats.egm import EgmFormat
 
@@ -44,6 +45,7 @@ from io_scene_niftools.modules.nif_export.animation import Animation
 from io_scene_niftools.utils.singleton import EGMData
 
 from io_scene_niftools.modules.nif_export.block_registry import block_store
+from io_scene_niftools.utils import arrays
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
 
@@ -54,7 +56,11 @@ class MorphAnimation(Animation):
         super().__init__()
         EGMData.data = None
 
-    def export_morph(self, b_mesh, n_trishape, vertmap):
+    def export_morph(self, b_mesh, n_trishape, b_vertices):
+        """Export shape keys as egm or as morph controller.
+
+        :param b_vertices: For every nif vertex, the index of the blender vertex it was exported from.
+        """
         # shape b_key morphing
         b_key = b_mesh.shape_keys
         if b_key and len(b_key.key_blocks) > 1:
@@ -65,7 +71,7 @@ class MorphAnimation(Animation):
                 # egm export!
                 self.export_egm(b_key.key_blocks)
             elif b_key.animation_data:
-                self.export_morph_animation(b_mesh, b_key, n_trishape, vertmap)
+                self.export_morph_animation(b_mesh, b_key, n_trishape, b_vertices)
 
     def export_egm(self, key_blocks):
         EGMData.data = EgmFormat.Data(num_vertices=len(key_blocks[0].data))
@@ -84,7 +90,7 @@ class MorphAnimation(Animation):
                 relative_vertices.append(key_vert.co - base_vert.co)
             morph.set_relative_vertices(relative_vertices)
 
-    def export_morph_animation(self, b_mesh, b_key, n_trishape, vertmap):
+    def export_morph_animation(self, b_mesh, b_key, n_trishape, b_vertices):
         
         # regular morph_data export
         b_shape_action = self.get_active_action(b_key)
@@ -112,6 +118,7 @@ class MorphAnimation(Animation):
         # TODO [morph] just guessing here, data seems to be zero always
         morph_ctrl.num_unknown_ints = len(b_key.key_blocks)
         morph_ctrl.unknown_ints.update_size()
+        b_base_co = arrays.get_array(b_mesh.vertices, "co", np.float32, 3)
         for key_block_num, key_block in enumerate(b_key.key_blocks):
             # export morphed vertices
             n_morph = morph_data.morphs[key_block_num]
@@ -119,22 +126,16 @@ class MorphAnimation(Animation):
             NifLog.info(f"Exporting n_morph {key_block.name}: vertices")
             n_morph.arg = morph_data.num_vertices
             n_morph.vectors.update_size()
-            for b_v_index, (n_v_indices, b_vert) in enumerate(list(zip(vertmap, key_block.data))):
-                # see if this b_vert is used in the nif
-                if not n_v_indices:
-                    continue
-                # copy blender shapekey vertex
-                mv = b_vert.co.copy()
-                # make the consecutive keys relative to base shapekey
-                if key_block_num > 0:
-                    mv.x -= b_mesh.vertices[b_v_index].co.x
-                    mv.y -= b_mesh.vertices[b_v_index].co.y
-                    mv.z -= b_mesh.vertices[b_v_index].co.z
-                # update nif morph vectors
-                for n_v_index in n_v_indices:
-                    n_morph.vectors[n_v_index].x = mv.x
-                    n_morph.vectors[n_v_index].y = mv.y
-                    n_morph.vectors[n_v_index].z = mv.z
+            # copy blender shapekey vertices
+            b_key_co = arrays.get_array(key_block.data, "co", np.float32, 3)[:len(b_base_co)]
+            # make the consecutive keys relative to base shapekey
+            if key_block_num > 0:
+                b_key_co -= b_base_co[:len(b_key_co)]
+            # update nif morph vectors, every nif vertex gets the vector of its blender vertex
+            n_key_co = np.zeros((morph_data.num_vertices, 3), dtype=np.float32)
+            in_key = b_vertices < len(b_key_co)
+            n_key_co[in_key] = b_key_co[b_vertices[in_key]]
+            arrays.write_array(n_morph.vectors, n_key_co)
 
             # create interpolator for shape b_key (needs to be there even if there is no fcu)
             interpol = block_store.create_block("NiFloatInterpolator")
@@ -301,14 +301,13 @@ class TransformAnimation(Animation):
 
     def add_dummy_controllers(self):
         NifLog.info("Adding controllers and interpolators for skeleton")
-        # note: block_store.block_to_obj changes during iteration, so need list copy
-        for n_block in list(block_store.block_to_obj.keys()):
-            if isinstance(n_block, NifFormat.NiNode) and n_block.name.decode() == "Bip01":
-                for n_bone in n_block.tree(block_type=NifFormat.NiNode):
-                    n_kfc, n_kfi = self.transform_anim.create_controller(n_bone, n_bone.name.decode())
-                    # todo [anim] use self.nif_export.animationhelper.set_flags_and_timing
-                    n_kfc.flags = 12
-                    n_kfc.frequency = 1.0
-                    n_kfc.phase = 0.0
-                    n_kfc.start_time = consts.FLOAT_MAX
-                    n_kfc.stop_time = consts.FLOAT_MIN
+        # note: get_blocks_by_name returns a copy, as block_store changes during iteration
+        for n_block in block_store.get_blocks_by_name("Bip01", NifFormat.NiNode):
+            for n_bone in n_block.tree(block_type=NifFormat.NiNode):
+                n_kfc, n_kfi = self.transform_anim.create_controller(n_bone, n_bone.name.decode())
+                # todo [anim] use self.nif_export.animationhelper.set_flags_and_timing
+                n_kfc.flags = 12
+                n_kfc.frequency = 1.0
+                n_kfc.phase = 0.0
+                n_kfc.start_time = consts.FLOAT_MAX
+                n_kfc.stop_time = consts.FLOAT_MIN
@@ -55,7 +55,7 @@ def replace_blender_name(name, original, replacement, open_replace, close_replac
 class ExportBlockRegistry:
 
     def __init__(self):
-        self._block_to_obj = {}
+        self.block_to_obj = {}
 
     @property
     def block_to_obj(self): 
@@ -64,6 +64,25 @@ class ExportBlockRegistry:
     @block_to_obj.setter
     def block_to_obj(self, value):
         self._block_to_obj = value
+        # indexes into the registered blocks, kept up to date by register_block
+        self._type_to_blocks = {}
+        self._obj_to_blocks = {}
+        self._name_to_blocks = {}
+        self._unnamed_blocks = []
+        # blocks that are shared between all users with the same content, see intern_block
+        self._interned = {}
+        for block, b_obj in value.items():
+            self._index_block(block, b_obj)
+
+    def _index_block(self, block, b_obj):
+        # also index under all base classes, so isinstance queries become lookups
+        for block_type in type(block).__mro__:
+            self._type_to_blocks.setdefault(block_type, []).append(block)
+        if b_obj is not None:
+            self._obj_to_blocks.setdefault(b_obj, []).append(block)
+        # names are usually set after registering, so blocks are added to the name index on demand
+        if isinstance(block, NifFormat.NiObjectNET):
+            self._unnamed_blocks.append(block)
 
     def register_block(self, block, b_obj=None):
         """Helper function to register a newly created block in the list of
@@ -76,9 +95,74 @@ class ExportBlockRegistry:
             NifLog.info(f"Exporting {block.__class__.__name__} block")
         else:
             NifLog.info(f"Exporting {b_obj} as {block.__class__.__name__} block")
+        if block in self._block_to_obj:
+            # registered again, only update the associated object
+            old_obj = self._block_to_obj[block]
+            if old_obj is not None and old_obj != b_obj:
+                self._obj_to_blocks[old_obj].remove(block)
+            if b_obj is not None and old_obj != b_obj:
+                self._obj_to_blocks.setdefault(b_obj, []).append(block)
+        else:
+            self._index_block(block, b_obj)
         self._block_to_obj[block] = b_obj
         return block
 
+    def get_blocks(self, block_type):
+        """Return all registered blocks of the given type, including subclasses, in the order they were registered.
+
+        @param block_type: The nif block class (for instance NifFormat.NiNode).
+        @return: A new list of blocks, so it is safe to register blocks while iterating over it."""
+        return list(self._type_to_blocks.get(block_type, ()))
+
+    def get_blocks_for_obj(self, b_obj, block_type=None):
+        """Return all registered blocks that were exported for a Blender object, optionally only of the given type."""
+        blocks = self._obj_to_blocks.get(b_obj, ())
+        if block_type is not None:
+            return [block for block in blocks if isinstance(block, block_type)]
+        return list(blocks)
+
+    def get_blocks_by_name(self, name, block_type=None):
+        """Return all registered blocks with the given name, optionally only of the given type.
+
+        @param name: The nif name, as str or bytes."""
+        if isinstance(name, str):
+            name = name.encode()
+        for rebuild in (False, True):
+            if rebuild:
+                self._name_to_blocks = {}
+                self._unnamed_blocks = list(self._type_to_blocks.get(NifFormat.NiObjectNET, ()))
+            for block in self._unnamed_blocks:
+                self._name_to_blocks.setdefault(block.name, []).append(block)
+            self._unnamed_blocks = []
+            # blocks may have been renamed since they were indexed, so check the names
+            blocks = [block for block in self._name_to_blocks.get(name, ())
+                      if block.name == name and (block_type is None or isinstance(block, block_type))]
+            if blocks:
+                return blocks
+        return []
+
+    @staticmethod
+    def get_block_key(block):
+        """Return the content key of a block: its type name and its hash, which covers all its attributes and, through
+        the references, those of its children."""
+        return type(block).__name__, block.get_hash()
+
+    def get_interned(self, key):
+        """Return the block that was interned under key, or None."""
+        return self._interned.get(key)
+
+    def intern_block(self, block, key=None):
+        """Return the block with the same content as block if one was interned before, else intern block itself.
+        This replaces scanning all exported blocks for a duplicate. The block is not registered, and it must not be
+        changed anymore once it has been interned.
+
+        @param block: The nif block.
+        @param key: The content key, a (block type, attribute tuple) pair; by default the hash of the block.
+        @return: The shared block."""
+        if key is None:
+            key = self.get_block_key(block)
+        return self._interned.setdefault(key, block)
+
     def create_block(self, block_type, b_obj=None):
         """Helper function to create a new block, register it in the list of
         exported blocks, and associate it with a Blender object.
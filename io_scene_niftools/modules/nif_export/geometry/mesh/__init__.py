@@ -46,11 +46,13 @@ from pyffi.formats.nif import NifFormat
 
 import io_scene_niftools.utils.logging
 from io_scene_niftools.modules.nif_export.geometry import mesh
+from io_scene_niftools.modules.nif_export.geometry.vertex import CornerData, expand_to_corners
 from io_scene_niftools.modules.nif_export.animation.morph import MorphAnimation
 from io_scene_niftools.modules.nif_export.block_registry import block_store
 from io_scene_niftools.modules.nif_export.property.object import ObjectProperty
 from io_scene_niftools.modules.nif_export.property.texture.types.nitextureprop import NiTextureProp
-from io_scene_niftools.utils import math
+from io_scene_niftools.utils import arrays, math
+from io_scene_niftools.utils.profiling import NifProfiler
 from io_scene_niftools.utils.singleton import NifOp, NifData
 from io_scene_niftools.utils.logging import NifLog, NifError
 from io_scene_niftools.modules.nif_export.geometry.mesh.skin_partition import update_skin_partition
@@ -109,16 +111,46 @@ class Mesh:
 
         # Non-textured materials, vertex colors are used to color the mesh
         # Textured materials, they represent lighting details
+        material_hasnormals = [self.get_has_normals(b_mat, game) for b_mat in mesh_materials]
+
+        mesh_uv_layers = b_mesh.uv_layers
+        if b_mesh.polygons:
+            if mesh_uv_layers:
+                # if we have uv coordinates double check that we have uv data
+                if not b_mesh.uv_layer_stencil:
+                    NifLog.warn(f"No UV map for texture associated with selected mesh '{b_mesh.name}'.")
+
+        mesh_hastangents = False
+        if mesh_uv_layers and any(material_hasnormals):
+            if game in ('OBLIVION', 'FALLOUT_3', 'SKYRIM') or (game in self.texture_helper.USED_EXTRA_SHADER_TEXTURES):
+                mesh_hastangents = True
+                b_mesh.calc_tangents(uvmap=mesh_uv_layers[0].name)
+
+        # read all face corner data in one go, and bucket the polygons by material
+        corner_data = CornerData(b_mesh,
+                                 use_normals=any(material_hasnormals),
+                                 use_vertex_colors=bool(mesh_hasvcol),
+                                 use_tangents=mesh_hastangents)
+        material_polygons = corner_data.get_material_polygons(len(mesh_materials))
+
+        # todo [mesh/object] use more sophisticated armature finding, also taking armature modifier into account
+        b_obj_armature = None
+        boneinfluences = []
+        if b_obj.parent and b_obj.parent.type == 'ARMATURE':
+            b_obj_armature = b_obj.parent
+            vertgroups = {vertex_group.name for vertex_group in b_obj.vertex_groups}
+            bone_names = set(b_obj_armature.data.bones.keys())
+            # the vertgroups that correspond to bone_names are bones that influence the mesh
+            boneinfluences = list(vertgroups & bone_names)
+        if boneinfluences:
+            # find weights and normalization factors of all vertices once, for all trishapes
+            weight_vertices, weight_bones, weights, unweighted_vertices = self.get_bone_weights(b_obj, b_mesh, boneinfluences)
 
         # let's now export one trishape for every mesh material
         # TODO [material] needs refactoring - move material, texture, etc. to separate function
         for materialIndex, b_mat in enumerate(mesh_materials):
 
-            mesh_hasnormals = False
-            if b_mat is not None:
-                mesh_hasnormals = True  # for proper lighting
-                if (game == 'SKYRIM') and b_mat.niftools_shader.slsf_1_model_space_normals:
-                    mesh_hasnormals = False  # for proper lighting
+            mesh_hasnormals = material_hasnormals[materialIndex]
 
             # create a trishape block
             if not NifOp.props.stripify:
@@ -188,127 +220,64 @@ class Mesh:
             # The following algorithm extracts all unique quads(vert, uv-vert, normal, vcol),
             # produce lists of vertices, uv-vertices, normals, vertex colors, and face indices.
 
-            mesh_uv_layers = b_mesh.uv_layers
-            vertquad_list = []  # (vertex, uv coordinate, normal, vertex color) list
-            vertex_map = [None for _ in range(len(b_mesh.vertices))]  # blender vertex -> nif vertices
-            vertex_positions = []
-            normals = []
-            vertex_colors = []
-            uv_coords = []
-            triangles = []
+            use_tangents = mesh_hastangents and mesh_hasnormals
+
+            # does the face belong to this trishape?
+            if b_mat is not None:
+                polygons = material_polygons[materialIndex]
+            else:
+                # no material, so every (non-degenerate) face belongs to this trishape
+                polygons = np.flatnonzero(corner_data.loop_totals >= 3)
+            loops, offsets = corner_data.get_polygon_loops(polygons)
+
+            # find the unique (vert, uv-vert, normal, vcol) quads
+            corner_loops, loop_corners = corner_data.get_unique_corners(loops, NifOp.props.epsilon, use_normals=mesh_hasnormals)
+            if len(corner_loops) > 65536:
+                raise NifError("Too many vertices. Decimate your mesh and try again.")
+            b_vertices = corner_data.loop_vertices[corner_loops]  # nif vertex -> blender vertex
+            vertex_positions = corner_data.positions[b_vertices]
+            if mesh_hasnormals:
+                normals = corner_data.normals[corner_loops]
+            if mesh_hasvcol:
+                vertex_colors = corner_data.vertex_colors[corner_loops]
+            if mesh_uv_layers:
+                uv_coords = corner_data.uvs[corner_loops]
+            if use_tangents:
+                tangents = corner_data.tangents[corner_loops]
+                bitangent_signs = corner_data.bitangent_signs[corner_loops, None]
+
+            # now add the (hopefully, convex) faces, in triangles
+            tri_corners, tri_polygons = corner_data.get_triangles(polygons, offsets)
+            triangles = loop_corners[tri_corners]
+            if (b_obj.scale.x + b_obj.scale.y + b_obj.scale.z) <= 0:
+                triangles = triangles[:, (0, 2, 1)]
+
+            # identical geometry, such as instances of the same mesh, shares a single data block
+            # skinned geometry gets its own data, as the skin partition and bind position are set on it
+            data_key = None
+            if not boneinfluences:
+                data_key = self.get_data_key(
+                    type(trishape).__name__, (b_obj.niftools.consistency_flags, game),
+                    vertex_positions, triangles,
+                    normals if mesh_hasnormals else None,
+                    vertex_colors if mesh_hasvcol else None,
+                    uv_coords if mesh_uv_layers else None,
+                    tangents if use_tangents else None,
+                    bitangent_signs if use_tangents else None)
+            triangles = list(map(tuple, triangles.tolist()))
+
             # for each face in triangles, a body part index
             bodypartfacemap = []
             polygons_without_bodypart = []
-
-            if b_mesh.polygons:
-                if mesh_uv_layers:
-                    # if we have uv coordinates double check that we have uv data
-                    if not b_mesh.uv_layer_stencil:
-                        NifLog.warn(f"No UV map for texture associated with selected mesh '{b_mesh.name}'.")
-
-            use_tangents = False
-            if mesh_uv_layers and mesh_hasnormals:
-                if game in ('OBLIVION', 'FALLOUT_3', 'SKYRIM') or (game in self.texture_helper.USED_EXTRA_SHADER_TEXTURES):
-                    use_tangents = True
-                    b_mesh.calc_tangents(uvmap=mesh_uv_layers[0].name)
-                    tangents = []
-                    bitangent_signs = []
-
-            for poly in b_mesh.polygons:
-
-                # does the face belong to this trishape?
-                if b_mat is not None and poly.material_index != materialIndex:
-                    # we have a material but this face has another material, so skip
-                    continue
-
-                f_numverts = len(poly.vertices)
-                if f_numverts < 3:
-                    continue  # ignore degenerate polygons
-                assert ((f_numverts == 3) or (f_numverts == 4))  # debug
-
-                # find (vert, uv-vert, normal, vcol) quad, and if not found, create it
-                f_index = [-1] * f_numverts
-                for i, loop_index in enumerate(poly.loop_indices):
-
-                    fv_index = b_mesh.loops[loop_index].vertex_index
-                    vertex = b_mesh.vertices[fv_index]
-                    vertex_index = vertex.index
-                    fv = vertex.co
-
-                    # smooth = vertex normal, non-smooth = face normal)
-                    if mesh_hasnormals:
-                        if poly.use_smooth:
-                            fn = b_mesh.loops[loop_index].normal
-                        else:
-                            fn = poly.normal
-                    else:
-                        fn = None
-
-                    fuv = [uv_layer.data[loop_index].uv for uv_layer in b_mesh.uv_layers]
-
-                    # TODO [geomotry][mesh] Need to map b_verts -> n_verts
-                    if mesh_hasvcol:
-                        f_col = list(b_mesh.vertex_colors[0].data[loop_index].color)
-                    else:
-                        f_col = None
-
-                    vertquad = (fv, fuv, fn, f_col)
-
-                    # check for duplicate vertquad?
-                    f_index[i] = len(vertquad_list)
-                    if vertex_map[vertex_index] is not None:
-                        # iterate only over vertices with the same vertex index
-                        for j in vertex_map[vertex_index]:
-                            # check if they have the same uvs, normals and colors
-                            if self.is_new_face_corner_data(vertquad, vertquad_list[j]):
-                                continue
-                            # all tests passed: so yes, we already have a vert with the same face corner data!
-                            f_index[i] = j
-                            break
-
-                    if f_index[i] > 65535:
-                        raise NifError("Too many vertices. Decimate your mesh and try again.")
-
-                    if f_index[i] == len(vertquad_list):
-                        # first: add it to the vertex map
-                        if not vertex_map[vertex_index]:
-                            vertex_map[vertex_index] = []
-                        vertex_map[vertex_index].append(len(vertquad_list))
-                        # new (vert, uv-vert, normal, vcol) quad: add it
-                        vertquad_list.append(vertquad)
-
-                        # add the vertex
-                        vertex_positions.append(vertquad[0])
-                        if mesh_hasnormals:
-                            normals.append(vertquad[2])
-                        if use_tangents:
-                            tangents.append(b_mesh.loops[loop_index].tangent)
-                            bitangent_signs.append([b_mesh.loops[loop_index].bitangent_sign])
-                        if mesh_hasvcol:
-                            vertex_colors.append(vertquad[3])
-                        if mesh_uv_layers:
-                            uv_coords.append(vertquad[1])
-
-                # now add the (hopefully, convex) face, in triangles
-                for i in range(f_numverts - 2):
-                    if (b_obj.scale.x + b_obj.scale.y + b_obj.scale.z) > 0:
-                        f_indexed = (f_index[0], f_index[1 + i], f_index[2 + i])
-                    else:
-                        f_indexed = (f_index[0], f_index[2 + i], f_index[1 + i])
-                    triangles.append(f_indexed)
-
-                    # add body part number
-                    if game not in ('FALLOUT_3', 'SKYRIM') or not polygon_parts:
-                        # TODO: or not self.EXPORT_FO3_BODYPARTS):
-                        bodypartfacemap.append(0)
-                    else:
-                        # add the polygon's body part
-                        part_index = polygon_parts[poly.index]
-                        if part_index >= 0:
-                            bodypartfacemap.append(part_index)
-                        else:
-                            # this signals an error
-                            polygons_without_bodypart.append(poly)
+            if game not in ('FALLOUT_3', 'SKYRIM') or not polygon_parts:
+                # TODO: or not self.EXPORT_FO3_BODYPARTS):
+                bodypartfacemap = [0] * len(triangles)
+            else:
+                # add the polygon's body part
+                tri_parts = np.asarray(polygon_parts)[polygons[tri_polygons]]
+                bodypartfacemap = tri_parts[tri_parts >= 0].tolist()
+                # this signals an error
+                polygons_without_bodypart = [b_mesh.polygons[i] for i in np.unique(polygons[tri_polygons][tri_parts < 0]).tolist()]
 
             # check that there are no missing body part polygons
             if polygons_without_bodypart:
@@ -320,55 +289,56 @@ class Mesh:
                 continue  # m_4444x: skip 'empty' material indices
 
             # add NiTriShape's data
-            if isinstance(trishape, NifFormat.NiTriShape):
-                tridata = block_store.create_block("NiTriShapeData", b_obj)
+            tridata = block_store.get_interned(data_key) if data_key else None
+            shared_data = tridata is not None
+            if shared_data:
+                NifLog.info(f"Sharing geometry data of {b_obj} with {block_store.block_to_obj[tridata]}")
+                trishape.data = tridata
             else:
-                tridata = block_store.create_block("NiTriStripsData", b_obj)
-            trishape.data = tridata
-
-            # data
-            tridata.num_vertices = len(vertex_positions)
-            tridata.has_vertices = True
-            tridata.vertices.update_size()
-            for i, v in enumerate(tridata.vertices):
-                v.x, v.y, v.z = vertex_positions[i]
-            tridata.update_center_radius()
-
-            if mesh_hasnormals:
-                tridata.has_normals = True
-                tridata.normals.update_size()
-                for i, v in enumerate(tridata.normals):
-                    v.x, v.y, v.z = normals[i]
-
-            if mesh_hasvcol:
-                tridata.has_vertex_colors = True
-                tridata.vertex_colors.update_size()
-                for i, v in enumerate(tridata.vertex_colors):
-                    v.r, v.g, v.b, v.a = vertex_colors[i]
+                if isinstance(trishape, NifFormat.NiTriShape):
+                    tridata = block_store.create_block("NiTriShapeData", b_obj)
+                else:
+                    tridata = block_store.create_block("NiTriStripsData", b_obj)
+                trishape.data = tridata
+
+                # data
+                tridata.num_vertices = len(vertex_positions)
+                tridata.has_vertices = True
+                tridata.vertices.update_size()
+                arrays.write_array(tridata.vertices, vertex_positions)
+                tridata.update_center_radius()
+
+                if mesh_hasnormals:
+                    tridata.has_normals = True
+                    tridata.normals.update_size()
+                    arrays.write_array(tridata.normals, normals)
+
+                if mesh_hasvcol:
+                    tridata.has_vertex_colors = True
+                    tridata.vertex_colors.update_size()
+                    arrays.write_array(tridata.vertex_colors, vertex_colors, arrays.COLOR4)
 
-            if mesh_uv_layers:
-                if game in ('FALLOUT_3', 'SKYRIM'):
-                    if len(mesh_uv_layers) > 1:
-                        raise NifError(f"{game} does not support multiple UV layers.")
-                tridata.num_uv_sets = len(mesh_uv_layers)
-                tridata.bs_num_uv_sets = len(mesh_uv_layers)
-                tridata.has_uv = True
-                tridata.uv_sets.update_size()
-                for j, uv_layer in enumerate(mesh_uv_layers):
-                    for i, uv in enumerate(tridata.uv_sets[j]):
-                        if len(uv_coords[i]) == 0:
-                            continue  # skip non-uv textures
-                        uv.u = uv_coords[i][j][0]
-                        # NIF flips the texture V-coordinate (OpenGL standard)
-                        uv.v = 1.0 - uv_coords[i][j][1]  # opengl standard
-
-            # set triangles stitch strips for civ4
-            tridata.set_triangles(triangles, stitchstrips=NifOp.props.stitch_strips)
+                if mesh_uv_layers:
+                    if game in ('FALLOUT_3', 'SKYRIM'):
+                        if len(mesh_uv_layers) > 1:
+                            raise NifError(f"{game} does not support multiple UV layers.")
+                    tridata.num_uv_sets = len(mesh_uv_layers)
+                    tridata.bs_num_uv_sets = len(mesh_uv_layers)
+                    tridata.has_uv = True
+                    tridata.uv_sets.update_size()
+                    # NIF flips the texture V-coordinate (OpenGL standard)
+                    uv_coords[:, :, 1] = 1.0 - uv_coords[:, :, 1]
+                    for j, uv_layer in enumerate(mesh_uv_layers):
+                        arrays.write_array(tridata.uv_sets[j], uv_coords[:, j], arrays.TEXCOORD)
+
+                # set triangles stitch strips for civ4
+                tridata.set_triangles(triangles, stitchstrips=NifOp.props.stitch_strips)
 
             # update tangent space (as binary extra data only for Oblivion)
             # for extra shader texture games, only export it if those textures are actually exported
             # (civ4 seems to be consistent with not using tangent space on non shadered nifs)
-            if use_tangents:
+            # shared data already has its tangents, unless they are stored on the shape
+            if use_tangents and (not shared_data or game == 'OBLIVION'):
                 if game == 'SKYRIM':
                     tridata.bs_num_uv_sets = tridata.bs_num_uv_sets + 4096
                 # calculate the bitangents using the normals, tangent list and bitangent sign
@@ -380,108 +350,65 @@ class Mesh:
                                           bitangents=tangents,
                                           as_extra_data=(game == 'OBLIVION'))
 
-            # todo [mesh/object] use more sophisticated armature finding, also taking armature modifier into account
             # now export the vertex weights, if there are any
-            if b_obj.parent and b_obj.parent.type == 'ARMATURE':
-                b_obj_armature = b_obj.parent
-                vertgroups = {vertex_group.name for vertex_group in b_obj.vertex_groups}
-                bone_names = set(b_obj_armature.data.bones.keys())
-                # the vertgroups that correspond to bone_names are bones that influence the mesh
-                boneinfluences = vertgroups & bone_names
-                if boneinfluences:  # yes we have skinning!
-                    # create new skinning instance block and link it
-                    skininst, skindata = self.create_skin_inst_data(b_obj, b_obj_armature, polygon_parts)
-                    trishape.skin_instance = skininst
-
-                    # Vertex weights,  find weights and normalization factors
-                    vert_list = {}
-                    vert_norm = {}
-                    unweighted_vertices = []
-
-                    for bone_group in boneinfluences:
-                        b_list_weight = []
-                        b_vert_group = b_obj.vertex_groups[bone_group]
-
-                        for b_vert in b_mesh.vertices:
-                            if len(b_vert.groups) == 0:  # check vert has weight_groups
-                                unweighted_vertices.append(b_vert.index)
-                                continue
-
-                            for g in b_vert.groups:
-                                if b_vert_group.name in boneinfluences:
-                                    if g.group == b_vert_group.index:
-                                        b_list_weight.append((b_vert.index, g.weight))
-                                        break
-
-                        vert_list[bone_group] = b_list_weight
-
-                        # create normalisation groupings
-                        for v in vert_list[bone_group]:
-                            if v[0] in vert_norm:
-                                vert_norm[v[0]] += v[1]
-                            else:
-                                vert_norm[v[0]] = v[1]
-
-                    self.select_unweighted_vertices(b_obj, unweighted_vertices)
-
-                    # for each bone, first we get the bone block then we get the vertex weights and then we add it to the NiSkinData
-                    # note: allocate memory for faster performance
-                    vert_added = [False for _ in range(len(vertex_positions))]
-                    for b_bone_name in boneinfluences:
-                        # find bone in exported blocks
-                        bone_block = self.get_bone_block(b_obj_armature.data.bones[b_bone_name])
-
-                        # find vertex weights
-                        vert_weights = {}
-                        for v in vert_list[b_bone_name]:
-                            # v[0] is the original vertex index
-                            # v[1] is the weight
-
-                            # vertex_map[v[0]] is the set of vertices (indices) to which v[0] was mapped
-                            # so we simply export the same weight as the original vertex for each new vertex
-
-                            # write the weights
-                            # extra check for multi material meshes
-                            if vertex_map[v[0]] and vert_norm[v[0]]:
-                                for vert_index in vertex_map[v[0]]:
-                                    vert_weights[vert_index] = v[1] / vert_norm[v[0]]
-                                    vert_added[vert_index] = True
-                        # add bone as influence, but only if there were actually any vertices influenced by the bone
-                        if vert_weights:
-                            trishape.add_bone(bone_block, vert_weights)
-
-                    # update bind position skinning data
-                    # trishape.update_bind_position()
-                    # override pyffi trishape.update_bind_position with custom one that is relative to the nif root
-                    self.update_bind_position(trishape, n_root, b_obj_armature)
-
-                    # calculate center and radius for each skin bone data block
-                    trishape.update_skin_center_radius()
-
-                    if NifData.data.version >= 0x04020100 and NifOp.props.skin_partition:
-                        NifLog.info("Creating skin partition")
-
-                        # warn on bad config settings
-                        if game == 'OBLIVION':
-                            if NifOp.props.pad_bones:
-                                NifLog.warn("Using padbones on Oblivion export. Disable the pad bones option to get higher quality skin partitions.")
-                        if game in ('OBLIVION', 'FALLOUT_3'):
-                            if NifOp.props.max_bones_per_partition < 18:
-                                NifLog.warn("Using less than 18 bones per partition on Oblivion/Fallout 3 export."
-                                            "Set it to 18 to get higher quality skin partitions.")
-                            elif NifOp.props.max_bones_per_partition > 18:
-                                NifLog.warn("Using more than 18 bones per partition on Oblivion/Fallout 3 export."
-                                            "This may cause issues in-game.")
-                        if game == 'SKYRIM':
-                            if NifOp.props.max_bones_per_partition < 24:
-                                NifLog.warn("Using less than 24 bones per partition on Skyrim export."
-                                            "Set it to 24 to get higher quality skin partitions.")
-                        # Skyrim Special Edition has a limit of 80 bones per partition, but export is not yet supported
-
-                        part_order = [getattr(NifFormat.BSDismemberBodyPartType, face_map.name, None) for face_map in b_obj.face_maps]
-                        part_order = [body_part for body_part in part_order if body_part is not None]
-                        # override pyffi trishape.update_skin_partition with custom one (that allows ordering)
-                        trishape.update_skin_partition = update_skin_partition.__get__(trishape)
+            if boneinfluences:  # yes we have skinning!
+                # create new skinning instance block and link it
+                skininst, skindata = self.create_skin_inst_data(b_obj, b_obj_armature, polygon_parts)
+                trishape.skin_instance = skininst
+
+                self.select_unweighted_vertices(b_obj, unweighted_vertices)
+
+                # every nif vertex gets the weights of the blender vertex it was made from
+                n_vertices, n_entries = expand_to_corners(b_vertices, weight_vertices)
+                n_bones = weight_bones[n_entries]
+                n_weights = weights[n_entries]
+                # group the weights by bone, keeping vertex order within each bone
+                bone_order = np.argsort(n_bones, kind="stable")
+                bone_bounds = np.searchsorted(n_bones[bone_order], np.arange(len(boneinfluences) + 1))
+
+                # for each bone, first we get the bone block then we get the vertex weights and then we add it to the NiSkinData
+                for bone_index, b_bone_name in enumerate(boneinfluences):
+                    # find bone in exported blocks
+                    bone_block = self.get_bone_block(b_obj_armature.data.bones[b_bone_name])
+                    bone_entries = bone_order[bone_bounds[bone_index]:bone_bounds[bone_index + 1]]
+                    # add bone as influence, but only if there were actually any vertices influenced by the bone
+                    if len(bone_entries):
+                        vert_weights = dict(zip(n_vertices[bone_entries].tolist(), n_weights[bone_entries].tolist()))
+                        trishape.add_bone(bone_block, vert_weights)
+
+                # update bind position skinning data
+                # trishape.update_bind_position()
+                # override pyffi trishape.update_bind_position with custom one that is relative to the nif root
+                self.update_bind_position(trishape, n_root, b_obj_armature)
+
+                # calculate center and radius for each skin bone data block
+                trishape.update_skin_center_radius()
+
+                if NifData.data.version >= 0x04020100 and NifOp.props.skin_partition:
+                    NifLog.info("Creating skin partition")
+
+                    # warn on bad config settings
+                    if game == 'OBLIVION':
+                        if NifOp.props.pad_bones:
+                            NifLog.warn("Using padbones on Oblivion export. Disable the pad bones option to get higher quality skin partitions.")
+                    if game in ('OBLIVION', 'FALLOUT_3'):
+                        if NifOp.props.max_bones_per_partition < 18:
+                            NifLog.warn("Using less than 18 bones per partition on Oblivion/Fallout 3 export."
+                                        "Set it to 18 to get higher quality skin partitions.")
+                        elif NifOp.props.max_bones_per_partition > 18:
+                            NifLog.warn("Using more than 18 bones per partition on Oblivion/Fallout 3 export."
+                                        "This may cause issues in-game.")
+                    if game == 'SKYRIM':
+                        if NifOp.props.max_bones_per_partition < 24:
+                            NifLog.warn("Using less than 24 bones per partition on Skyrim export."
+                                        "Set it to 24 to get higher quality skin partitions.")
+                    # Skyrim Special Edition has a limit of 80 bones per partition, but export is not yet supported
+
+                    part_order = [getattr(NifFormat.BSDismemberBodyPartType, face_map.name, None) for face_map in b_obj.face_maps]
+                    part_order = [body_part for body_part in part_order if body_part is not None]
+                    # override pyffi trishape.update_skin_partition with custom one (that allows ordering)
+                    trishape.update_skin_partition = update_skin_partition.__get__(trishape)
+                    with NifProfiler.phase("skin partition", b_obj.name):
                         lostweight = trishape.update_skin_partition(
                             maxbonesperpartition=NifOp.props.max_bones_per_partition,
                             maxbonespervertex=NifOp.props.max_bones_per_vertex,
@@ -493,20 +420,33 @@ class Mesh:
                             maximize_bone_sharing=(game in ('FALLOUT_3', 'SKYRIM')),
                             part_sort_order=part_order)
 
-                        if lostweight > NifOp.props.epsilon:
-                            NifLog.warn(f"Lost {lostweight:f} in vertex weights while creating a skin partition for Blender object '{b_obj.name}' (nif block '{trishape.name}')")
-
-                    # clean up
-                    del vert_weights
-                    del vert_added
+                    if lostweight > NifOp.props.epsilon:
+                        NifLog.warn(f"Lost {lostweight:f} in vertex weights while creating a skin partition for Blender object '{b_obj.name}' (nif block '{trishape.name}')")
 
             # fix data consistency type
             tridata.consistency_flags = b_obj.niftools.consistency_flags
+            if data_key and not shared_data:
+                block_store.intern_block(tridata, data_key)
 
             # export EGM or NiGeomMorpherController animation
-            self.morph_anim.export_morph(b_mesh, trishape, vertex_map)
+            self.morph_anim.export_morph(b_mesh, trishape, b_vertices)
         return trishape
 
+    @staticmethod
+    def get_data_key(block_type, flags, *data_arrays):
+        """Return a key that identifies geometry data by its content, from the data block type, a hashable tuple of
+        settings and the arrays that are written to the data block (None for arrays that are not exported)."""
+        return block_type, flags, arrays.hash_arrays(*data_arrays)
+
+    @staticmethod
+    def get_has_normals(b_mat, game):
+        """Whether the trishape of this material needs normals (for proper lighting)"""
+        if b_mat is None:
+            return False
+        if (game == 'SKYRIM') and b_mat.niftools_shader.slsf_1_model_space_normals:
+            return False
+        return True
+
     def update_bind_position(self, n_geom, n_root, b_obj_armature):
         """Transfer the Blender bind position to the nif bind position.
         Sets the NiSkinData overall transform to the inverse of the geometry transform
@@ -549,11 +489,48 @@ class Mesh:
 
     def get_bone_block(self, b_bone):
         """For a blender bone, return the corresponding nif node from the blocks that have already been exported"""
-        for n_block, b_obj in block_store.block_to_obj.items():
-            if isinstance(n_block, NifFormat.NiNode) and b_bone == b_obj:
-                return n_block
+        for n_block in block_store.get_blocks_for_obj(b_bone, NifFormat.NiNode):
+            return n_block
         raise NifError(f"Bone '{b_bone.name}' not found.")
 
+    def get_bone_weights(self, b_obj, b_mesh, bone_names):
+        """Read the weights of the vertex groups of the given bones in a single pass over the vertices.
+
+        :return: Arrays of vertex index, bone index (into bone_names) and weight, normalized per vertex, and the list
+            of vertices that are not in any vertex group.
+        """
+        group_bones = np.full(len(b_obj.vertex_groups), -1, dtype=np.int64)
+        for bone_index, bone_name in enumerate(bone_names):
+            group_bones[b_obj.vertex_groups[bone_name].index] = bone_index
+
+        vertices = []
+        groups = []
+        weights = []
+        unweighted_vertices = []
+        for b_vert in b_mesh.vertices:
+            if len(b_vert.groups) == 0:  # check vert has weight_groups
+                unweighted_vertices.append(b_vert.index)
+                continue
+            for g in b_vert.groups:
+                vertices.append(b_vert.index)
+                groups.append(g.group)
+                weights.append(g.weight)
+
+        vertices = np.array(vertices, dtype=np.int64)
+        groups = np.array(groups, dtype=np.int64)
+        weights = np.array(weights, dtype=np.float64)
+        # only keep the weights of vertex groups that belong to a bone
+        bones = np.full(len(groups), -1, dtype=np.int64)
+        valid = groups < len(group_bones)
+        bones[valid] = group_bones[groups[valid]]
+        is_bone = bones >= 0
+        vertices, bones, weights = vertices[is_bone], bones[is_bone], weights[is_bone]
+
+        # normalize, skipping vertices whose bone weights sum to zero
+        vert_norm = np.bincount(vertices, weights, minlength=len(b_mesh.vertices))[vertices]
+        non_zero = vert_norm != 0
+        return vertices[non_zero], bones[non_zero], weights[non_zero] / vert_norm[non_zero], unweighted_vertices
+
     def get_polygon_parts(self, b_obj, b_mesh):
         """Returns the body part indices of the mesh polygons. -1 is either not assigned to a face map or not a valid
         body part"""
@@ -586,11 +563,9 @@ class Mesh:
         else:
             n_root_name = block_store.get_full_name(b_obj_armature)
         # make sure that such a block exists, find it
-        for block in block_store.block_to_obj:
-            if isinstance(block, NifFormat.NiNode):
-                if block.name.decode() == n_root_name:
-                    skininst.skeleton_root = block
-                    break
+        for block in block_store.get_blocks_by_name(n_root_name, NifFormat.NiNode):
+            skininst.skeleton_root = block
+            break
         else:
             raise NifError(f"Skeleton root '{n_root_name}' not found.")
 
@@ -698,25 +673,6 @@ class Mesh:
         raise NifError(f"Some polygons of {b_obj.name} not assigned to any body part."
                        f"The unassigned polygons have been selected in the mesh so they can easily be identified.")
 
-    def is_new_face_corner_data(self, vertquad, v_quad_old):
-        """Compares vert info to old vert info if relevant data is present"""
-        # uvs
-        if v_quad_old[1]:
-            for i in range(2):
-                if max(abs(vertquad[1][uv_index][i] - v_quad_old[1][uv_index][i]) for uv_index in
-                       range(len(v_quad_old[1]))) > NifOp.props.epsilon:
-                    return True
-        # normals
-        if v_quad_old[2]:
-            for i in range(3):
-                if abs(vertquad[2][i] - v_quad_old[2][i]) > NifOp.props.epsilon:
-                    return True
-        # vcols
-        if v_quad_old[3]:
-            for i in range(4):
-                if abs(vertquad[3][i] - v_quad_old[3][i]) > NifOp.props.epsilon:
-                    return True
-
     def export_texture_effect(self, n_block, b_mat):
         # todo [texture] detect effect
         ref_mtex = False
@@ -790,11 +746,5 @@ class Mesh:
             # XXX from Sid Meier's Railroad
             trishape.data.tangents.update_size()
             trishape.data.bitangents.update_size()
-            for vec, data_tans in zip(tangents, trishape.data.tangents):
-                data_tans.x = vec[0]
-                data_tans.y = vec[1]
-                data_tans.z = vec[2]
-            for vec, data_bins in zip(bitangents, trishape.data.bitangents):
-                data_bins.x = vec[0]
-                data_bins.y = vec[1]
-                data_bins.z = vec[2]
+            arrays.write_array(trishape.data.tangents, tangents)
+            arrays.write_array(trishape.data.bitangents, bitangents)
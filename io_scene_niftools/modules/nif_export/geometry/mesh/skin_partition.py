@@ -36,7 +36,10 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import heapq
 import logging
+from itertools import repeat
+
 import pyffi
 from pyffi.formats.nif import NifFormat
 
@@ -200,79 +203,7 @@ def update_skin_partition(self,
 
     # split triangles into partitions
     logger.info("Creating partitions")
-    parts = []
-    # keep creating partitions as long as there are triangles left
-    while triangles:
-        # create a partition
-        part = [set(), [], None] # bones, triangles, partition index
-        usedverts = set()
-        addtriangles = True
-        # keep adding triangles to it as long as the flag is set
-        while addtriangles:
-            # newtriangles is a list of triangles that have not been added to
-            # the partition, similar for newtrianglepartmap
-            newtriangles = []
-            newtrianglepartmap = []
-            for tri, partindex in zip(triangles, trianglepartmap):
-                # find the bones influencing this triangle
-                tribones = []
-                for t in tri:
-                    tribones.extend([
-                        bonenum for bonenum, boneweight in weights[t]])
-                tribones = set(tribones)
-                # if part has no bones,
-                # or if part has all bones of tribones and index coincides
-                # then add this triangle to this part
-                if ((not part[0])
-                    or ((part[0] >= tribones) and (part[2] == partindex))):
-                    part[0] |= tribones
-                    part[1].append(tri)
-                    usedverts |= set(tri)
-                    # if part was empty, assign it the index
-                    if part[2] is None:
-                        part[2] = partindex
-                else:
-                    newtriangles.append(tri)
-                    newtrianglepartmap.append(partindex)
-            triangles = newtriangles
-            trianglepartmap = newtrianglepartmap
-
-            # if we have room left in the partition
-            # then add adjacent triangles
-            addtriangles = False
-            newtriangles = []
-            newtrianglepartmap = []
-            if len(part[0]) < maxbonesperpartition:
-                for tri, partindex in zip(triangles, trianglepartmap):
-                    # if triangle is adjacent, and has same index
-                    # then check if it can be added to the partition
-                    if (usedverts & set(tri)) and (part[2] == partindex):
-                        # find the bones influencing this triangle
-                        tribones = []
-                        for t in tri:
-                            tribones.extend([
-                                bonenum for bonenum, boneweight in weights[t]])
-                        tribones = set(tribones)
-                        # and check if we exceed the maximum number of allowed
-                        # bones
-                        if len(part[0] | tribones) <= maxbonesperpartition:
-                            part[0] |= tribones
-                            part[1].append(tri)
-                            usedverts |= set(tri)
-                            # signal another try in adding triangles to
-                            # the partition
-                            addtriangles = True
-                        else:
-                            newtriangles.append(tri)
-                            newtrianglepartmap.append(partindex)
-                    else:
-                        newtriangles.append(tri)
-                        newtrianglepartmap.append(partindex)
-                triangles = newtriangles
-                trianglepartmap = newtrianglepartmap
-
-        parts.append(part)
-
+    parts = create_partitions(triangles, trianglepartmap, weights, maxbonesperpartition)
     logger.info("Created %i small partitions." % len(parts))
 
     # merge all partitions
@@ -435,12 +366,12 @@ def update_skin_partition(self,
             # store part for next iteration
             lastpart = part
 
-    for skinpartblock, part in zip(skinpart.skin_partition_blocks, parts):
+    for partnum, (skinpartblock, part) in enumerate(zip(skinpart.skin_partition_blocks, parts)):
         # get sorted list of bones
         bones = sorted(list(part[0]))
         triangles = part[1]
         logger.info("Optimizing triangle ordering in partition %i"
-                    % parts.index(part))
+                    % partnum)
         # optimize triangles for vertex cache and calculate strips
         triangles = pyffi.utils.vertex_cache.get_cache_optimized_triangles(
             triangles)
@@ -449,6 +380,8 @@ def update_skin_partition(self,
         triangles_size = 3 * len(triangles)
         strips_size = len(strips) + sum(len(strip) for strip in strips)
         vertices = []
+        # maps each vertex to its index in vertices
+        vertex_index = {}
         # decide whether to use strip or triangles as primitive
         if stripify is None:
             stripifyblock = (
@@ -467,7 +400,8 @@ def update_skin_partition(self,
             for strip in strips:
                 numtriangles += len(strip) - 2
                 for t in strip:
-                    if t not in vertices:
+                    if t not in vertex_index:
+                        vertex_index[t] = len(vertices)
                         vertices.append(t)
         else:
             numtriangles = len(triangles)
@@ -476,7 +410,8 @@ def update_skin_partition(self,
             # by triangle
             for tri in triangles:
                 for t in tri:
-                    if t not in vertices:
+                    if t not in vertex_index:
+                        vertex_index[t] = len(vertices)
                         vertices.append(t)
         # set all the data
         skinpartblock.num_vertices = len(vertices)
@@ -524,7 +459,7 @@ def update_skin_partition(self,
             skinpartblock.strips.update_size()
             for i, strip in enumerate(strips):
                 for j, v in enumerate(strip):
-                    skinpartblock.strips[i][j] = vertices.index(v)
+                    skinpartblock.strips[i][j] = vertex_index[v]
         else:
             skinpartblock.has_faces = True
             # clear strip lengths array
@@ -533,9 +468,9 @@ def update_skin_partition(self,
             skinpartblock.strips.update_size()
             skinpartblock.triangles.update_size()
             for i, (v_1,v_2,v_3) in enumerate(triangles):
-                skinpartblock.triangles[i].v_1 = vertices.index(v_1)
-                skinpartblock.triangles[i].v_2 = vertices.index(v_2)
-                skinpartblock.triangles[i].v_3 = vertices.index(v_3)
+                skinpartblock.triangles[i].v_1 = vertex_index[v_1]
+                skinpartblock.triangles[i].v_2 = vertex_index[v_2]
+                skinpartblock.triangles[i].v_3 = vertex_index[v_3]
         skinpartblock.has_bone_indices = True
         skinpartblock.bone_indices.update_size()
         for i, v in enumerate(vertices):
@@ -572,3 +507,107 @@ def update_skin_partition(self,
                 skinpartblock.vertex_weights[i][j] = vweights[j][1]
 
     return lostweight
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+
+def _get_bones(mask):
+    """Return the set of bone numbers in a bone bitset."""
+    bones = set()
+    bonenum = 0
+    while mask:
+        if mask & 1:
+            bones.add(bonenum)
+        mask >>= 1
+        bonenum += 1
+    return bones
+
+
+def create_partitions(triangles, trianglepartmap, weights, maxbonesperpartition):
+    """Split triangles into partitions of at most maxbonesperpartition bones.
+
+    Every partition is seeded with the first remaining triangle. It then takes all triangles with the same partition
+    index whose bones are a subset of its bones, and grows through adjacent triangles that add the fewest new bones,
+    until no adjacent triangle fits anymore. Triangles with different partition indices never share a partition.
+
+    The bones of each triangle are stored as a bitset, triangles are indexed by partition index and bone set, and the
+    adjacent triangles are kept in a priority queue, so the remaining triangles are never rescanned.
+
+    :return: List of partitions [bones, triangles, partition index].
+    """
+    tris = []
+    partindices = []
+    masks = []
+    for tri, partindex in zip(triangles, trianglepartmap):
+        mask = 0
+        for t in tri:
+            for bonenum, boneweight in weights[t]:
+                mask |= 1 << bonenum
+        tris.append(tri)
+        partindices.append(partindex)
+        masks.append(mask)
+
+    # partition index -> bone set -> triangles
+    bonesets = {}
+    # vertex -> triangles
+    vert_tris = {}
+    for i, (tri, partindex, mask) in enumerate(zip(tris, partindices, masks)):
+        bonesets.setdefault(partindex, {}).setdefault(mask, []).append(i)
+        for t in tri:
+            vert_tris.setdefault(t, []).append(i)
+
+    remaining = [True] * len(tris)
+    parts = []
+    seed = 0
+    while True:
+        # seed the partition with the first triangle that is left
+        while seed < len(tris) and not remaining[seed]:
+            seed += 1
+        if seed == len(tris):
+            break
+        partindex = partindices[seed]
+        part_mask = masks[seed]
+        part_tris = []
+        part_bonesets = bonesets[partindex]
+        # adjacent triangles, by number of bones they would add to the partition
+        queue = []
+
+        def add_triangle(i):
+            remaining[i] = False
+            part_tris.append(i)
+            for t in tris[i]:
+                for j in vert_tris[t]:
+                    if remaining[j] and partindices[j] == partindex:
+                        heapq.heappush(queue, (_popcount(masks[j] & ~part_mask), j))
+
+        def add_subsets():
+            # all triangles whose bones are already in the partition can be added for free
+            for mask in [mask for mask in part_bonesets if not mask & ~part_mask]:
+                for i in part_bonesets.pop(mask):
+                    if remaining[i]:
+                        add_triangle(i)
+
+        add_triangle(seed)
+        add_subsets()
+        while queue:
+            cost, i = heapq.heappop(queue)
+            if not remaining[i]:
+                continue
+            new_bones = masks[i] & ~part_mask
+            # the partition grew since this entry was queued, so the triangle may be cheaper now
+            new_cost = _popcount(new_bones)
+            if new_cost < cost:
+                heapq.heappush(queue, (new_cost, i))
+                continue
+            # partitions only grow, so a triangle that does not fit now never will
+            if _popcount(part_mask) + new_cost > maxbonesperpartition:
+                continue
+            add_triangle(i)
+            if new_bones:
+                part_mask |= new_bones
+                add_subsets()
+
+        parts.append([_get_bones(part_mask), [tris[i] for i in part_tris], partindex])
+    return parts
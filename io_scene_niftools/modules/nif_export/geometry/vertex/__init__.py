@@ -36,3 +36,130 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 # ***** END LICENSE BLOCK *****
+
+import numpy as np
+
+from io_scene_niftools.utils.arrays import get_array
+
+
+def quantize(array, epsilon):
+    """Map floats to integers so that values closer than epsilon usually end up equal."""
+    if epsilon > 0:
+        return np.round(array / epsilon).astype(np.int64)
+    # no tolerance, compare the exact float values
+    return np.ascontiguousarray(array, dtype=np.float32).view(np.int32).astype(np.int64)
+
+
+def expand_to_corners(b_vertices, vertices):
+    """Map blender vertex indices to all nif vertices (unique corners) that were made from them.
+
+    :param b_vertices: For every nif vertex, the blender vertex it was made from.
+    :param vertices: Blender vertex indices, may contain duplicates.
+    :return: The nif vertices, grouped in the order of vertices, and for each of them its position in vertices.
+    """
+    num_b_vertices = max(b_vertices.max(initial=-1), vertices.max(initial=-1)) + 1
+    # nif vertices sorted by blender vertex, and where each blender vertex starts in that list
+    order = np.argsort(b_vertices, kind="stable")
+    counts = np.bincount(b_vertices, minlength=num_b_vertices)
+    starts = np.cumsum(counts) - counts
+    repeats = counts[vertices]
+    entries = np.repeat(np.arange(len(vertices)), repeats)
+    offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    return order[starts[vertices][entries] + offsets], entries
+
+
+class CornerData:
+    """Face corner data (vertex, uv, normal, vertex color, tangent) of a blender mesh, read in bulk into numpy arrays
+    that are indexed by loop."""
+
+    def __init__(self, b_mesh, use_normals=False, use_vertex_colors=False, use_tangents=False):
+        self.positions = get_array(b_mesh.vertices, "co", np.float32, 3)
+        self.loop_vertices = get_array(b_mesh.loops, "vertex_index", np.int32)
+        self.loop_starts = get_array(b_mesh.polygons, "loop_start", np.int32)
+        self.loop_totals = get_array(b_mesh.polygons, "loop_total", np.int32)
+        self.material_indices = get_array(b_mesh.polygons, "material_index", np.int32)
+
+        self.normals = None
+        if use_normals:
+            # smooth = loop normal, non-smooth = polygon normal
+            self.normals = get_array(b_mesh.loops, "normal", np.float32, 3)
+            poly_normals = get_array(b_mesh.polygons, "normal", np.float32, 3)
+            smooth = get_array(b_mesh.polygons, "use_smooth", bool)
+            loop_polygons = self.get_loop_polygons()
+            flat = ~smooth[loop_polygons]
+            self.normals[flat] = poly_normals[loop_polygons[flat]]
+
+        # uvs of all layers, shape (loops, layers, 2)
+        self.uvs = None
+        if b_mesh.uv_layers:
+            self.uvs = np.stack([get_array(uv_layer.data, "uv", np.float32, 2) for uv_layer in b_mesh.uv_layers], axis=1)
+
+        self.vertex_colors = None
+        if use_vertex_colors and b_mesh.vertex_colors:
+            self.vertex_colors = get_array(b_mesh.vertex_colors[0].data, "color", np.float32, 4)
+
+        self.tangents = None
+        self.bitangent_signs = None
+        if use_tangents:
+            self.tangents = get_array(b_mesh.loops, "tangent", np.float32, 3)
+            self.bitangent_signs = get_array(b_mesh.loops, "bitangent_sign", np.float32)
+
+    def get_polygon_loops(self, polygons):
+        """Return the loops of the given polygons, concatenated in polygon order, and the offset of the first loop of
+        each polygon in that array."""
+        totals = self.loop_totals[polygons]
+        offsets = np.cumsum(totals) - totals
+        loops = np.repeat(self.loop_starts[polygons], totals) + np.arange(totals.sum()) - np.repeat(offsets, totals)
+        return loops, offsets
+
+    def get_loop_polygons(self):
+        """Return the polygon index of every loop."""
+        polygons = np.arange(len(self.loop_starts))
+        loop_polygons = np.empty(len(self.loop_vertices), dtype=np.int64)
+        loops, _ = self.get_polygon_loops(polygons)
+        loop_polygons[loops] = np.repeat(polygons, self.loop_totals)
+        return loop_polygons
+
+    def get_material_polygons(self, num_materials):
+        """Bucket the non-degenerate polygons by material index, in a single pass over all polygons.
+
+        :return: For every material index below num_materials, the sorted array of its polygons.
+        """
+        polygons = np.flatnonzero(self.loop_totals >= 3)
+        material_indices = self.material_indices[polygons]
+        order = np.argsort(material_indices, kind="stable")
+        bounds = np.searchsorted(material_indices[order], np.arange(num_materials + 1))
+        return [polygons[order[start:end]] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def get_unique_corners(self, loops, epsilon, use_normals=True):
+        """Find the unique face corners among the given loops. Two corners are the same if they share the vertex and
+        their uvs, normals and vertex colors agree up to epsilon.
+
+        :return: The loop of the first occurrence of every unique corner, in order of first occurrence, and for each
+            of the given loops the index of its unique corner.
+        """
+        if not len(loops):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        columns = [self.loop_vertices[loops, None].astype(np.int64)]
+        for data in (self.uvs, self.normals if use_normals else None, self.vertex_colors):
+            if data is not None:
+                columns.append(quantize(data[loops].reshape(len(loops), -1), epsilon))
+        keys = np.concatenate(columns, axis=1)
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        # np.unique sorts the keys, renumber so that indices follow the order of first occurrence
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return loops[first[order]], rank[inverse.reshape(-1)]
+
+    def get_triangles(self, polygons, offsets):
+        """Fan triangulate the given polygons.
+
+        :return: For every triangle, the positions of its corners in the array of loops returned by get_polygon_loops,
+            and the index into polygons of the polygon that it came from.
+        """
+        num_tris = self.loop_totals[polygons] - 2
+        tri_polygons = np.repeat(np.arange(len(polygons)), num_tris)
+        fan = np.arange(num_tris.sum()) - np.repeat(np.cumsum(num_tris) - num_tris, num_tris)
+        first = offsets[tri_polygons]
+        return np.stack((first, first + 1 + fan, first + 2 + fan), axis=1), tri_polygons
@@ -52,6 +52,7 @@ from io_scene_niftools.modules.nif_export.property.object import ObjectDataPrope
 from io_scene_niftools.modules.nif_export.block_registry import block_store
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.logging import NifLog
+from io_scene_niftools.utils.profiling import NifProfiler
 
 # dictionary of names, to map NIF blocks to correct Blender names
 DICT_NAMES = {}
@@ -177,7 +178,8 @@ class Object:
 
                 # If this has children or animations or more than one material it gets wrapped in a purpose made NiNode.
                 if not (b_action or b_obj.children or is_multimaterial or has_track):
-                    mesh = self.mesh_helper.export_tri_shapes(b_obj, n_parent, self.n_root, b_obj.name)
+                    with NifProfiler.phase("mesh", b_obj.name):
+                        mesh = self.mesh_helper.export_tri_shapes(b_obj, n_parent, self.n_root, b_obj.name)
                     if not self.n_root:
                         self.n_root = mesh
                     return mesh
@@ -209,10 +211,12 @@ class Object:
         self.object_anim.export_visibility(node, b_action)
         # if it is a mesh, export the mesh as trishape children of this ninode
         if b_obj.type == 'MESH':
-            return self.mesh_helper.export_tri_shapes(b_obj, node, self.n_root)
+            with NifProfiler.phase("mesh", b_obj.name):
+                return self.mesh_helper.export_tri_shapes(b_obj, node, self.n_root)
         # if it is an armature, export the bones as ninode children of this ninode
         elif b_obj.type == 'ARMATURE':
-            self.armaturehelper.export_bones(b_obj, node)
+            with NifProfiler.phase("armature", b_obj.name):
+                self.armaturehelper.export_bones(b_obj, node)
 
         # export all children of this b_obj as children of this NiNode
         self.export_children(b_obj, node)
@@ -227,10 +231,7 @@ class Object:
             # special case: objects parented to armature bones - find the nif parent bone
             if b_parent.type == 'ARMATURE' and b_child.parent_bone != "":
                 parent_bone = b_parent.data.bones[b_child.parent_bone]
-                assert (parent_bone in block_store.block_to_obj.values())
-                for temp_parent, obj in block_store.block_to_obj.items():
-                    if obj == parent_bone:
-                        break
+                temp_parent = block_store.get_blocks_for_obj(parent_bone)[0]
             self.export_node(b_child, temp_parent)
 
     def export_collision(self, b_obj, n_parent):
@@ -107,25 +107,24 @@ class MaterialProp:
 
         # search for duplicate
         # (ignore the name string as sometimes import needs to create different materials even when NiMaterialProperty is the same)
-        for n_block in block_store.block_to_obj:
-            if not isinstance(n_block, NifFormat.NiMaterialProperty):
-                continue
-
-            # when optimization is enabled, ignore material name
-            if EXPORT_OPTIMIZE_MATERIALS:
-                ignore_strings = not(n_block.name in specialnames)
-            else:
-                ignore_strings = False
-
-            # check hash
-            first_index = 1 if ignore_strings else 0
-            if n_block.get_hash()[first_index:] == n_mat_prop.get_hash()[first_index:]:
-                NifLog.warn(f"Merging materials '{n_mat_prop.name}' and '{n_block.name}' (they are identical in nif)")
-                n_mat_prop = n_block
-                break
+        # when optimization is enabled, ignore material name, unless it is relevant for rendering
+        n_mat_hash = n_mat_prop.get_hash()
+        if EXPORT_OPTIMIZE_MATERIALS and name not in specialnames:
+            key = ("NiMaterialProperty", None, n_mat_hash[1:])
+        else:
+            key = ("NiMaterialProperty", n_mat_hash)
+        n_block = block_store.get_interned(key)
+        if n_block is not None:
+            NifLog.warn(f"Merging materials '{n_mat_prop.name}' and '{n_block.name}' (they are identical in nif)")
+            n_mat_prop = n_block
 
         block_store.register_block(n_mat_prop)
         # material animation
         self.material_anim.export_material(b_mat, n_mat_prop)
         # no material property with given settings found, so use and register the new one
+        if n_block is None and not n_mat_prop.controller:
+            # animated materials are not shared, the key does not cover their controllers
+            block_store.intern_block(n_mat_prop, key)
+            # also share exact copies of materials whose name is relevant
+            block_store.intern_block(n_mat_prop, ("NiMaterialProperty", n_mat_hash))
         return n_mat_prop
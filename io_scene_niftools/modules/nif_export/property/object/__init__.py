@@ -76,12 +76,12 @@ class ObjectProperty:
             # todo [property] refactor this
             # add textures
             if bpy.context.scene.niftools_scene.game == 'FALLOUT_3':
-                bsshader = self.bss_helper.export_bs_shader_property(b_mat)
+                bsshader = block_store.intern_block(self.bss_helper.export_bs_shader_property(b_mat))
 
                 block_store.register_block(bsshader)
                 n_block.add_property(bsshader)
             elif bpy.context.scene.niftools_scene.game == 'SKYRIM':
-                bsshader = self.bss_helper.export_bs_shader_property(b_mat)
+                bsshader = block_store.intern_block(self.bss_helper.export_bs_shader_property(b_mat))
 
                 block_store.register_block(bsshader)
                 # TODO [pyffi] Add helper function to allow adding bs_property / general list addition
@@ -104,31 +104,33 @@ class ObjectProperty:
 
     def get_matching_block(self, block_type, **kwargs):
         """Try to find a block matching block_type. Keyword arguments are a dict of parameters and required attributes of the block"""
-        # go over all blocks of block_type
-
         NifLog.debug(f"Looking for {block_type} block. Kwargs: {kwargs}")
-        for block in block_store.block_to_obj:
-            # if isinstance(block, block_type):
-            if block_type in str(type(block)):
-                # skip blocks that don't match additional conditions
-                for param, attribute in kwargs.items():
-                    # now skip this block if any of the conditions does not match
-                    if attribute is not None:
-                        ret_attr = getattr(block, param, None)
-                        if ret_attr != attribute:
-                            NifLog.debug(f"break, {param} != {attribute}, returns {ret_attr}")
-                            break
-                else:
-                    # we did not break out of the loop, so all checks went through, so we can use this block
-                    NifLog.debug(f"Found existing {block_type} block matching all criteria!")
-                    return block
+        attributes = tuple(sorted((param, attribute) for param, attribute in kwargs.items() if attribute is not None))
+        key = (block_type, attributes)
+        block = block_store.get_interned(key)
+        if block is not None:
+            NifLog.debug(f"Found existing {block_type} block matching all criteria!")
+            return block
+
+        # go over all blocks of block_type, which only happens once per combination of attributes
+        for block in block_store.get_blocks(getattr(NifFormat, block_type)):
+            # skip blocks that don't match additional conditions
+            for param, attribute in attributes:
+                # now skip this block if any of the conditions does not match
+                ret_attr = getattr(block, param, None)
+                if ret_attr != attribute:
+                    NifLog.debug(f"break, {param} != {attribute}, returns {ret_attr}")
+                    break
+            else:
+                # we did not break out of the loop, so all checks went through, so we can use this block
+                NifLog.debug(f"Found existing {block_type} block matching all criteria!")
+                return block_store.intern_block(block, key)
         # we are still here, so we must create a block of this type and set all attributes accordingly
         NifLog.debug(f"Created new {block_type} block because none matched the required criteria!")
         block = block_store.create_block(block_type)
-        for param, attribute in kwargs.items():
-            if attribute is not None:
-                setattr(block, param, attribute)
-        return block
+        for param, attribute in attributes:
+            setattr(block, param, attribute)
+        return block_store.intern_block(block, key)
 
     def export_root_node_properties(self, n_root):
         """Wrapper for exporting properties that are commonly attached to the nif root"""
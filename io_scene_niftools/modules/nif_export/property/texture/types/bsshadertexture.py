@@ -38,6 +38,7 @@
 # ***** END LICENSE BLOCK *****
 from pyffi.formats.nif import NifFormat
 
+from io_scene_niftools.modules.nif_export.block_registry import block_store
 from io_scene_niftools.modules.nif_export.property.texture import TextureWriter, TextureSlotManager
 from io_scene_niftools.utils.consts import TEX_SLOTS
 
@@ -71,6 +72,7 @@ class BSShaderTexture(TextureSlotManager):
 
         # get the offset, scale and UV wrapping mode and set them
         self.export_uv_transform(bsshader)
+        self._share_textureset(bsshader)
 
     def export_bs_lighting_shader_prop_textures(self, bsshader):
         texset = self._create_textureset()
@@ -88,9 +90,16 @@ class BSShaderTexture(TextureSlotManager):
 
         # get the offset, scale and UV wrapping mode and set them
         self.export_uv_transform(bsshader)
+        self._share_textureset(bsshader)
 
     def export_bs_shader_pp_lighting_prop_textures(self, bsshader):
         bsshader.texture_set = self._create_textureset()
+        self._share_textureset(bsshader)
+
+    @staticmethod
+    def _share_textureset(bsshader):
+        # materials with the same textures use the same texture set
+        bsshader.texture_set = block_store.intern_block(bsshader.texture_set)
 
     def _create_textureset(self):
         texset = NifFormat.BSShaderTextureSet()
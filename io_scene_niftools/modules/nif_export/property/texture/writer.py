@@ -84,10 +84,10 @@ class TextureWriter:
         srctex.alpha_format = 3
         srctex.unknown_byte = 1
 
-        # search for duplicate
-        for block in block_store.block_to_obj:
-            if isinstance(block, NifFormat.NiSourceTexture) and block.get_hash() == srctex.get_hash():
-                return block
+        # share identical source textures
+        block = block_store.intern_block(srctex)
+        if block is not srctex:
+            return block
 
         # no identical source texture found, so use and register the new one
         return block_store.register_block(srctex, n_texture)
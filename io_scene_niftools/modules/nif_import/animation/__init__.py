@@ -37,14 +37,19 @@
 #
 # ***** END LICENSE BLOCK *****
 import bpy
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
+from io_scene_niftools.utils.keys import estimate_fps, get_interpolation, get_key_times, get_text_keys
 from io_scene_niftools.utils.logging import NifLog
 
 
 class Animation:
 
+    # values of the Keyframe.interpolation enum, for use with foreach_set
+    interpolation_ids = {"CONSTANT": 0, "LINEAR": 1, "BEZIER": 2}
+
     def __init__(self):
         self.show_pose_markers()
         self.fps = 30
@@ -63,17 +68,7 @@ class Animation:
                     if space.type == 'DOPESHEET_EDITOR':
                         space.show_pose_markers = True
 
-    @staticmethod
-    def get_b_interp_from_n_interp(n_ipol):
-        if n_ipol in (NifFormat.KeyType.LINEAR_KEY, NifFormat.KeyType.XYZ_ROTATION_KEY):
-            return "LINEAR"
-        elif n_ipol == NifFormat.KeyType.QUADRATIC_KEY:
-            return "BEZIER"
-        elif n_ipol == 0:
-            # guessing, not documented in nif.xml
-            return "CONSTANT"
-        # NifLog.warn(f"Unsupported interpolation mode ({n_ipol}) in nif, using quadratic/bezier.")
-        return "BEZIER"
+    get_b_interp_from_n_interp = staticmethod(get_interpolation)
 
     def create_action(self, b_obj, action_name):
         """ Create or retrieve action and set it as active on the object. """
@@ -141,13 +136,35 @@ class Animation:
             for fcurve in fcurves:
                 fcurve.extrapolation = 'CONSTANT'
 
-    def add_key(self, fcurves, t, key, interp):
+    def add_keys(self, fcurves, times, keys, interp):
         """
-        Add a key (len=n) to a set of fcurves (len=n) at the given frame. Set the key's interpolation to interp.
+        Add keys (shape m x n) at times (len=m) to a set of fcurves (len=n) in bulk. Set the keys' interpolation to interp.
+        Like keyframe_points.insert, a later key replaces an earlier key on the same frame.
         """
-        frame = round(t * self.fps)
-        for fcurve, k in zip(fcurves, key):
-            fcurve.keyframe_points.insert(frame, k).interpolation = interp
+        frames = np.round(np.asarray(times, dtype=np.float64) * self.fps)
+        if not len(frames):
+            return
+        keys = np.asarray(keys, dtype=np.float32).reshape(len(frames), len(fcurves))
+        # keep the last key on each frame, sorted by frame
+        _, last = np.unique(frames[::-1], return_index=True)
+        keep = len(frames) - 1 - last
+        frames = frames[keep]
+        keys = keys[keep]
+
+        co = np.empty((len(frames), 2), dtype=np.float32)
+        co[:, 0] = frames
+        interpolation = np.full(len(frames), self.interpolation_ids[interp], dtype=np.int32)
+        for fcurve, values in zip(fcurves, keys.T):
+            # merge with keys that are already there the slow way
+            if len(fcurve.keyframe_points):
+                for frame, value in zip(frames, values):
+                    fcurve.keyframe_points.insert(frame, value).interpolation = interp
+                continue
+            co[:, 1] = values
+            fcurve.keyframe_points.add(len(frames))
+            fcurve.keyframe_points.foreach_set("co", co.ravel())
+            fcurve.keyframe_points.foreach_set("interpolation", interpolation)
+            fcurve.update()
 
     # import animation groups
     def import_text_keys(self, n_block, b_action):
@@ -160,54 +177,25 @@ class Animation:
 
     def import_text_key_extra_data(self, txk, b_action):
         """Stores the text keys as pose markers in a blender action."""
-        if txk and b_action:
-            for key in txk.text_keys:
-                newkey = key.value.decode().replace('\r\n', '/').rstrip('/')
-                frame = round(key.time * self.fps)
-                marker = b_action.pose_markers.new(newkey)
-                marker.frame = frame
-
-    def set_frames_per_second(self, roots):
-        """Scan all blocks and set a reasonable number for fps to this class and the scene."""
-        # find all key times
-        key_times = []
-        for root in roots:
-            for kfd in root.tree(block_type=NifFormat.NiKeyframeData):
-                key_times.extend(key.time for key in kfd.translations.keys)
-                key_times.extend(key.time for key in kfd.scales.keys)
-                key_times.extend(key.time for key in kfd.quaternion_keys)
-                key_times.extend(key.time for key in kfd.xyz_rotations[0].keys)
-                key_times.extend(key.time for key in kfd.xyz_rotations[1].keys)
-                key_times.extend(key.time for key in kfd.xyz_rotations[2].keys)
-
-            for kfi in root.tree(block_type=NifFormat.NiBSplineInterpolator):
-                if not kfi.basis_data:
-                    # skip bsplines without basis data (eg bowidle.kf in Oblivion)
-                    continue
-                key_times.extend(
-                    point * (kfi.stop_time - kfi.start_time)
-                    / (kfi.basis_data.num_control_points - 2)
-                    for point in range(kfi.basis_data.num_control_points - 2))
-
-            for uv_data in root.tree(block_type=NifFormat.NiUVData):
-                for uv_group in uv_data.uv_groups:
-                    key_times.extend(key.time for key in uv_group.keys)
+        if b_action:
+            self.add_text_keys(get_text_keys(txk), b_action)
 
+    def add_text_keys(self, text_keys, b_action):
+        """Stores (time, name) pairs as pose markers in a blender action."""
+        for time, name in text_keys:
+            marker = b_action.pose_markers.new(name)
+            marker.frame = round(time * self.fps)
+
+    def set_frames_per_second(self, index):
+        """Scan all blocks of a BlockIndex and set a reasonable number for fps to this class and the scene."""
+        self.set_frames_per_second_from_times(get_key_times(index))
+
+    def set_frames_per_second_from_times(self, key_times):
+        """Set a reasonable number for fps to this class and the scene from the sorted, unique key times of a file."""
         # not animated, return a reasonable default
-        if not key_times:
+        if not len(key_times):
             return
-
-        # calculate fps
-        key_times = sorted(set(key_times))
-        fps = self.fps
-        lowest_diff = sum(abs(int(time * fps + 0.5) - (time * fps)) for time in key_times)
-
-        # for test_fps in range(1,120): #disabled, used for testing
-        for test_fps in [20, 24, 25, 30, 35]:
-            diff = sum(abs(int(time * test_fps + 0.5) - (time * test_fps)) for time in key_times)
-            if diff < lowest_diff:
-                lowest_diff = diff
-                fps = test_fps
+        fps = estimate_fps(key_times, self.fps)
         NifLog.info(f"Animation estimated at {fps} frames per second.")
         self.fps = fps
         bpy.context.scene.render.fps = fps
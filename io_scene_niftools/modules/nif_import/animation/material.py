@@ -71,8 +71,8 @@ class MaterialAnimation(Animation):
         b_mat_action = self.create_action(b_material, "MaterialAction")
         fcurves = self.create_fcurves(b_mat_action, "niftools.emissive_alpha", range(3), n_alphactrl.flags)
         interp = self.get_b_interp_from_n_interp(n_alphactrl.data.data.interpolation)
-        for key in n_alphactrl.data.data.keys:
-            self.add_key(fcurves, key.time, (key.value, key.value, key.value), interp)
+        n_keys = n_alphactrl.data.data.keys
+        self.add_keys(fcurves, [key.time for key in n_keys], [(key.value,) * 3 for key in n_keys], interp)
 
     def import_material_color_controller(self, b_material, n_material, b_channel, n_target_color):
         # find material color controller with matching target color
@@ -90,8 +90,8 @@ class MaterialAnimation(Animation):
 
         fcurves = self.create_fcurves(b_mat_action, b_channel, range(3), n_matcolor_ctrl.flags)
         interp = self.get_b_interp_from_n_interp(n_matcolor_ctrl.data.data.interpolation)
-        for key in n_matcolor_ctrl.data.data.keys:
-            self.add_key(fcurves, key.time, key.value.as_list(), interp)
+        n_keys = n_matcolor_ctrl.data.data.keys
+        self.add_keys(fcurves, [key.time for key in n_keys], [key.value.as_list() for key in n_keys], interp)
 
     def import_material_uv_controller(self, b_material, n_geom):
         """Import UV controller data."""
@@ -107,14 +107,14 @@ class MaterialAnimation(Animation):
         for n_uvgroup, (data_path, array_ind) in zip(n_ctrl.data.uv_groups, dtypes):
             if n_uvgroup.keys:
                 interp = self.get_b_interp_from_n_interp(n_uvgroup.interpolation)
+                times = [key.time for key in n_uvgroup.keys]
+                values = [key.value for key in n_uvgroup.keys]
+                if "offset" in data_path:
+                    values = [-value for value in values]
                 # in blender, UV offset is stored per n_texture slot
                 # so we have to repeat the import for each used tex slot
                 for i, texture_slot in enumerate(b_material.texture_slots):
                     if texture_slot:
                         fcurves = self.create_fcurves(b_mat_action, f"texture_slots[{i}]." + data_path, (array_ind,), n_ctrl.flags)
-                        for key in n_uvgroup.keys:
-                            if "offset" in data_path:
-                                self.add_key(fcurves, key.time, (-key.value,), interp)
-                            else:
-                                self.add_key(fcurves, key.time, (key.value,), interp)
+                        self.add_keys(fcurves, times, values, interp)
 
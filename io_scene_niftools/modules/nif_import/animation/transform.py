@@ -38,46 +38,20 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
-import mathutils
+import numpy as np
 
-from functools import singledispatch
-from bisect import bisect_left
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.modules.nif_import.animation import Animation
 from io_scene_niftools.modules.nif_import.object import block_registry
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.blocks import safe_decode
+from io_scene_niftools.utils.keys import get_sequence_keys, get_transform_keys
 from io_scene_niftools.utils.logging import NifLog
 
 
-def interpolate(x_out, x_in, y_in):
-    """
-    sample (x_in I y_in) at x coordinates x_out
-    """
-    y_out = []
-    intervals = zip(x_in, x_in[1:], y_in, y_in[1:])
-    slopes = [(y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervals]
-    # if we had just one input, slope will be 0 for constant extrapolation
-    if not slopes:
-        slopes = [0, ]
-    for x in x_out:
-        i = bisect_left(x_in, x) - 1
-        # clamp to valid range
-        i = max(min(i, len(slopes) - 1), 0)
-        y_out.append(y_in[i] + slopes[i] * (x - x_in[i]))
-    return y_out
-
-
 class TransformAnimation(Animation):
 
-    def __init__(self):
-        super().__init__()
-        self.import_kf_root = singledispatch(self.import_kf_root)
-        self.import_kf_root.register(NifFormat.NiControllerSequence, self.import_controller_sequence)
-        self.import_kf_root.register(NifFormat.NiSequenceStreamHelper, self.import_sequence_stream_helper)
-        self.import_kf_root.register(NifFormat.NiSequenceData, self.import_sequence_data)
-
     def get_bind_data(self, b_armature):
         """Get the required bind data of an armature. Used by standalone KF import and export. """
         self.bind_data = {}
@@ -99,79 +73,26 @@ class TransformAnimation(Animation):
                 return bpy.data.objects[b_name]
 
     def import_kf_root(self, kf_root, b_armature_obj):
-        """Base method to warn user that this root type is not supported"""
-        NifLog.warn(f"Unknown KF root block found : {safe_decode(kf_root.name)}")
-        NifLog.warn(f"This type isn't currently supported: {type(kf_root)}")
-
-    def import_generic_kf_root(self, kf_root):
-        NifLog.debug(f'Importing {type(kf_root)}...')
-        return safe_decode(kf_root.name)
-
-    def import_sequence_data(self, kf_root, b_armature_obj):
-        b_action_name = self.import_generic_kf_root(kf_root)
-        actions = set()
-        for evaluator in kf_root.evaluators:
-            b_target = self.get_target(b_armature_obj, evaluator.node_name)
-            actions.add(self.import_keyframe_controller(evaluator, b_armature_obj, b_target, b_action_name))
-        for b_action in actions:
-            if b_action:
-                self.import_text_keys(kf_root, b_action)
-                if kf_root.cycle_type:
-                    extend = self.get_extend_from_cycle_type(kf_root.cycle_type)
-                    self.set_extrapolation(extend, b_action.fcurves)
-
-    def import_sequence_stream_helper(self, kf_root, b_armature_obj):
-        b_action_name = self.import_generic_kf_root(kf_root)
-        actions = set()
-        # import parallel trees of extra datas and keyframe controllers
-        extra = kf_root.extra_data
-        controller = kf_root.controller
-        textkeys = None
-        while extra and controller:
-            # textkeys in the stack do not specify node names, import as markers
-            while isinstance(extra, NifFormat.NiTextKeyExtraData):
-                textkeys = extra
-                extra = extra.next_extra_data
-
-            # grabe the node name from string data
-            if isinstance(extra, NifFormat.NiStringExtraData):
-                b_target = self.get_target(b_armature_obj, extra.string_data)
-                actions.add(self.import_keyframe_controller(controller, b_armature_obj, b_target, b_action_name))
-            # grab next pair of extra and controller
-            extra = extra.next_extra_data
-            controller = controller.next_controller
-        for b_action in actions:
-            if b_action:
-                self.import_text_key_extra_data(textkeys, b_action)
-
-    def import_controller_sequence(self, kf_root, b_armature_obj):
-        b_action_name = self.import_generic_kf_root(kf_root)
+        """Imports the animation of a kf root block as actions."""
+        self.import_sequence_keys(get_sequence_keys(kf_root), b_armature_obj)
+
+    def import_sequence_keys(self, sequence_keys, b_armature_obj):
+        """Imports the decoded keys of a kf root block as actions."""
+        b_action_name = safe_decode(sequence_keys.name)
+        if sequence_keys.channels is None:
+            NifLog.warn(f"Unknown KF root block found : {b_action_name}")
+            NifLog.warn(f"This type isn't currently supported: {sequence_keys.root_type}")
+            return
+        NifLog.debug(f'Importing {sequence_keys.root_type}...')
         actions = set()
-        for controlledblock in kf_root.controlled_blocks:
-            # get bone name
-            # todo [pyffi] fixed get_node_name() is up, make release and clean up here
-            # ZT2 - old way is not supported by pyffi's get_node_name()
-            n_name = controlledblock.target_name
-            # fallout (node_name) & Loki (StringPalette)
-            if not n_name:
-                n_name = controlledblock.get_node_name()
+        for n_name, transform_keys in sequence_keys.channels:
             b_target = self.get_target(b_armature_obj, n_name)
-            # todo - temporarily disabled! should become a custom property on both object and pose bone, ideally
-            # import bone priority
-            # b_target.niftools.priority = controlledblock.priority
-            # fallout, Loki
-            kfc = controlledblock.interpolator
-            if not kfc:
-                # ZT2
-                kfc = controlledblock.controller
-            if kfc:
-                actions.add(self.import_keyframe_controller(kfc, b_armature_obj, b_target, b_action_name))
+            actions.add(self.import_transform_keys(transform_keys, b_armature_obj, b_target, b_action_name))
         for b_action in actions:
             if b_action:
-                self.import_text_keys(kf_root, b_action)
-                # fallout: set global extrapolation mode here (older versions have extrapolation per controller)
-                if kf_root.cycle_type:
-                    extend = self.get_extend_from_cycle_type(kf_root.cycle_type)
+                self.add_text_keys(sequence_keys.text_keys, b_action)
+                if sequence_keys.cycle_type:
+                    extend = self.get_extend_from_cycle_type(sequence_keys.cycle_type)
                     self.set_extrapolation(extend, b_action.fcurves)
 
     def import_keyframe_controller(self, n_kfc, b_armature, b_target, b_action_name):
@@ -185,85 +106,24 @@ class TransformAnimation(Animation):
         # the target may not exist in the scene, in which case it is None here
         if not b_target:
             return
-        NifLog.debug(f'Importing keyframe controller for {b_target.name}')
-
-        translations = []
-        scales = []
-        rotations = []
-        eulers = []
-        n_kfd = None
+        return self.import_transform_keys(get_transform_keys(n_kfc), b_armature, b_target, b_action_name)
 
-        # transform controllers (dartgun.nif)
-        if isinstance(n_kfc, NifFormat.NiTransformController):
-            if n_kfc.interpolator:
-                n_kfd = n_kfc.interpolator.data
-        # B-spline curve import
-        elif isinstance(n_kfc, NifFormat.NiBSplineInterpolator):
-            # used by WLP2 (tiger.kf), but only for non-LocRotScale data
-            # eg. bone stretching - see controlledblock.get_variable_1()
-            # do not support this for now, no good representation in Blender
-            if isinstance(n_kfc, NifFormat.NiBSplineCompFloatInterpolator):
-                # pyffi lacks support for this, but the following gets float keys
-                # keys = list(kfc._getCompKeys(kfc.offset, 1, kfc.bias, kfc.multiplier))
-                return
-            times = list(n_kfc.get_times())
-            # just do these temp steps to avoid generating empty fcurves down the line
-            trans_temp = [mathutils.Vector(tup) for tup in n_kfc.get_translations()]
-            if trans_temp:
-                translations = zip(times, trans_temp)
-            rot_temp = [mathutils.Quaternion(tup) for tup in n_kfc.get_rotations()]
-            if rot_temp:
-                rotations = zip(times, rot_temp)
-            scale_temp = list(n_kfc.get_scales())
-            if scale_temp:
-                scales = zip(times, scale_temp)
-            # Bsplines are Bezier curves
-            interp_rot = interp_loc = interp_scale = "BEZIER"
-        elif isinstance(n_kfc, NifFormat.NiMultiTargetTransformController):
-            # not sure what this is used for
+    def import_transform_keys(self, transform_keys, b_armature, b_target, b_action_name):
+        """
+        Imports decoded keys as fcurves in an action, which is created if necessary.
+        transform_keys: TransformKeys, or None if the controller is not supported
+        """
+        # the target may not exist in the scene, in which case it is None here
+        if not b_target or not transform_keys:
             return
-        else:
-            # ZT2 & Fallout
-            n_kfd = n_kfc.data
-        if isinstance(n_kfd, NifFormat.NiKeyframeData):
-            interp_rot = self.get_b_interp_from_n_interp(n_kfd.rotation_type)
-            interp_loc = self.get_b_interp_from_n_interp(n_kfd.translations.interpolation)
-            interp_scale = self.get_b_interp_from_n_interp(n_kfd.scales.interpolation)
-            if n_kfd.rotation_type == 4:
-                b_target.rotation_mode = "XYZ"
-                # uses xyz rotation
-                if n_kfd.xyz_rotations[0].keys:
-                    # euler keys need not be sampled at the same time in KFs
-                    # but we need complete key sets to do the space conversion
-                    # so perform linear interpolation to import all keys properly
-
-                    # get all the keys' times
-                    times_x = [key.time for key in n_kfd.xyz_rotations[0].keys]
-                    times_y = [key.time for key in n_kfd.xyz_rotations[1].keys]
-                    times_z = [key.time for key in n_kfd.xyz_rotations[2].keys]
-                    # the unique time stamps we have to sample all curves at
-                    times_all = sorted(set(times_x + times_y + times_z))
-                    # the actual resampling
-                    x_r = interpolate(times_all, times_x, [key.value for key in n_kfd.xyz_rotations[0].keys])
-                    y_r = interpolate(times_all, times_y, [key.value for key in n_kfd.xyz_rotations[1].keys])
-                    z_r = interpolate(times_all, times_z, [key.value for key in n_kfd.xyz_rotations[2].keys])
-                eulers = zip(times_all, zip(x_r, y_r, z_r))
-            else:
-                b_target.rotation_mode = "QUATERNION"
-                rotations = [(key.time, key.value) for key in n_kfd.quaternion_keys]
-
-            if n_kfd.scales.keys:
-                scales = [(key.time, key.value) for key in n_kfd.scales.keys]
-
-            if n_kfd.translations.keys:
-                translations = [(key.time, key.value) for key in n_kfd.translations.keys]
-
-        # ZT2 - get extrapolation for every kfc
-        if isinstance(n_kfc, NifFormat.NiKeyframeController):
-            flags = n_kfc.flags
-        # fallout, Loki - we set extrapolation according to the root NiControllerSequence.cycle_type
-        else:
-            flags = None
+        NifLog.debug(f'Importing keyframe controller for {b_target.name}')
+        eulers = transform_keys.eulers
+        rotations = transform_keys.rotations
+        translations = transform_keys.translations
+        scales = transform_keys.scales
+        if transform_keys.rotation_mode:
+            b_target.rotation_mode = transform_keys.rotation_mode
+        flags = transform_keys.flags
 
         # create or get the action
         if b_armature and isinstance(b_target, bpy.types.PoseBone):
@@ -280,33 +140,31 @@ class TransformAnimation(Animation):
         if eulers:
             NifLog.debug('Rotation keys..(euler)')
             fcurves = self.create_fcurves(b_action, "rotation_euler", range(3), flags, bone_name)
-            for t, val in eulers:
-                key = mathutils.Euler(val)
-                if bone_name:
-                    key = math.import_keymat(n_bind_rot_inv, key.to_matrix().to_4x4()).to_euler()
-                self.add_key(fcurves, t, key, interp_rot)
+            times, keys = eulers
+            if bone_name:
+                key_matrices = math.import_keymats(n_bind_rot_inv, math.eulers_to_matrices(keys))
+                keys = math.matrices_to_eulers(key_matrices)
+            self.add_keys(fcurves, times, keys, transform_keys.interp_rot)
         elif rotations:
             NifLog.debug('Rotation keys...(quaternions)')
             fcurves = self.create_fcurves(b_action, "rotation_quaternion", range(4), flags, bone_name)
-            for t, val in rotations:
-                key = mathutils.Quaternion([val.w, val.x, val.y, val.z])
-                if bone_name:
-                    key = math.import_keymat(n_bind_rot_inv, key.to_matrix().to_4x4()).to_quaternion()
-                self.add_key(fcurves, t, key, interp_rot)
+            times, keys = rotations
+            if bone_name:
+                key_matrices = math.import_keymats(n_bind_rot_inv, math.quaternions_to_matrices(keys))
+                keys = math.matrices_to_quaternions(key_matrices)
+            self.add_keys(fcurves, times, keys, transform_keys.interp_rot)
         if translations:
             NifLog.debug('Translation keys...')
             fcurves = self.create_fcurves(b_action, "location", range(3), flags, bone_name)
-            for t, val in translations:
-                key = mathutils.Vector([val.x, val.y, val.z])
-                if bone_name:
-                    key = math.import_keymat(n_bind_rot_inv, mathutils.Matrix.Translation(key - n_bind_trans)).to_translation()
-                self.add_key(fcurves, t, key, interp_loc)
+            times, keys = translations
+            if bone_name:
+                keys = math.import_key_translations(n_bind_rot_inv, n_bind_trans, keys)
+            self.add_keys(fcurves, times, keys, transform_keys.interp_loc)
         if scales:
             NifLog.debug('Scale keys...')
             fcurves = self.create_fcurves(b_action, "scale", range(3), flags, bone_name)
-            for t, val in scales:
-                key = (val, val, val)
-                self.add_key(fcurves, t, key, interp_scale)
+            times, keys = scales
+            self.add_keys(fcurves, times, np.repeat(keys[:, None], 3, axis=1), transform_keys.interp_scale)
         return b_action
 
     def import_transforms(self, n_block, b_obj, bone_name=None):
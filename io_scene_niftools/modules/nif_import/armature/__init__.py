@@ -81,7 +81,7 @@ class Armature:
     def get_skinned_geometries(self, n_root):
         """Yield all children in n_root's tree that have skinning"""
         # search for all NiTriShape or NiTriStrips blocks...
-        for n_block in n_root.tree(block_type=NifFormat.NiTriBasedGeom):
+        for n_block in NifData.index.get_blocks(NifFormat.NiTriBasedGeom, n_root):
             # yes, we found one, does it have skinning?
             if n_block.is_skin():
                 yield n_block
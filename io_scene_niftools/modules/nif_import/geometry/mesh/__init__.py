@@ -36,7 +36,10 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import bpy
+import hashlib
 import mathutils
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
@@ -47,13 +50,18 @@ from io_scene_niftools.modules.nif_import.geometry import mesh
 from io_scene_niftools.modules.nif_import.geometry.vertex import Vertex
 from io_scene_niftools.modules.nif_import.property.material import Material
 from io_scene_niftools.modules.nif_import.property.geometry.mesh import MeshPropertyProcessor
-from io_scene_niftools.utils import math
+from io_scene_niftools.utils import arrays, math
+from io_scene_niftools.utils.shared import SharedData, get_folder_key
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
 
 
 class Mesh:
 
+    # imported meshes by content key, so identical geometry is linked instead of built again, also across imports of
+    # the same folder, unless the vertices were edited since
+    shared_meshes = SharedData("meshes", lambda b_mesh: Mesh.get_co_digest(b_mesh))
+
     def __init__(self):
         self.materialhelper = Material()
         self.morph_anim = MorphAnimation()
@@ -78,20 +86,35 @@ class Mesh:
         if not n_tri_data:
             raise io_scene_niftools.utils.logging.NifError(f"No shape data in {node_name}")
 
-        # create raw mesh from vertices and triangles
-        b_mesh.from_pydata(n_tri_data.vertices, [], n_tri_data.get_triangles())
-        b_mesh.update()
+        vertices = arrays.read_array(n_tri_data.vertices)
+        triangles = self.get_triangles(n_tri_data)
+        uv_sets = [arrays.read_array(uv_set, arrays.TEXCOORD) for uv_set in n_tri_data.uv_sets]
+        colors = arrays.read_array(n_tri_data.vertex_colors, arrays.COLOR4) if n_tri_data.has_vertex_colors else None
+        normals = arrays.read_array(n_tri_data.normals) if n_tri_data.has_normals else None
+
+        # link the mesh of identical geometry with identical properties
+        mesh_key = self.get_mesh_key(n_block, vertices, triangles, normals, colors, *uv_sets)
+        b_shared_mesh = self.shared_meshes.get(mesh_key)
+        if b_shared_mesh:
+            NifLog.info(f"Linking mesh '{b_shared_mesh.name}' for geometry '{node_name}'")
+            b_obj.data = b_shared_mesh
+            bpy.data.meshes.remove(b_mesh)
+            return
 
+        # create raw mesh from vertices and triangles
         # must set faces to smooth before setting custom normals, or the normals bug out!
         is_smooth = True if (n_tri_data.has_normals or n_block.skin_instance) else False
-        self.set_face_smooth(b_mesh, is_smooth)
+        self.build_mesh(b_mesh, vertices, triangles, is_smooth)
 
         # store additional data layers
-        Vertex.map_uv_layer(b_mesh, n_tri_data)
-        Vertex.map_vertex_colors(b_mesh, n_tri_data)
-        Vertex.map_normals(b_mesh, n_tri_data)
+        loop_vertices = Vertex.get_loop_vertices(b_mesh)
+        Vertex.map_uv_layer(b_mesh, n_tri_data, loop_vertices, uv_sets)
+        Vertex.map_vertex_colors(b_mesh, n_tri_data, loop_vertices, colors)
+        Vertex.map_normals(b_mesh, n_tri_data, normals)
 
         self.mesh_prop_processor.process_property_list(n_block, b_obj)
+        if mesh_key is not None:
+            self.shared_meshes.add(mesh_key, b_mesh)
 
         # import skinning info, for meshes affected by bones
         VertexGroup.import_skin(n_block, b_obj)
@@ -102,10 +125,60 @@ class Mesh:
 
         # todo [mesh] remove doubles here using blender operator
 
+    def get_mesh_key(self, n_block, *data_arrays):
+        """Return a key that identifies the mesh of n_block by the content of its geometry and properties, from the
+        arrays that are imported (None for missing arrays). Return None if the mesh can not be shared, because the
+        geometry is skinned or morphed, or a property also changes the object."""
+        if n_block.skin_instance or math.find_controller(n_block, NifFormat.NiGeomMorpherController):
+            return None
+        property_key = self.mesh_prop_processor.get_property_key(n_block)
+        if property_key is None:
+            return None
+        key = (arrays.hash_arrays(*data_arrays), property_key, NifOp.props.use_custom_normals,
+               get_folder_key(NifOp.props.filepath))
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def get_co_digest(b_mesh):
+        return arrays.hash_arrays(arrays.get_array(b_mesh.vertices, "co", np.float32, 3)).hex()
+
+    @staticmethod
+    def get_triangles(n_tri_data):
+        """Return the triangles of a NiTriShapeData or NiTriStripsData block as an (N, 3) array."""
+        if isinstance(n_tri_data, NifFormat.NiTriShapeData):
+            return arrays.read_array(n_tri_data.triangles, arrays.TRIANGLE, np.int32)
+        return np.array(list(n_tri_data.get_triangles()), dtype=np.int32).reshape(-1, 3)
+
+    @staticmethod
+    def build_mesh(b_mesh, verts, faces, smooth=False):
+        """Fill an empty blender mesh in bulk, like from_pydata but without per polygon python loops.
+
+        :param verts: Vertex coordinates, an (N, 3) array or a list of 3-tuples.
+        :param faces: Polygons as vertex indices, an (M, k) array or a list of sequences of varying length.
+        :param smooth: Whether the polygons are smooth shaded.
+        """
+        verts = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+        if isinstance(faces, np.ndarray):
+            loop_totals = np.full(len(faces), faces.shape[1] if faces.ndim == 2 else 0, dtype=np.int32)
+            loop_vertices = faces.astype(np.int32).ravel()
+        else:
+            loop_totals = np.array([len(face) for face in faces], dtype=np.int32)
+            loop_vertices = np.array([v_index for face in faces for v_index in face], dtype=np.int32)
+        loop_starts = np.cumsum(loop_totals, dtype=np.int32) - loop_totals
+
+        b_mesh.vertices.add(len(verts))
+        b_mesh.loops.add(len(loop_vertices))
+        b_mesh.polygons.add(len(loop_totals))
+        b_mesh.vertices.foreach_set("co", verts.ravel())
+        b_mesh.loops.foreach_set("vertex_index", loop_vertices)
+        b_mesh.polygons.foreach_set("loop_start", loop_starts)
+        b_mesh.polygons.foreach_set("loop_total", loop_totals)
+        Mesh.set_face_smooth(b_mesh, smooth)
+        b_mesh.update(calc_edges=True)
+
     @staticmethod
     def set_face_smooth(b_mesh, smooth):
         """set face smoothing and material"""
-
-        for poly in b_mesh.polygons:
-            poly.use_smooth = smooth
-            poly.material_index = 0  # only one material
+        num_polys = len(b_mesh.polygons)
+        b_mesh.polygons.foreach_set("use_smooth", np.full(num_polys, smooth, dtype=bool))
+        b_mesh.polygons.foreach_set("material_index", np.zeros(num_polys, dtype=np.int32))  # only one material
@@ -37,38 +37,55 @@
 #
 # ***** END LICENSE BLOCK *****
 
-from io_scene_niftools.utils.singleton import NifOp
 import numpy as np
 
+from io_scene_niftools.utils import arrays
+from io_scene_niftools.utils.singleton import NifOp
+
 
 class Vertex:
 
     @staticmethod
-    def map_vertex_colors(b_mesh, n_tri_data):
+    def get_loop_vertices(b_mesh):
+        """Return the vertex index of every loop, to gather per vertex nif data into per loop blender data."""
+        return arrays.get_array(b_mesh.loops, "vertex_index", np.int32)
+
+    @staticmethod
+    def map_vertex_colors(b_mesh, n_tri_data, loop_vertices=None, colors=None):
         if n_tri_data.has_vertex_colors:
+            if loop_vertices is None:
+                loop_vertices = Vertex.get_loop_vertices(b_mesh)
             b_mesh.vertex_colors.new(name=f"RGBA")
-            b_mesh.vertex_colors[-1].data.foreach_set("color", [channel for col in [n_tri_data.vertex_colors[loop.vertex_index] for loop in b_mesh.loops] for channel in (col.r, col.g, col.b, col.a)])
+            if colors is None:
+                colors = arrays.read_array(n_tri_data.vertex_colors, arrays.COLOR4)
+            b_mesh.vertex_colors[-1].data.foreach_set("color", colors[loop_vertices].ravel())
 
     @staticmethod
-    def map_uv_layer(b_mesh, n_tri_data):
+    def map_uv_layer(b_mesh, n_tri_data, loop_vertices=None, uv_sets=None):
         """ UV coordinates, NIF files only support 'sticky' UV coordinates, and duplicates vertices to emulate hard edges and UV seam.
             So whenever a hard edge or a UV seam is present the mesh, vertices are duplicated.
             Blender only must duplicate vertices for hard edges; duplicating for UV seams would introduce unnecessary hard edges."""
-
+        if loop_vertices is None:
+            loop_vertices = Vertex.get_loop_vertices(b_mesh)
         # "sticky" UV coordinates: these are transformed in Blender UV's
-        for uv_i, uv_set in enumerate(n_tri_data.uv_sets):
+        if uv_sets is None:
+            uv_sets = [arrays.read_array(uv_set, arrays.TEXCOORD) for uv_set in n_tri_data.uv_sets]
+        for uv_i, uvs in enumerate(uv_sets):
             b_mesh.uv_layers.new(name=f"UV{uv_i}")
-            b_mesh.uv_layers[-1].data.foreach_set("uv", [coord for uv in [uv_set[loop.vertex_index] for loop in b_mesh.loops] for coord in (uv.u, 1.0 - uv.v)])
+            # NIF flips the texture V-coordinate (OpenGL standard)
+            uvs = uvs.copy()
+            uvs[:, 1] = 1.0 - uvs[:, 1]
+            b_mesh.uv_layers[-1].data.foreach_set("uv", uvs[loop_vertices].ravel())
 
     @staticmethod
-    def map_normals(b_mesh, n_tri_data):
+    def map_normals(b_mesh, n_tri_data, normals=None):
         """Import nif normals as custom normals."""
         if not n_tri_data.has_normals:
             return
         assert len(b_mesh.vertices) == len(n_tri_data.normals)
         # set normals
         if NifOp.props.use_custom_normals:
-            no_array = np.array([normal.as_tuple() for normal in n_tri_data.normals])
+            no_array = arrays.read_array(n_tri_data.normals) if normals is None else normals
             # the normals need to be pre-normalized or blender will do it inconsistely, leading to marked sharp edges
             no_array = Vertex.normalize(no_array)
             # use normals_split_custom_set_from_vertices to set the loop custom normals from the per-vertex normals
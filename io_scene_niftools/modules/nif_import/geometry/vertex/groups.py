@@ -36,9 +36,11 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 # ***** END LICENSE BLOCK *****
+import numpy as np
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.modules.nif_import.object.block_registry import block_store
+from io_scene_niftools.utils import arrays
 from io_scene_niftools.utils.logging import NifLog
 
 
@@ -46,78 +48,196 @@ class VertexGroup:
     """Class that maps weighted vertices to specific groups"""
 
     @staticmethod
-    def get_skin_deformation_from_partition(n_geom):
-        """ Workaround because pyffi does not support this skinning method """
-
-        # todo [pyffi] integrate this into pyffi!!!
-        #              so that NiGeometry.get_skin_deformation() deals with this as intended
-
-        # mostly a copy from pyffi...
-        skin_inst = n_geom.skin_instance
+    def get_bone_transforms(skin_inst):
+        """Return the transform from geometry space to skinned space of every bone as a (B, 4, 4) array."""
         skin_data = skin_inst.data
-        skin_partition = skin_inst.skin_partition
         skel_root = skin_inst.skeleton_root
-        vertices = [NifFormat.Vector3() for _ in range(n_geom.data.num_vertices)]
-
-        # ignore normals for now, not needed for import
-        sum_weights = [0.0 for _ in range(n_geom.data.num_vertices)]
         skin_offset = skin_data.get_transform()
 
         # store one transform per bone
-        bone_transforms = []
+        bone_transforms = np.empty((len(skin_inst.bones), 4, 4), dtype=np.float64)
         for i, bone_block in enumerate(skin_inst.bones):
             bone_data = skin_data.bone_list[i]
             bone_offset = bone_data.get_transform()
             bone_matrix = bone_block.get_transform(skel_root)
             transform = bone_offset * bone_matrix * skin_offset
-            bone_transforms.append(transform)
+            bone_transforms[i] = transform.as_list()
+        return bone_transforms
 
-        # now the actual unique bit
-        for block in skin_partition.skin_partition_blocks:
-            # create all vgroups for this block's bones
-            block_bone_transforms = [bone_transforms[i] for i in block.bones]
+    @staticmethod
+    def get_skin_weights(skin_inst):
+        """Gather the skin weights stored per bone in the NiSkinData.
 
-            # go over each vert in this block
-            for vert_index, vertex_weights, bone_indices in zip(block.vertex_map, block.vertex_weights, block.bone_indices):
-                # skip verts that were already processed in an earlier block
-                if sum_weights[vert_index] != 0:
-                    continue
+        :return: Vertex indices, bone indices and weights as three flat arrays.
+        """
+        vertices = []
+        bone_indices = []
+        weights = []
+        for i, bone_data in enumerate(skin_inst.data.bone_list):
+            vertices.extend(skin_weight.index for skin_weight in bone_data.vertex_weights)
+            weights.extend(skin_weight.weight for skin_weight in bone_data.vertex_weights)
+            bone_indices.extend([i] * len(bone_data.vertex_weights))
+        return (np.array(vertices, dtype=np.int64),
+                np.array(bone_indices, dtype=np.int64),
+                np.array(weights, dtype=np.float32))
 
-                # go over all 4 weight / bone pairs and transform this vert
-                for weight, b_i in zip(vertex_weights, bone_indices):
-                    if weight > 0:
-                        transform = block_bone_transforms[b_i]
-                        vertices[vert_index] += weight * (n_geom.data.vertices[vert_index] * transform)
-                        sum_weights[vert_index] += weight
+    @staticmethod
+    def get_skin_deformation(vertices, bone_transforms, vertex_indices, bone_indices, weights, normals=None):
+        """Linear blend skinning of vertices, and optionally their normals, by the given (vertex, bone, weight) triples.
 
-        for i, s in enumerate(sum_weights):
-            if abs(s - 1.0) > 0.01:
-                print(f"Vertex {i:d} has weights not summing to one: {sum_weights['i']:d}")
+        :param vertices: (N, 3) array of vertices in geometry space.
+        :param bone_transforms: (B, 4, 4) array of bone transforms, acting on row vectors.
+        :param normals: (N, 3) array of normals in geometry space, or None.
+        :return: (N, 3) array of skinned vertices, (N, 3) array of skinned unit normals (None if no normals were
+            given), (N,) array of the sum of weights of each vertex.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        num_vertices = len(vertices)
+        mask = weights > 0
+        vertex_indices = vertex_indices[mask]
+        bone_indices = bone_indices[mask]
+        weights = weights[mask].astype(np.float64)
 
-        return vertices
+        # transform each weighted vertex by its bone as a homogeneous row vector, and its normal along with it with a
+        # zero w, so that only the 3x3 part of the bone transform applies to it
+        homogeneous = np.zeros((len(vertex_indices), 1 if normals is None else 2, 4), dtype=np.float64)
+        homogeneous[:, 0, :3] = vertices[vertex_indices]
+        homogeneous[:, 0, 3] = 1.0
+        if normals is not None:
+            homogeneous[:, 1, :3] = np.asarray(normals, dtype=np.float64)[vertex_indices]
+        transformed = np.einsum("nki,nij->nkj", homogeneous, bone_transforms[bone_indices])[:, :, :3]
+
+        skinned = np.zeros((num_vertices, homogeneous.shape[1], 3), dtype=np.float64)
+        np.add.at(skinned, vertex_indices, weights[:, None, None] * transformed)
+        sum_weights = np.bincount(vertex_indices, weights=weights, minlength=num_vertices)
+        if normals is None:
+            return skinned[:, 0], None, sum_weights
+        skinned_normals = skinned[:, 1]
+        lengths = np.linalg.norm(skinned_normals, axis=1)
+        # normals of unweighted vertices stay zero
+        skinned_normals[lengths > 0] /= lengths[lengths > 0, None]
+        return skinned[:, 0], skinned_normals, sum_weights
 
     @staticmethod
-    def apply_skin_deformation(n_data):
-        """ Process all geometries in NIF tree to apply their skin """
-        # get all geometries with skin
-        n_geoms = [g for g in n_data.get_global_iterator() if isinstance(g, NifFormat.NiGeometry) and g.is_skin()]
+    def get_skin_deformation_from_partition(n_geom):
+        """ Workaround because pyffi does not support this skinning method """
+
+        # todo [pyffi] integrate this into pyffi!!!
+        #              so that NiGeometry.get_skin_deformation() deals with this as intended
 
-        # make sure that each skin is applied only once to avoid distortions when a model is referred to twice
-        for n_geom in set(n_geoms):
+        skin_inst = n_geom.skin_instance
+        # only use the weights of the first block that contains each vert
+        vertex_indices, bone_indices, weights = VertexGroup.get_partition_weights(skin_inst.skin_partition,
+                                                                                  first_only=True)
+        return VertexGroup.get_skin_deformation(arrays.read_array(n_geom.data.vertices),
+                                                VertexGroup.get_bone_transforms(skin_inst),
+                                                vertex_indices, bone_indices, weights,
+                                                VertexGroup.get_normals(n_geom.data))
+
+    @staticmethod
+    def get_normals(n_geom_data):
+        """Return the normals of the geometry data as an (N, 3) array, or None if it has none."""
+        if n_geom_data.has_normals:
+            return arrays.read_array(n_geom_data.normals)
+        return None
+
+    @staticmethod
+    def apply_skin_deformation(index):
+        """ Process all geometries in the BlockIndex of a NIF tree to apply their skin """
+        # get all geometries with skin
+        # the index holds each block once, so each skin is applied only once to avoid distortions
+        # when a model is referred to twice
+        for n_geom in (g for g in index.get_blocks(NifFormat.NiGeometry) if g.is_skin()):
             NifLog.info(f'Applying skin deformation on geometry {n_geom.name}')
             skininst = n_geom.skin_instance
             skindata = skininst.data
             if skindata.has_vertex_weights:
-                vertices = n_geom.get_skin_deformation()[0]
+                vertex_indices, bone_indices, weights = VertexGroup.get_skin_weights(skininst)
+                vertices, normals, sum_weights = VertexGroup.get_skin_deformation(
+                    arrays.read_array(n_geom.data.vertices), VertexGroup.get_bone_transforms(skininst),
+                    vertex_indices, bone_indices, weights, VertexGroup.get_normals(n_geom.data))
             else:
                 NifLog.info("PyFFI does not support this type of skinning, so here's a workaround...")
-                vertices = VertexGroup.get_skin_deformation_from_partition(n_geom)
+                vertices, normals, sum_weights = VertexGroup.get_skin_deformation_from_partition(n_geom)
+
+            bad_weights = np.flatnonzero(np.abs(sum_weights - 1.0) > 0.01)
+            if len(bad_weights):
+                i = bad_weights[0]
+                NifLog.warn(f"{len(bad_weights):d} vertices of {n_geom.name} have weights not summing to one, "
+                            f"such as vertex {i:d}: {sum_weights[i]:.3f}")
 
             # finally we can actually set the data
-            for vold, vnew in zip(n_geom.data.vertices, vertices):
-                vold.x = vnew.x
-                vold.y = vnew.y
-                vold.z = vnew.z
+            arrays.write_array(n_geom.data.vertices, vertices)
+            if n_geom.data.has_normals:
+                arrays.write_array(n_geom.data.normals, normals)
+
+    @staticmethod
+    def get_weight_buckets(vertices, weights):
+        """Group the vertices of a single bone by weight, so each group can be added to a vertex group in one call.
+        If a vertex is listed more than once, its last weight is kept, as when adding the weights one by one.
+
+        :param vertices: Vertex indices.
+        :param weights: The weight of each vertex.
+        :return: List of (weight, list of vertex indices) tuples.
+        """
+        vertices = np.asarray(vertices, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+        # keep the last occurrence of each vertex
+        _, last = np.unique(vertices[::-1], return_index=True)
+        keep = np.sort(len(vertices) - 1 - last)
+        vertices = vertices[keep]
+        weights = weights[keep]
+
+        unique_weights, inverse = np.unique(weights, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(np.bincount(inverse, minlength=len(unique_weights)))[:-1]
+        return [(float(weight), bucket.tolist()) for weight, bucket in zip(unique_weights, np.split(vertices[order], splits))]
+
+    @staticmethod
+    def add_weights(v_group, vertices, weights):
+        """Add weighted vertices to a vertex group with one call per distinct weight."""
+        for weight, bucket in VertexGroup.get_weight_buckets(vertices, weights):
+            v_group.add(bucket, weight, 'REPLACE')
+
+    @staticmethod
+    def get_vertex_group(b_obj, group_name):
+        """Return the vertex group of that name, creating it if it does not exist yet."""
+        v_group = b_obj.vertex_groups.get(group_name)
+        if v_group is None:
+            v_group = b_obj.vertex_groups.new(name=group_name)
+        return v_group
+
+    @staticmethod
+    def get_partition_weights(skin_partition, first_only=False):
+        """Gather the weights that WLP2 hides in the skin partition.
+
+        :param first_only: Skip verts that were already weighted in an earlier block.
+        :return: Vertex indices, skin instance bone indices and weights as three flat arrays, in partition order.
+        """
+        vertices = []
+        bone_indices = []
+        weights = []
+        for block in skin_partition.skin_partition_blocks:
+            num_vertices = len(block.vertex_map)
+            if not num_vertices:
+                continue
+            block_vertices = np.array(list(block.vertex_map), dtype=np.int64)
+            block_weights = np.array([list(vertex_weights) for vertex_weights in block.vertex_weights],
+                                     dtype=np.float32).reshape(num_vertices, -1)
+            block_bone_indices = np.array([list(indices) for indices in block.bone_indices],
+                                          dtype=np.int64).reshape(num_vertices, -1)
+            # map the partition's local bone indices to skin instance bone indices
+            block_bones = np.array(list(block.bones), dtype=np.int64)
+            # assign each vert's 4 weights to its 4 vgroups (at max)
+            mask = block_weights > 0
+            if first_only and vertices:
+                mask &= ~np.isin(block_vertices, np.concatenate(vertices))[:, None]
+            vertices.append(np.broadcast_to(block_vertices[:, None], block_weights.shape)[mask])
+            bone_indices.append(block_bones[block_bone_indices[mask]])
+            weights.append(block_weights[mask])
+        if not vertices:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return np.concatenate(vertices), np.concatenate(bone_indices), np.concatenate(weights)
 
     @staticmethod
     def import_skin(ni_block, b_obj):
@@ -135,54 +255,96 @@ class VertexGroup:
                         continue
 
                     vertex_weights = bone_weights[idx].vertex_weights
-                    group_name = block_store.import_name(n_bone)
-                    if group_name not in b_obj.vertex_groups:
-                        v_group = b_obj.vertex_groups.new(name=group_name)
-
-                    for skinWeight in vertex_weights:
-                        vert = skinWeight.index
-                        weight = skinWeight.weight
-                        v_group.add([vert], weight, 'REPLACE')
+                    v_group = VertexGroup.get_vertex_group(b_obj, block_store.import_name(n_bone))
+                    VertexGroup.add_weights(v_group,
+                                            [skin_weight.index for skin_weight in vertex_weights],
+                                            [skin_weight.weight for skin_weight in vertex_weights])
 
             # WLP2 - hides the weights in the partition
             else:
                 skin_partition = skininst.skin_partition
+                # create all vgroups for the partition's bones, resolving each one only once
+                v_groups = {}
                 for block in skin_partition.skin_partition_blocks:
-                    # create all vgroups for this block's bones
-                    block_bone_names = [block_store.import_name(bones[i]) for i in block.bones]
-                    for group_name in block_bone_names:
-                        b_obj.vertex_groups.new(name=group_name)
-
-                    # go over each vert in this block
-                    for vert, vertex_weights, bone_indices in zip(block.vertex_map, block.vertex_weights, block.bone_indices):
+                    for bone_index in block.bones:
+                        if bone_index not in v_groups:
+                            v_groups[bone_index] = VertexGroup.get_vertex_group(b_obj, block_store.import_name(bones[bone_index]))
 
-                        # assign this vert's 4 weights to its 4 vgroups (at max)
-                        for w, b_i in zip(vertex_weights, bone_indices):
-                            if w > 0:
-                                group_name = block_bone_names[b_i]
-                                v_group = b_obj.vertex_groups[group_name]
-                                v_group.add([vert], w, 'REPLACE')
+                # then add all weights of each bone at once
+                vertices, bone_indices, weights = VertexGroup.get_partition_weights(skin_partition)
+                order = np.argsort(bone_indices, kind="stable")
+                used_bones, starts = np.unique(bone_indices[order], return_index=True)
+                ends = np.append(starts[1:], len(order))
+                for bone_index, start, end in zip(used_bones.tolist(), starts, ends):
+                    selection = order[start:end]
+                    VertexGroup.add_weights(v_groups[bone_index], vertices[selection], weights[selection])
 
         # import body parts as face maps
-        # get faces (triangles) as map of unordered vertices to list of indices
-        tri_map = {}
-        for polygon in b_obj.data.polygons:
-            vertices = frozenset(polygon.vertices)
-            if vertices in tri_map:
-                tri_map[vertices].append(polygon.index)
-            else:
-                tri_map[vertices] = [polygon.index]
         if isinstance(skininst, NifFormat.BSDismemberSkinInstance):
-            skinpart = ni_block.get_skin_partition()
-            for bodypart, skinpartblock in zip(skininst.partitions, skinpart.skin_partition_blocks):
-                bodypart_wrap = NifFormat.BSDismemberBodyPartType()
-                bodypart_wrap.set_value(bodypart.body_part)
-                group_name = bodypart_wrap.get_detail_display()
-
-                # create face map if it did not exist yet
-                if group_name not in b_obj.face_maps:
-                    f_group = b_obj.face_maps.new(name=group_name)
-
-                # add the triangles to the face map
-                for vertices in skinpartblock.get_mapped_triangles():
-                    f_group.add(tri_map[frozenset(vertices)])
+            VertexGroup.import_body_parts(ni_block, b_obj)
+
+    @staticmethod
+    def get_triangle_keys(triangles, num_vertices):
+        """Encode each triangle as an int64 key that does not depend on the order of its vertices.
+
+        :param triangles: (N, 3) array of vertex indices.
+        :param num_vertices: Number of vertices of the mesh, all indices must be smaller.
+        """
+        triangles = np.sort(np.asarray(triangles, dtype=np.int64).reshape(-1, 3), axis=1)
+        return (triangles[:, 0] * num_vertices + triangles[:, 1]) * num_vertices + triangles[:, 2]
+
+    @staticmethod
+    def match_triangles(polygon_keys, triangle_keys):
+        """Find the polygons that match the given triangles.
+
+        :param polygon_keys: Key of every polygon, -1 for polygons that are no triangles.
+        :param triangle_keys: Keys of the triangles to look up.
+        :return: Sorted array of the indices of all polygons that match any of the triangles.
+        """
+        order = np.argsort(polygon_keys, kind="stable")
+        sorted_keys = polygon_keys[order]
+        triangle_keys = np.unique(triangle_keys)
+        # several polygons may share a key, so take the whole range of each match
+        starts = np.searchsorted(sorted_keys, triangle_keys, side="left")
+        ends = np.searchsorted(sorted_keys, triangle_keys, side="right")
+        counts = ends - starts
+        if not counts.any():
+            return np.empty(0, dtype=np.int64)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.sort(order[np.repeat(starts, counts) + offsets])
+
+    @staticmethod
+    def import_body_parts(ni_block, b_obj):
+        """Import the body parts of a BSDismemberSkinInstance as face maps"""
+        skininst = ni_block.skin_instance
+        b_mesh = b_obj.data
+
+        # get the triangles of the mesh as keys of their unordered vertices
+        num_vertices = len(b_mesh.vertices)
+        loop_vertices = arrays.get_array(b_mesh.loops, "vertex_index", np.int32)
+        loop_starts = arrays.get_array(b_mesh.polygons, "loop_start", np.int32)
+        loop_totals = arrays.get_array(b_mesh.polygons, "loop_total", np.int32)
+        polygon_keys = np.full(len(loop_starts), -1, dtype=np.int64)
+        is_triangle = loop_totals == 3
+        tri_loops = loop_starts[is_triangle, None] + np.arange(3)
+        polygon_keys[is_triangle] = VertexGroup.get_triangle_keys(loop_vertices[tri_loops], num_vertices)
+
+        skinpart = ni_block.get_skin_partition()
+        for bodypart, skinpartblock in zip(skininst.partitions, skinpart.skin_partition_blocks):
+            bodypart_wrap = NifFormat.BSDismemberBodyPartType()
+            bodypart_wrap.set_value(bodypart.body_part)
+            group_name = bodypart_wrap.get_detail_display()
+
+            # create face map if it did not exist yet
+            f_group = b_obj.face_maps.get(group_name)
+            if f_group is None:
+                f_group = b_obj.face_maps.new(name=group_name)
+
+            # add the triangles to the face map
+            triangles = list(skinpartblock.get_mapped_triangles())
+            if not triangles:
+                continue
+            triangle_keys = VertexGroup.get_triangle_keys(triangles, num_vertices)
+            polygons = VertexGroup.match_triangles(polygon_keys, triangle_keys)
+            if len(polygons):
+                f_group.add(polygons.tolist())
@@ -71,8 +71,7 @@ class Object:
     @staticmethod
     def mesh_from_data(name, verts, faces):
         me = bpy.data.meshes.new(name)
-        me.from_pydata(verts, [], faces)
-        me.update()
+        Mesh.build_mesh(me, verts, faces)
         return Object.create_b_obj(None, me, name)
 
     @staticmethod
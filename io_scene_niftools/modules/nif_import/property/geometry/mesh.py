@@ -38,19 +38,30 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
+from pyffi.formats.nif import NifFormat
 
 from functools import singledispatch
+import hashlib
 import itertools
 
 from io_scene_niftools.modules.nif_import.property.geometry.niproperty import NiPropertyProcessor
 from io_scene_niftools.modules.nif_import.property.nodes_wrapper import NodesWrapper
 from io_scene_niftools.modules.nif_import.property.shader.bsshaderlightingproperty import BSShaderLightingPropertyProcessor
 from io_scene_niftools.modules.nif_import.property.shader.bsshaderproperty import BSShaderPropertyProcessor
+from io_scene_niftools.utils.shared import SharedData, get_folder_key
+from io_scene_niftools.utils.singleton import NifData, NifOp
 from io_scene_niftools.utils.logging import NifLog
 
 
 class MeshPropertyProcessor:
 
+    # properties that change the object rather than the material
+    object_properties = (NifFormat.NiWireframeProperty, )
+
+    # imported materials by material key, so identical property stacks share their material, also across imports of
+    # the same folder
+    shared_materials = SharedData("materials")
+
     def __init__(self):
         # get processor singletons
         self.nodes_wrapper = NodesWrapper()
@@ -69,35 +80,45 @@ class MeshPropertyProcessor:
         b_mesh = b_obj.data
 
         # get all valid properties that are attached to n_block
-        props = list(prop for prop in itertools.chain(n_block.properties, n_block.bs_properties) if prop is not None)
+        props = self.get_properties(n_block)
 
         # we need no material if we have no properties
         if not props:
             return
 
-        # just to avoid duped materials, a first pass, make sure a named material is created or retrieved
-        for prop in props:
-            if prop.name:
-                name = prop.name.decode()
-                if name and name in bpy.data.materials:
-                    b_mat = bpy.data.materials[name]
-                    NifLog.debug(f"Retrieved already imported material {b_mat.name} from name {name}")
-                else:
-                    b_mat = bpy.data.materials.new(name)
-                    NifLog.debug(f"Created material {name} to store properties in {b_mat.name}")
-                break
+        # identical properties on meshes with the same layers give the same material and node tree
+        material_key = self.get_material_key(n_block, b_mesh)
+        b_mat = self.shared_materials.get(material_key)
+        is_shared = b_mat is not None
+        if is_shared:
+            NifLog.debug(f"Reusing material {b_mat.name} with identical properties")
+            b_mesh.materials.append(b_mat)
+            # only the properties that change the object still need to be processed
+            props = [prop for prop in props if isinstance(prop, self.object_properties)]
         else:
-            # bs shaders often have no name, so generate one from mesh name
-            name = n_block.name.decode() + "_nt_mat"
-            b_mat = bpy.data.materials.new(name)
-            NifLog.debug(f"Created material {name} to store properties in {b_mat.name}")
-
-        # do initial settings for the material here
-        self.nodes_wrapper.b_mat = b_mat
-        self.nodes_wrapper.clear_default_nodes()
-
-        # link the material to the mesh
-        b_mesh.materials.append(b_mat)
+            # just to avoid duped materials, a first pass, make sure a named material is created or retrieved
+            for prop in props:
+                if prop.name:
+                    name = prop.name.decode()
+                    if name and name in bpy.data.materials:
+                        b_mat = bpy.data.materials[name]
+                        NifLog.debug(f"Retrieved already imported material {b_mat.name} from name {name}")
+                    else:
+                        b_mat = bpy.data.materials.new(name)
+                        NifLog.debug(f"Created material {name} to store properties in {b_mat.name}")
+                    break
+            else:
+                # bs shaders often have no name, so generate one from mesh name
+                name = n_block.name.decode() + "_nt_mat"
+                b_mat = bpy.data.materials.new(name)
+                NifLog.debug(f"Created material {name} to store properties in {b_mat.name}")
+
+            # do initial settings for the material here
+            self.nodes_wrapper.b_mat = b_mat
+            self.nodes_wrapper.clear_default_nodes()
+
+            # link the material to the mesh
+            b_mesh.materials.append(b_mat)
 
         # set the vars on every processor
         for processor in self.processors:
@@ -112,7 +133,44 @@ class MeshPropertyProcessor:
             NifLog.debug(f"{type(prop)} property found")
             self.process_property(prop)
 
-        self.nodes_wrapper.connect_to_output(b_mesh.vertex_colors)
+        if not is_shared:
+            self.nodes_wrapper.connect_to_output(b_mesh.vertex_colors)
+            self.shared_materials.add(material_key, b_mat)
+
+    @staticmethod
+    def get_properties(n_block):
+        """Return all valid properties that are attached to n_block."""
+        return [prop for prop in itertools.chain(n_block.properties, n_block.bs_properties) if prop is not None]
+
+    @staticmethod
+    def get_props_key(props):
+        """Return a key for the content of the material properties in props (colors, alpha, texture file names, shader
+        flags), leaving out the properties that change the object."""
+        return tuple((type(prop).__name__, prop.get_hash()) for prop in props
+                     if not isinstance(prop, MeshPropertyProcessor.object_properties))
+
+    @staticmethod
+    def get_property_key(n_block):
+        """Return a key for the content of the properties of n_block, or None if a property changes the object rather
+        than the material."""
+        props = MeshPropertyProcessor.get_properties(n_block)
+        if any(isinstance(prop, MeshPropertyProcessor.object_properties) for prop in props):
+            return None
+        return MeshPropertyProcessor.get_props_key(props)
+
+    @staticmethod
+    def get_material_key(n_block, b_mesh):
+        """Return the key for the material of n_block in b_mesh, for the nif that is imported."""
+        return MeshPropertyProcessor.hash_material_key(MeshPropertyProcessor.get_properties(n_block),
+                                                       bool(b_mesh.vertex_colors), NifData.data.version,
+                                                       get_folder_key(NifOp.props.filepath))
+
+    @staticmethod
+    def hash_material_key(props, has_vertex_colors, version, folder):
+        """Return a key for a material from the content of its material properties (colors, alpha, texture file names,
+        shader flags), whether the mesh has vertex colors, the nif version and the folder of the nif."""
+        key = (MeshPropertyProcessor.get_props_key(props), has_vertex_colors, version, folder)
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
 
     def process_property(self, prop):
         """Base method to warn user that this property is not supported"""
@@ -37,8 +37,6 @@
 #
 # ***** END LICENSE BLOCK *****
 
-from functools import reduce
-import operator
 import os.path
 
 import bpy
@@ -46,6 +44,7 @@ from pyffi.formats.dds import DdsFormat
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.modules.nif_import.property import texture
+from io_scene_niftools.utils.paths import DirectoryCache
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
 
@@ -174,6 +173,20 @@ NifFormat.ATextureRenderData.save_as_dds = save_as_dds_override
 
 class TextureLoader:
 
+    # listings of the texture search folders, shared by all imports
+    directory_cache = None
+
+    # alternate extensions that are tried when the texture file is not found
+    extensions = ('.dds', '.png', '.tga', '.bmp', '.jpg')
+
+    @staticmethod
+    def get_directory_cache():
+        """Return the listings of the texture search folders, which are kept in the Blender config folder."""
+        if TextureLoader.directory_cache is None:
+            cache_path = os.path.join(bpy.utils.user_resource('CONFIG'), "niftools_texture_folders.json")
+            TextureLoader.directory_cache = DirectoryCache(cache_path)
+        return TextureLoader.directory_cache
+
     @staticmethod
     def load_image(tex_path):
         """Returns an image or a generated image if none was found"""
@@ -260,38 +273,34 @@ class TextureLoader:
         if art_index != -1:
             search_path_list.append(import_path[:art_index] + 'shared')
 
+        # all folders are searched case insensitively, so only alternate extensions need to be tried
+        texfns = [fn] + [fn[:-4] + ext for ext in self.extensions if fn[-4:].lower() != ext]
+        directory_cache = self.get_directory_cache()
+
         # go through all texture search paths
         for texdir in search_path_list:
             if texdir[0:2] == "//":
-                # Blender-specific directory, slows down resolve_ncase:
+                # Blender-specific directory
                 relative = True
                 texdir = texdir[2:]
             else:
                 relative = False
             texdir = texdir.replace('\\', os.sep)
             texdir = texdir.replace('/', os.sep)
-            # go through all possible file names, try alternate extensions too; for linux, also try lower case versions of filenames
-            texfns = reduce(operator.add,
-                            [[fn[:-4] + ext, fn[:-4].lower() + ext]
-                             for ext in ('.DDS', '.dds', '.PNG', '.png',
-                                         '.TGA', '.tga', '.BMP', '.bmp',
-                                         '.JPG', '.jpg')])
-
-            texfns = [fn, fn.lower()] + list(set(texfns))
+            if relative:
+                texdir = bpy.path.abspath("//" + texdir)
             for texfn in texfns:
                 # now a little trick, to satisfy many Morrowind mods
                 if texfn[:9].lower() == 'textures' + os.sep and texdir[-9:].lower() == os.sep + 'textures':
                     # strip one of the two 'textures' from the path
-                    tex = os.path.join(texdir[:-9], texfn)
+                    root = texdir[:-9]
                 else:
-                    tex = os.path.join(texdir, texfn)
-
-                # "ignore case" on linuxW
-                if relative:
-                    tex = bpy.path.abspath("//" + tex)
-                tex = bpy.path.resolve_ncase(tex)
-                NifLog.debug(f"Searching {tex}")
-                if os.path.exists(tex):
+                    root = texdir
+
+                NifLog.debug(f"Searching {os.path.join(root, texfn)}")
+                # "ignore case" on linux, from the cached folder listings
+                tex = directory_cache.find(root, texfn)
+                if tex:
                     if relative:
                         return self.load_image(bpy.path.relpath(tex))
                     else:
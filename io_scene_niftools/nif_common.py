@@ -41,6 +41,7 @@ import bpy
 import pyffi
 
 from io_scene_niftools.utils import debugging
+from io_scene_niftools.utils.profiling import NifProfiler
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
 
@@ -72,4 +73,5 @@ class NifCommon:
         NifLog.info(f"Scale Correction set to {scale}")
         toaster = pyffi.spells.nif.NifToaster()
         toaster.scale = scale
-        pyffi.spells.nif.fix.SpellScale(data=data, toaster=toaster).recurse()
\ No newline at end of file
+        with NifProfiler.phase("SpellScale"):
+            pyffi.spells.nif.fix.SpellScale(data=data, toaster=toaster).recurse()
\ No newline at end of file
@@ -52,6 +52,7 @@ from io_scene_niftools.modules.nif_export import scene
 from io_scene_niftools.modules.nif_export.property.object import ObjectProperty
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math, consts
+from io_scene_niftools.utils.profiling import NifProfiler
 from io_scene_niftools.utils.singleton import NifOp, EGMData, NifData
 from io_scene_niftools.utils.logging import NifLog, NifError
 
@@ -133,7 +134,8 @@ class NifExport(NifCommon):
             NifData.init(data)
 
             # export the actual root node (the name is fixed later to avoid confusing the exporter with duplicate names)
-            root_block = self.objecthelper.export_root_node(self.root_objects, filebase)
+            with NifProfiler.phase("objects"):
+                root_block = self.objecthelper.export_root_node(self.root_objects, filebase)
 
             # post-processing:
             # ----------------
@@ -142,53 +144,47 @@ class NifExport(NifCommon):
             if bpy.context.scene.niftools_scene.game == 'MORROWIND':
                 # animations without keyframe animations crash the TESCS
                 # if we are in that situation, add a trivial keyframe animation
-                has_keyframecontrollers = False
-                for block in block_store.block_to_obj:
-                    if isinstance(block, NifFormat.NiKeyframeController):
-                        has_keyframecontrollers = True
-                        break
+                has_keyframecontrollers = bool(block_store.get_blocks(NifFormat.NiKeyframeController))
                 if (not has_keyframecontrollers) and (not NifOp.props.bs_animation_node):
                     NifLog.info("Defining dummy keyframe controller")
                     # add a trivial keyframe controller on the scene root
                     self.transform_anim.create_controller(root_block, root_block.name)
 
                 if NifOp.props.bs_animation_node:
-                    for block in block_store.block_to_obj:
-                        if isinstance(block, NifFormat.NiNode):
-                            # if any of the shape children has a controller or if the ninode has a controller convert its type
-                            if block.controller or any(child.controller for child in block.children if isinstance(child, NifFormat.NiGeometry)):
-                                new_block = NifFormat.NiBSAnimationNode().deepcopy(block)
-                                # have to change flags to 42 to make it work
-                                new_block.flags = 42
-                                root_block.replace_global_node(block, new_block)
-                                if root_block is block:
-                                    root_block = new_block
+                    for block in block_store.get_blocks(NifFormat.NiNode):
+                        # if any of the shape children has a controller or if the ninode has a controller convert its type
+                        if block.controller or any(child.controller for child in block.children if isinstance(child, NifFormat.NiGeometry)):
+                            new_block = NifFormat.NiBSAnimationNode().deepcopy(block)
+                            # have to change flags to 42 to make it work
+                            new_block.flags = 42
+                            root_block.replace_global_node(block, new_block)
+                            if root_block is block:
+                                root_block = new_block
 
             # oblivion skeleton export: check that all bones have a transform controller and transform interpolator
             if bpy.context.scene.niftools_scene.game in ('OBLIVION', 'FALLOUT_3', 'SKYRIM') and filebase.lower() in ('skeleton', 'skeletonbeast'):
                 self.transform_anim.add_dummy_controllers()
 
             # bhkConvexVerticesShape of children of bhkListShapes need an extra bhkConvexTransformShape (see issue #3308638, reported by Koniption)
-            # note: block_store.block_to_obj changes during iteration, so need list copy
-            for block in list(block_store.block_to_obj.keys()):
-                if isinstance(block, NifFormat.bhkListShape):
-                    for i, sub_shape in enumerate(block.sub_shapes):
-                        if isinstance(sub_shape, NifFormat.bhkConvexVerticesShape):
-                            coltf = block_store.create_block("bhkConvexTransformShape")
-                            coltf.material = sub_shape.material
-                            coltf.unknown_float_1 = 0.1
-                            unk_8 = coltf.unknown_8_bytes
-                            unk_8[0] = 96
-                            unk_8[1] = 120
-                            unk_8[2] = 53
-                            unk_8[3] = 19
-                            unk_8[4] = 24
-                            unk_8[5] = 9
-                            unk_8[6] = 253
-                            unk_8[7] = 4
-                            coltf.transform.set_identity()
-                            coltf.shape = sub_shape
-                            block.sub_shapes[i] = coltf
+            # note: get_blocks returns a copy, as block_store changes during iteration
+            for block in block_store.get_blocks(NifFormat.bhkListShape):
+                for i, sub_shape in enumerate(block.sub_shapes):
+                    if isinstance(sub_shape, NifFormat.bhkConvexVerticesShape):
+                        coltf = block_store.create_block("bhkConvexTransformShape")
+                        coltf.material = sub_shape.material
+                        coltf.unknown_float_1 = 0.1
+                        unk_8 = coltf.unknown_8_bytes
+                        unk_8[0] = 96
+                        unk_8[1] = 120
+                        unk_8[2] = 53
+                        unk_8[3] = 19
+                        unk_8[4] = 24
+                        unk_8[5] = 9
+                        unk_8[6] = 253
+                        unk_8[7] = 4
+                        coltf.transform.set_identity()
+                        coltf.shape = sub_shape
+                        block.sub_shapes[i] = coltf
 
             # export constraints
             for b_obj in self.exportable_objects:
@@ -235,16 +231,16 @@ class NifExport(NifCommon):
 
             # generate mopps (must be done after applying scale!)
             if bpy.context.scene.niftools_scene.game in ('OBLIVION', 'FALLOUT_3', 'SKYRIM'):
-                for block in block_store.block_to_obj:
-                    if isinstance(block, NifFormat.bhkMoppBvTreeShape):
-                        NifLog.info("Generating mopp...")
+                for block in block_store.get_blocks(NifFormat.bhkMoppBvTreeShape):
+                    NifLog.info("Generating mopp...")
+                    with NifProfiler.phase("mopp"):
                         block.update_mopp()
-                        # print "=== DEBUG: MOPP TREE ==="
-                        # block.parse_mopp(verbose = True)
-                        # print "=== END OF MOPP TREE ==="
-                        # warn about mopps on non-static objects
-                        if any(sub_shape.layer != 1 for sub_shape in block.shape.sub_shapes):
-                            NifLog.warn("Mopps for non-static objects may not function correctly in-game. You may wish to use simple primitives for collision.")
+                    # print "=== DEBUG: MOPP TREE ==="
+                    # block.parse_mopp(verbose = True)
+                    # print "=== END OF MOPP TREE ==="
+                    # warn about mopps on non-static objects
+                    if any(sub_shape.layer != 1 for sub_shape in block.shape.sub_shapes):
+                        NifLog.warn("Mopps for non-static objects may not function correctly in-game. You may wish to use simple primitives for collision.")
 
             # export nif file:
             # ----------------
@@ -269,7 +265,7 @@ class NifExport(NifCommon):
             elif bpy.context.scene.niftools_scene.game == 'HOWLING_SWORD':
                 data.modification = "jmihs1"
 
-            with open(niffile, "wb") as stream:
+            with NifProfiler.phase("write"), open(niffile, "wb") as stream:
                 data.write(stream)
 
             # export egm file:
@@ -279,7 +275,7 @@ class NifExport(NifCommon):
                 NifLog.info(f"Writing {ext} file")
 
                 egmfile = os.path.join(directory, filebase + ext)
-                with open(egmfile, "wb") as stream:
+                with NifProfiler.phase("write egm"), open(egmfile, "wb") as stream:
                     EGMData.data.write(stream)
 
             # save exported file (this is used by the test suite)
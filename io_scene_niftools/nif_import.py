@@ -40,6 +40,7 @@
 
 import bpy
 import pyffi.spells.nif.fix
+from bpy.app.handlers import persistent
 from pyffi.formats.nif import NifFormat
 
 import io_scene_niftools.utils.logging
@@ -51,20 +52,31 @@ from io_scene_niftools.modules.nif_import.armature import Armature
 from io_scene_niftools.modules.nif_import.collision.bound import Bound
 from io_scene_niftools.modules.nif_import.collision.havok import BhkCollision
 from io_scene_niftools.modules.nif_import.constraint import Constraint
+from io_scene_niftools.modules.nif_import.geometry.mesh import Mesh
 from io_scene_niftools.modules.nif_import.geometry.vertex.groups import VertexGroup
 from io_scene_niftools.modules.nif_import.object.block_registry import block_store
 from io_scene_niftools.modules.nif_import.object import Object
 from io_scene_niftools.modules.nif_import.object.types import NiTypes
+from io_scene_niftools.modules.nif_import.property.texture.loader import TextureLoader
 from io_scene_niftools.modules.nif_import import scene
 from io_scene_niftools.modules.nif_import.property.object import ObjectProperty
+from io_scene_niftools.modules.nif_import.property.geometry.mesh import MeshPropertyProcessor
 
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.blocks import safe_decode
+from io_scene_niftools.utils.profiling import NifProfiler
 from io_scene_niftools.utils.singleton import NifOp, NifData
 from io_scene_niftools.utils.logging import NifLog, NifError
 
 
+@persistent
+def clear_shared_data(*args):
+    """Forget the names of the data that imports share, as unrelated data may take those names after loading a file."""
+    Mesh.shared_meshes.clear()
+    MeshPropertyProcessor.shared_materials.clear()
+
+
 class NifImport(NifCommon):
 
     def __init__(self, operator, context):
@@ -72,7 +84,11 @@ class NifImport(NifCommon):
 
     def execute(self):
         """Main import function."""
-        self.load_files()  # needs to be first to provide version info.
+        # the shared data is gathered again from the keys stored in the blend file, which may have changed since
+        clear_shared_data()
+        with NifProfiler.phase("load"):
+            self.load_files()  # needs to be first to provide version info.
+        NifProfiler.count("blocks read", len(NifData.index.blocks))
 
         self.armaturehelper = Armature()
         self.boundhelper = Bound()
@@ -85,6 +101,10 @@ class NifImport(NifCommon):
         # find and store this list now of selected objects as creating new objects adds them to the selection list
         self.SELECTED_OBJECTS = bpy.context.selected_objects[:]
 
+        # texture folders may have changed since the last import
+        directory_cache = TextureLoader.get_directory_cache()
+        directory_cache.refresh()
+
         # catch nif import errors
         try:
             # check that one armature is selected in 'import geometry + parent
@@ -96,26 +116,33 @@ class NifImport(NifCommon):
             NifLog.info("Importing data")
             # calculate and set frames per second
             if NifOp.props.animation:
-                self.transform_anim.set_frames_per_second(NifData.data.roots)
-
-            # merge skeleton roots and transform geometry into the rest pose
-            if NifOp.props.merge_skeleton_roots:
-                pyffi.spells.nif.fix.SpellMergeSkeletonRoots(data=NifData.data).recurse()
-            if NifOp.props.send_geoms_to_bind_pos:
-                pyffi.spells.nif.fix.SpellSendGeometriesToBindPosition(data=NifData.data).recurse()
-            if NifOp.props.send_detached_geoms_to_node_pos:
-                pyffi.spells.nif.fix.SpellSendDetachedGeometriesToNodePosition(data=NifData.data).recurse()
-            if NifOp.props.apply_skin_deformation:
-                VertexGroup.apply_skin_deformation(NifData.data)
-
-            # store scale correction
-            bpy.context.scene.niftools_scene.scale_correction = NifOp.props.scale_correction
-            self.apply_scale(NifData.data, NifOp.props.scale_correction)
+                self.transform_anim.set_frames_per_second(NifData.index)
+
+            with NifProfiler.phase("spells"):
+                # merge skeleton roots and transform geometry into the rest pose
+                if NifOp.props.merge_skeleton_roots:
+                    with NifProfiler.phase("SpellMergeSkeletonRoots"):
+                        pyffi.spells.nif.fix.SpellMergeSkeletonRoots(data=NifData.data).recurse()
+                        # this moves blocks around, so the index must be rebuilt
+                        NifData.index.update(NifData.data.roots)
+                if NifOp.props.send_geoms_to_bind_pos:
+                    with NifProfiler.phase("SpellSendGeometriesToBindPosition"):
+                        pyffi.spells.nif.fix.SpellSendGeometriesToBindPosition(data=NifData.data).recurse()
+                if NifOp.props.send_detached_geoms_to_node_pos:
+                    with NifProfiler.phase("SpellSendDetachedGeometriesToNodePosition"):
+                        pyffi.spells.nif.fix.SpellSendDetachedGeometriesToNodePosition(data=NifData.data).recurse()
+                if NifOp.props.apply_skin_deformation:
+                    with NifProfiler.phase("skin deformation"):
+                        VertexGroup.apply_skin_deformation(NifData.index)
+
+                # store scale correction
+                bpy.context.scene.niftools_scene.scale_correction = NifOp.props.scale_correction
+                self.apply_scale(NifData.data, NifOp.props.scale_correction)
 
             # import all root blocks
             for root in NifData.data.roots:
                 # root hack for corrupt better bodies meshes and remove geometry from better bodies on skeleton import
-                for b in (b for b in root.tree(block_type=NifFormat.NiGeometry) if b.is_skin()):
+                for b in (b for b in NifData.index.get_blocks(NifFormat.NiGeometry, root) if b.is_skin()):
                     # check if root belongs to the children list of the skeleton root
                     if root in [c for c in b.skin_instance.skeleton_root.children]:
                         # fix parenting and update transform accordingly
@@ -123,22 +150,30 @@ class NifImport(NifCommon):
                         b.skin_instance.skeleton_root = root
                         # delete non-skeleton nodes if we're importing skeleton only
                         if NifOp.props.process == "SKELETON_ONLY":
-                            nonbip_children = (child for child in root.children if child.name[:6] != 'Bip01 ')
+                            nonbip_children = [child for child in root.children if child.name[:6] != 'Bip01 ']
                             for child in nonbip_children:
                                 root.remove_child(child)
+                            if nonbip_children:
+                                NifData.index.update(NifData.data.roots)
 
                 # import this root block
                 NifLog.debug(f"Root block: {root.get_global_display()}")
-                self.import_root(root)
+                with NifProfiler.phase("root", safe_decode(root.name)):
+                    self.import_root(root)
 
         except NifError:
             return {'CANCELLED'}
+        finally:
+            directory_cache.save()
 
         NifLog.info("Finished")
         return {'FINISHED'}
 
     def load_files(self):
-        NifData.init(NifFile.load_nif(NifOp.props.filepath))
+        if NifOp.props.process == "SKELETON_ONLY":
+            NifData.init(NifFile.load_skeleton(NifOp.props.filepath))
+        else:
+            NifData.init(NifFile.load_nif(NifOp.props.filepath))
         if NifOp.props.override_scene_info:
             scene.import_version_info(NifData.data)
 
@@ -198,14 +233,16 @@ class NifImport(NifCommon):
 
         NifLog.info(f"Importing data for block '{safe_decode(n_block.name)}'")
         if isinstance(n_block, NifFormat.NiTriBasedGeom) and NifOp.props.process != "SKELETON_ONLY":
-            return self.objecthelper.import_geometry_object(b_armature, n_block)
+            with NifProfiler.phase("mesh", safe_decode(n_block.name)):
+                return self.objecthelper.import_geometry_object(b_armature, n_block)
 
         elif isinstance(n_block, NifFormat.NiNode):
             # import object
             if self.armaturehelper.is_armature_root(n_block):
                 # all bones in the tree are also imported by import_armature
                 if NifOp.props.process != "GEOMETRY_ONLY":
-                    b_obj = self.armaturehelper.import_armature(n_block)
+                    with NifProfiler.phase("armature", safe_decode(n_block.name)):
+                        b_obj = self.armaturehelper.import_armature(n_block)
                 else:
                     n_name = block_store.import_name(n_block)
                     # get the armature from the blender scene
@@ -38,6 +38,8 @@
 # ***** END LICENSE BLOCK *****
 import bpy
 
+from io_scene_niftools.utils.profiling import NifProfiler
+
 
 class CommonDevOperator:
     """Abstract base class for import and export user interface."""
@@ -73,6 +75,21 @@ class CommonDevOperator:
         subtype="FILE_PATH",
         options={'HIDDEN'})
 
+    # Log the time spent in each phase of the import or export.
+    phase_timings: bpy.props.BoolProperty(
+        name="Phase Timings",
+        description="Log a table of the time spent in each phase of the import or export",
+        default=False)
+
+    # Name of file where the phase timings are written as a Chrome trace.
+    trace_path: bpy.props.StringProperty(
+        name="Trace Path",
+        description="File where the phase timings are written as a Chrome trace. Set to empty string to turn off tracing",
+        maxlen=1024,
+        default="",
+        subtype="FILE_PATH",
+        options={'HIDDEN'})
+
     # Used for checking equality between floats.
     epsilon: bpy.props.FloatProperty(
         name="Epsilon",
@@ -81,6 +98,10 @@ class CommonDevOperator:
         min=0.0, max=1.0, precision=5,
         options={'HIDDEN'})
 
+    def profile(self, name):
+        """Return the profiling session of the operator, set up by the dev options or the environment."""
+        return NifProfiler.session(name, self.phase_timings, self.trace_path, self.profile_path)
+
 
 class CommonScale:
 
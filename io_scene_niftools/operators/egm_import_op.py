@@ -61,7 +61,8 @@ class EgmImportOperator(Operator, ImportHelper, CommonScale, CommonEgm, CommonDe
         method.
         """
 
-        return egm_import.EgmImport(self, context).execute()
+        with self.profile("egm import"):
+            return egm_import.EgmImport(self, context).execute()
 
 
 classes = [
@@ -67,7 +67,8 @@ class KfExportOperator(Operator, ExportHelper, CommonDevOperator, CommonScale, C
         calls its :meth:`~io_scene_niftools.nif_export.NifExport.execute`
         method.
         """
-        return KfExport(self, context).execute()
+        with self.profile("kf export"):
+            return KfExport(self, context).execute()
 
 
 classes = [
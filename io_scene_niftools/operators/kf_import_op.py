@@ -64,7 +64,8 @@ class KfImportOperator(Operator, ImportHelper, CommonDevOperator, CommonScale, C
         method.
         """
 
-        return KfImport(self, context).execute()
+        with self.profile("kf import"):
+            return KfImport(self, context).execute()
 
 
 classes = [
@@ -137,7 +137,8 @@ class NifExportOperator(Operator, ExportHelper, CommonDevOperator, CommonNif, Co
         calls its :meth:`~io_scene_niftools.nif_export.NifExport.execute`
         method.
         """
-        return NifExport(self, context).execute()
+        with self.profile("nif export"):
+            return NifExport(self, context).execute()
 
 
 classes = [
@@ -41,7 +41,7 @@ import bpy
 from bpy.types import Operator, Panel
 from bpy_extras.io_utils import ImportHelper
 
-from io_scene_niftools.nif_import import NifImport
+from io_scene_niftools.nif_import import NifImport, clear_shared_data
 from io_scene_niftools.operators.common_op import CommonDevOperator, CommonScale, CommonNif
 from io_scene_niftools.utils.decorators import register_classes, unregister_classes
 
@@ -124,7 +124,8 @@ class NifImportOperator(Operator, ImportHelper, CommonScale, CommonDevOperator,
         """Execute the import operators: first constructs a :class:`~io_scene_niftools.nif_import.NifImport` instance and then
         calls its :meth:`~io_scene_niftools.nif_import.NifImport.execute` method."""
 
-        return NifImport(self, context).execute()
+        with self.profile("nif import"):
+            return NifImport(self, context).execute()
 
 
 classes = [
@@ -134,7 +135,9 @@ classes = [
 
 def register():
     register_classes(classes, __name__)
+    bpy.app.handlers.load_post.append(clear_shared_data)
 
 
 def unregister():
+    bpy.app.handlers.load_post.remove(clear_shared_data)
     unregister_classes(classes, __name__)
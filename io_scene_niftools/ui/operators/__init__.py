@@ -72,6 +72,7 @@ class OperatorCommonDevPanel(OperatorSetting, Panel):
         layout.prop(operator, "pyffi_log_level")
         layout.prop(operator, "plugin_log_level")
         layout.prop(operator, "epsilon")
+        layout.prop(operator, "phase_timings")
 
 
 CLASSES = [OperatorCommonDevPanel]
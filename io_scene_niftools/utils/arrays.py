@@ -0,0 +1,103 @@
+"""Bulk copies between numpy arrays and blender collections or pyffi arrays of structs, such as vertices, normals
+and uv coordinates."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2021, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import hashlib
+from operator import attrgetter
+
+import numpy as np
+
+# field names of the pyffi structs that are commonly copied in bulk
+VECTOR3 = ("x", "y", "z")
+QUATERNION = ("w", "x", "y", "z")
+COLOR4 = ("r", "g", "b", "a")
+TEXCOORD = ("u", "v")
+TRIANGLE = ("v_1", "v_2", "v_3")
+
+
+def get_array(collection, attr, dtype, width=1):
+    """Read a property of all items of a blender collection into a numpy array with foreach_get."""
+    array = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attr, array)
+    if width > 1:
+        return array.reshape(-1, width)
+    return array
+
+
+def hash_arrays(*arrays):
+    """Return a digest of the dtype, shape and content of numpy arrays, where None stands for a missing array."""
+    digest = hashlib.blake2b()
+    for array in arrays:
+        if array is None:
+            digest.update(b"none")
+            continue
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.digest()
+
+
+def _get_values(n_array, fields):
+    """Return a flat list of the basic value objects that store the given float fields of every struct in n_array."""
+    # pyffi keeps each basic attribute of a struct in an object called _<name>_value_
+    getter = attrgetter(*(f"_{field}_value_" for field in fields))
+    if len(fields) == 1:
+        return [getter(n_struct) for n_struct in n_array]
+    return [value for n_struct in n_array for value in getter(n_struct)]
+
+
+def write_array(n_array, b_array, fields=VECTOR3):
+    """Copy a numpy array of shape (len(n_array), len(fields)) into the float fields of a pyffi array of structs.
+    The pyffi array must already have the right size."""
+    b_array = np.asarray(b_array, dtype=np.float32)
+    values = _get_values(n_array, fields)
+    if len(values) != b_array.size:
+        raise ValueError(f"Expected {len(values) // len(fields)} rows of {fields}, got array of shape {b_array.shape}")
+    # pyffi.object_models.common.Float.set_value only does self._value = float(value) (pyffi 2.2.x, up to the
+    # 2.2.4.dev3 pinned in install/makezip.sh), and tolist already gives python floats, so assign the private
+    # attribute to skip a call per value. read_array relies on the same attribute, revisit both if pyffi changes how
+    # basic types store their value.
+    for value, number in zip(values, b_array.ravel().tolist()):
+        value._value = number
+
+
+def read_array(n_array, fields=VECTOR3, dtype=np.float32):
+    """Copy the basic fields of a pyffi array of structs into a numpy array of shape (len(n_array), len(fields))."""
+    values = _get_values(n_array, fields)
+    return np.array([value._value for value in values], dtype=dtype).reshape(-1, len(fields))
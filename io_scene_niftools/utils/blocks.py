@@ -4,4 +4,104 @@ def safe_decode(b: bytes) -> str:
     try:
         return b.decode()
     except UnicodeDecodeError:
-        return b.decode("shift-jis", errors="surrogateescape")
\ No newline at end of file
+        return b.decode("shift-jis", errors="surrogateescape")
+
+
+class BlockIndex:
+    """Index of all blocks that can be reached from a list of roots, built in a single traversal.
+    Answers the queries that would otherwise each walk the tree: blocks by type or name, parents, controllers and
+    extra data. Blocks are kept in the order Block.tree() yields them. Call update() after changing the tree."""
+
+    def __init__(self, roots=()):
+        self.update(roots)
+
+    def update(self, roots):
+        """(Re)build the index from the given roots."""
+        self.roots = list(roots)
+        self.blocks = []
+        self.by_type = {}
+        self.by_name = {}
+        # keyed by id(block), as blocks need not be hashable
+        self.order = {}
+        self.parents = {}
+        self.controllers = {}
+        self.extras = {}
+
+        stack = [root for root in reversed(self.roots) if root]
+        while stack:
+            n_block = stack.pop()
+            if id(n_block) in self.order:
+                continue
+            self.order[id(n_block)] = len(self.blocks)
+            self.blocks.append(n_block)
+            for block_type in type(n_block).__mro__:
+                self.by_type.setdefault(block_type, []).append(n_block)
+            name = getattr(n_block, "name", None)
+            if name:
+                self.by_name.setdefault(name, []).append(n_block)
+            if hasattr(n_block, "controller"):
+                self.controllers[id(n_block)] = self._get_chain(n_block.controller, "next_controller")
+            if hasattr(n_block, "extra_data"):
+                extras = self._get_chain(n_block.extra_data, "next_extra_data")
+                extras.extend(getattr(n_block, "extra_data_list", ()))
+                # the chain and the list may hold the same blocks
+                self.extras[id(n_block)] = list({id(extra): extra for extra in extras if extra}.values())
+
+            children = [child for child in n_block.get_refs() if child]
+            for child in children:
+                self.parents.setdefault(id(child), []).append(n_block)
+            # push in reverse so children are visited in order
+            stack.extend(reversed(children))
+
+    @staticmethod
+    def _get_chain(n_block, next_attr):
+        chain = []
+        while n_block:
+            chain.append(n_block)
+            n_block = getattr(n_block, next_attr)
+        return chain
+
+    def contains(self, n_block):
+        """Return whether the block is part of the index."""
+        i = self.order.get(id(n_block))
+        return i is not None and self.blocks[i] is n_block
+
+    def get_parents(self, n_block):
+        """Return all blocks that refer to n_block."""
+        return self.parents.get(id(n_block), [])
+
+    def is_in_tree(self, n_block, n_root):
+        """Return whether n_block is n_root or one of its descendants."""
+        stack = [n_block]
+        visited = set()
+        while stack:
+            n_block = stack.pop()
+            if n_block is n_root:
+                return True
+            if id(n_block) not in visited:
+                visited.add(id(n_block))
+                stack.extend(self.get_parents(n_block))
+        return False
+
+    def get_blocks(self, block_type, n_root=None):
+        """Return all blocks of the given type (or tuple of types), optionally only those in n_root's tree."""
+        if isinstance(block_type, tuple):
+            blocks = {id(n_block): n_block for sub_type in block_type for n_block in self.by_type.get(sub_type, ())}
+            blocks = sorted(blocks.values(), key=lambda n_block: self.order[id(n_block)])
+        else:
+            blocks = self.by_type.get(block_type, [])
+        if n_root is not None:
+            blocks = [n_block for n_block in blocks if self.is_in_tree(n_block, n_root)]
+        return blocks
+
+    def get_blocks_by_name(self, name):
+        """Return all blocks with the given name, as bytes."""
+        return self.by_name.get(name, [])
+
+    def get_controllers(self, n_block):
+        """Return the controller chain of a block."""
+        return self.controllers.get(id(n_block), [])
+
+    def get_extras(self, n_block):
+        """Return the extra data chain and list of a block."""
+        return self.extras.get(id(n_block), [])
@@ -70,6 +70,11 @@ NORMAL_RESOLUTION = 100
 LOGGER_PYFFI = "pyffi"
 LOGGER_PLUGIN = "niftools"
 
+# custom properties that store the key of imported data that is shared by identical blocks, and optionally a digest of
+# its content, to tell whether it was edited since
+SHARED_DATA_KEY = "niftools_key"
+SHARED_DATA_DIGEST = "niftools_digest"
+
 
 class EmptyObject:
     pass
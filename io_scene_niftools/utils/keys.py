@@ -0,0 +1,334 @@
+"""Decoding of the transform keys of kf and nif animations into plain numpy arrays, without touching blender, so that
+files can be decoded in worker processes"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from collections import namedtuple
+from functools import singledispatch
+
+import numpy as np
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.utils import arrays
+
+# the keys of one animated node, each key set is a tuple of (times, values) or None
+TransformKeys = namedtuple("TransformKeys", ("rotation_mode", "eulers", "rotations", "translations", "scales",
+                                             "interp_rot", "interp_loc", "interp_scale", "flags"))
+
+# the keys of one kf root: (node name, TransformKeys) per controlled node, and (time, marker name) per text key
+# channels is None if the root type is not supported
+SequenceKeys = namedtuple("SequenceKeys", ("root_type", "name", "channels", "text_keys", "cycle_type"))
+
+
+def interpolate(x_out, x_in, y_in, tangents=None, step=False):
+    """
+    sample (x_in I y_in) at x coordinates x_out
+    segments are linear, or cubic hermite if (forward, backward) tangents are given for each key
+    outside of the keys' range, the first or last value is held
+    """
+    x_out = np.asarray(x_out, dtype=np.float64)
+    x_in = np.asarray(x_in, dtype=np.float64)
+    y_in = np.asarray(y_in, dtype=np.float64)
+    if len(x_in) < 2:
+        return np.full(len(x_out), y_in[0] if len(y_in) else 0.0)
+
+    # index of the segment that contains each sample, and the position inside the segment
+    i = np.clip(np.searchsorted(x_in, x_out, side="right") - 1, 0, len(x_in) - 2)
+    x_1 = x_in[i]
+    dx = x_in[i + 1] - x_1
+    t = np.clip(np.divide(x_out - x_1, dx, out=np.zeros_like(x_out), where=dx > 0), 0.0, 1.0)
+    y_1 = y_in[i]
+    y_2 = y_in[i + 1]
+    if step:
+        return np.where(t < 1.0, y_1, y_2)
+    if tangents is None:
+        return y_1 + t * (y_2 - y_1)
+
+    forward, backward = tangents
+    t2 = t * t
+    t3 = t2 * t
+    return ((2 * t3 - 3 * t2 + 1) * y_1 + (t3 - 2 * t2 + t) * forward[i] +
+            (-2 * t3 + 3 * t2) * y_2 + (t3 - t2) * backward[i + 1])
+
+
+def get_tangents(n_key_group):
+    """
+    get the (forward, backward) tangents of a float key group as arrays, or None if it is not quadratic or TBC
+    """
+    n_keys = n_key_group.keys
+    if n_key_group.interpolation == NifFormat.KeyType.QUADRATIC_KEY:
+        return (np.array([key.forward for key in n_keys], dtype=np.float64),
+                np.array([key.backward for key in n_keys], dtype=np.float64))
+    if n_key_group.interpolation == NifFormat.KeyType.TBC_KEY:
+        # kochanek-bartels tangents, the first and last key only have one neighbour
+        values = np.array([key.value for key in n_keys], dtype=np.float64)
+        tension, bias, continuity = np.array([(key.tbc.t, key.tbc.b, key.tbc.c) for key in n_keys],
+                                             dtype=np.float64).reshape(-1, 3).T
+        delta_in = np.diff(values, prepend=values[:1])
+        delta_out = np.diff(values, append=values[-1:])
+        forward = 0.5 * (1 - tension) * ((1 - continuity) * (1 + bias) * delta_in +
+                                         (1 + continuity) * (1 - bias) * delta_out)
+        backward = 0.5 * (1 - tension) * ((1 + continuity) * (1 + bias) * delta_in +
+                                          (1 - continuity) * (1 - bias) * delta_out)
+        return forward, backward
+    return None
+
+
+def resample(x_out, n_key_group):
+    """
+    sample the float keys of n_key_group at x coordinates x_out, following their interpolation
+    """
+    x_in = [key.time for key in n_key_group.keys]
+    y_in = [key.value for key in n_key_group.keys]
+    step = n_key_group.interpolation == NifFormat.KeyType.CONST_KEY
+    return interpolate(x_out, x_in, y_in, get_tangents(n_key_group), step)
+
+
+def get_interpolation(n_ipol):
+    """Return the blender keyframe interpolation for a nif key type."""
+    if n_ipol in (NifFormat.KeyType.LINEAR_KEY, NifFormat.KeyType.XYZ_ROTATION_KEY):
+        return "LINEAR"
+    elif n_ipol == NifFormat.KeyType.QUADRATIC_KEY:
+        return "BEZIER"
+    elif n_ipol == 0:
+        # guessing, not documented in nif.xml
+        return "CONSTANT"
+    # NifLog.warn(f"Unsupported interpolation mode ({n_ipol}) in nif, using quadratic/bezier.")
+    return "BEZIER"
+
+
+def get_key_arrays(n_keys, fields=None):
+    """Return the times and values of a list of keys as arrays. Values are read from fields for struct keys."""
+    times = np.array([key.time for key in n_keys], dtype=np.float64)
+    if fields:
+        values = arrays.read_array([key.value for key in n_keys], fields).astype(np.float64)
+    else:
+        values = np.array([key.value for key in n_keys], dtype=np.float64)
+    return times, values
+
+
+def get_transform_keys(n_kfc):
+    """
+    Decode the keys of a keyframe controller or interpolator into TransformKeys.
+    n_kfc: some nif struct that has keyframe data, somewhere
+    Returns None for types that are not imported.
+    """
+    rotation_mode = None
+    translations = None
+    scales = None
+    rotations = None
+    eulers = None
+    interp_rot = interp_loc = interp_scale = None
+    n_kfd = None
+
+    # transform controllers (dartgun.nif)
+    if isinstance(n_kfc, NifFormat.NiTransformController):
+        if n_kfc.interpolator:
+            n_kfd = n_kfc.interpolator.data
+    # B-spline curve import
+    elif isinstance(n_kfc, NifFormat.NiBSplineInterpolator):
+        # used by WLP2 (tiger.kf), but only for non-LocRotScale data
+        # eg. bone stretching - see controlledblock.get_variable_1()
+        # do not support this for now, no good representation in Blender
+        if isinstance(n_kfc, NifFormat.NiBSplineCompFloatInterpolator):
+            # pyffi lacks support for this, but the following gets float keys
+            # keys = list(kfc._getCompKeys(kfc.offset, 1, kfc.bias, kfc.multiplier))
+            return None
+        times = np.array(list(n_kfc.get_times()), dtype=np.float64)
+        # just do these temp steps to avoid generating empty fcurves down the line
+        trans_temp = np.array(list(n_kfc.get_translations()), dtype=np.float64)
+        if len(trans_temp):
+            translations = times, trans_temp
+        rot_temp = np.array(list(n_kfc.get_rotations()), dtype=np.float64)
+        if len(rot_temp):
+            rotations = times, rot_temp
+        scale_temp = np.array(list(n_kfc.get_scales()), dtype=np.float64)
+        if len(scale_temp):
+            scales = times, scale_temp
+        # Bsplines are Bezier curves
+        interp_rot = interp_loc = interp_scale = "BEZIER"
+    elif isinstance(n_kfc, NifFormat.NiMultiTargetTransformController):
+        # not sure what this is used for
+        return None
+    else:
+        # ZT2 & Fallout
+        n_kfd = n_kfc.data
+    if isinstance(n_kfd, NifFormat.NiKeyframeData):
+        interp_rot = get_interpolation(n_kfd.rotation_type)
+        interp_loc = get_interpolation(n_kfd.translations.interpolation)
+        interp_scale = get_interpolation(n_kfd.scales.interpolation)
+        if n_kfd.rotation_type == 4:
+            rotation_mode = "XYZ"
+            # uses xyz rotation
+            if n_kfd.xyz_rotations[0].keys:
+                # euler keys need not be sampled at the same time in KFs
+                # but we need complete key sets to do the space conversion
+                # so resample all axes to import all keys properly
+
+                # the unique time stamps we have to sample all curves at
+                times_all = np.unique([key.time for n_key_group in n_kfd.xyz_rotations for key in n_key_group.keys])
+                # the actual resampling, following each axis' interpolation
+                eulers = times_all, np.column_stack([resample(times_all, n_key_group)
+                                                     for n_key_group in n_kfd.xyz_rotations])
+        else:
+            rotation_mode = "QUATERNION"
+            if n_kfd.quaternion_keys:
+                rotations = get_key_arrays(n_kfd.quaternion_keys, arrays.QUATERNION)
+
+        if n_kfd.scales.keys:
+            scales = get_key_arrays(n_kfd.scales.keys)
+
+        if n_kfd.translations.keys:
+            translations = get_key_arrays(n_kfd.translations.keys, arrays.VECTOR3)
+
+    # ZT2 - get extrapolation for every kfc
+    if isinstance(n_kfc, NifFormat.NiKeyframeController):
+        flags = n_kfc.flags
+    # fallout, Loki - we set extrapolation according to the root NiControllerSequence.cycle_type
+    else:
+        flags = None
+    return TransformKeys(rotation_mode, eulers, rotations, translations, scales,
+                         interp_rot, interp_loc, interp_scale, flags)
+
+
+def get_text_keys(txk):
+    """Return the (time, marker name) pairs of a NiTextKeyExtraData."""
+    if not txk:
+        return []
+    return [(key.time, key.value.decode().replace('\r\n', '/').rstrip('/')) for key in txk.text_keys]
+
+
+@singledispatch
+def get_sequence_keys(kf_root):
+    """Decode the keys of all nodes animated by a kf root block."""
+    return SequenceKeys(type(kf_root).__name__, kf_root.name, None, [], None)
+
+
+@get_sequence_keys.register(NifFormat.NiSequenceData)
+def _(kf_root):
+    channels = [(evaluator.node_name, get_transform_keys(evaluator)) for evaluator in kf_root.evaluators]
+    text_keys = get_text_keys(kf_root.find(block_type=NifFormat.NiTextKeyExtraData))
+    return SequenceKeys(type(kf_root).__name__, kf_root.name, channels, text_keys, kf_root.cycle_type)
+
+
+@get_sequence_keys.register(NifFormat.NiSequenceStreamHelper)
+def _(kf_root):
+    channels = []
+    # import parallel trees of extra datas and keyframe controllers
+    extra = kf_root.extra_data
+    controller = kf_root.controller
+    textkeys = None
+    while extra and controller:
+        # textkeys in the stack do not specify node names, import as markers
+        while isinstance(extra, NifFormat.NiTextKeyExtraData):
+            textkeys = extra
+            extra = extra.next_extra_data
+
+        # grabe the node name from string data
+        if isinstance(extra, NifFormat.NiStringExtraData):
+            channels.append((extra.string_data, get_transform_keys(controller)))
+        # grab next pair of extra and controller
+        extra = extra.next_extra_data
+        controller = controller.next_controller
+    # older versions have extrapolation per controller
+    return SequenceKeys(type(kf_root).__name__, kf_root.name, channels, get_text_keys(textkeys), None)
+
+
+@get_sequence_keys.register(NifFormat.NiControllerSequence)
+def _(kf_root):
+    channels = []
+    for controlledblock in kf_root.controlled_blocks:
+        # get bone name
+        # todo [pyffi] fixed get_node_name() is up, make release and clean up here
+        # ZT2 - old way is not supported by pyffi's get_node_name()
+        n_name = controlledblock.target_name
+        # fallout (node_name) & Loki (StringPalette)
+        if not n_name:
+            n_name = controlledblock.get_node_name()
+        # todo - temporarily disabled! should become a custom property on both object and pose bone, ideally
+        # import bone priority
+        # b_target.niftools.priority = controlledblock.priority
+        # fallout, Loki
+        kfc = controlledblock.interpolator
+        if not kfc:
+            # ZT2
+            kfc = controlledblock.controller
+        if kfc:
+            channels.append((n_name, get_transform_keys(kfc)))
+    # fallout: set global extrapolation mode here (older versions have extrapolation per controller)
+    return SequenceKeys(type(kf_root).__name__, kf_root.name, channels, get_text_keys(kf_root.text_keys),
+                        kf_root.cycle_type)
+
+
+def get_key_times(index):
+    """Return the sorted, unique times of all keys in the blocks of a BlockIndex."""
+    key_times = []
+    for kfd in index.get_blocks(NifFormat.NiKeyframeData):
+        key_times.extend(key.time for key in kfd.translations.keys)
+        key_times.extend(key.time for key in kfd.scales.keys)
+        key_times.extend(key.time for key in kfd.quaternion_keys)
+        key_times.extend(key.time for key in kfd.xyz_rotations[0].keys)
+        key_times.extend(key.time for key in kfd.xyz_rotations[1].keys)
+        key_times.extend(key.time for key in kfd.xyz_rotations[2].keys)
+
+    for kfi in index.get_blocks(NifFormat.NiBSplineInterpolator):
+        if not kfi.basis_data:
+            # skip bsplines without basis data (eg bowidle.kf in Oblivion)
+            continue
+        key_times.extend(
+            point * (kfi.stop_time - kfi.start_time)
+            / (kfi.basis_data.num_control_points - 2)
+            for point in range(kfi.basis_data.num_control_points - 2))
+
+    for uv_data in index.get_blocks(NifFormat.NiUVData):
+        for uv_group in uv_data.uv_groups:
+            key_times.extend(key.time for key in uv_group.keys)
+    return sorted(set(key_times))
+
+
+def estimate_fps(key_times, fps):
+    """Return the common frame rate that places key_times closest to whole frames, preferring fps on ties."""
+    lowest_diff = sum(abs(int(time * fps + 0.5) - (time * fps)) for time in key_times)
+
+    # for test_fps in range(1,120): #disabled, used for testing
+    for test_fps in [20, 24, 25, 30, 35]:
+        diff = sum(abs(int(time * test_fps + 0.5) - (time * test_fps)) for time in key_times)
+        if diff < lowest_diff:
+            lowest_diff = diff
+            fps = test_fps
+    return fps
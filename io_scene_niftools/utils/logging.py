@@ -104,6 +104,8 @@ class NifLog:
 class NifError(Exception):
     """A simple custom exception class for export errors."""
     def __init__(self, msg):
+        # keep the message, so errors can be passed on from worker processes
+        super().__init__(msg)
         caller = inspect.getframeinfo(inspect.stack()[1][0])
         NifLog.error(f"{msg:s}")
         NifLog.error(f"{caller.filename:s}:{caller.lineno:d}")
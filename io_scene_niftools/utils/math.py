@@ -36,12 +36,16 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import itertools
+
 import bpy
 from bpy_extras.io_utils import axis_conversion
 import mathutils
+import numpy as np
 from pyffi.formats.nif import NifFormat
 
 from io_scene_niftools.utils.logging import NifLog
+from io_scene_niftools.utils.singleton import NifData
 
 THETA_THRESHOLD_NEGY = 1.0e-9
 THETA_THRESHOLD_NEGY_CLOSE = 1.0e-5
@@ -72,6 +76,106 @@ def import_keymat(rest_rot_inv, key_matrix):
     return correction @ (rest_rot_inv @ key_matrix) @ correction_inv
 
 
+def import_keymats(rest_rot_inv, key_matrices):
+    """Handles space conversions for an (N, 3, 3) array of imported rotation keys, like import_keymat"""
+    correction_3x3 = np.array(correction.to_3x3())
+    rest_rot_inv_3x3 = np.array(rest_rot_inv.to_3x3())
+    return (correction_3x3 @ rest_rot_inv_3x3) @ key_matrices @ np.array(correction_inv.to_3x3())
+
+
+def import_key_translations(rest_rot_inv, rest_trans, translations):
+    """Handles space conversions for an (N, 3) array of imported translation keys, like import_keymat"""
+    rot = np.array(correction.to_3x3()) @ np.array(rest_rot_inv.to_3x3())
+    return (np.asarray(translations) - np.array(rest_trans)) @ rot.T
+
+
+def quaternions_to_matrices(quaternions):
+    """Convert an (N, 4) array of w, x, y, z quaternions to an (N, 3, 3) array of rotation matrices"""
+    w, x, y, z = np.asarray(quaternions, dtype=np.float64).T
+    matrices = np.empty((len(w), 3, 3))
+    matrices[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[:, 0, 1] = 2 * (x * y - w * z)
+    matrices[:, 0, 2] = 2 * (x * z + w * y)
+    matrices[:, 1, 0] = 2 * (x * y + w * z)
+    matrices[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[:, 1, 2] = 2 * (y * z - w * x)
+    matrices[:, 2, 0] = 2 * (x * z - w * y)
+    matrices[:, 2, 1] = 2 * (y * z + w * x)
+    matrices[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return matrices
+
+
+def matrices_to_quaternions(matrices):
+    """Convert an (N, 3, 3) array of rotation matrices to an (N, 4) array of w, x, y, z quaternions.
+    Follows the same branches as Matrix.to_quaternion(), so the signs of the results agree."""
+    m = np.asarray(matrices, dtype=np.float64)
+    quaternions = np.empty((len(m), 4))
+    trace = 0.25 * (1 + m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2])
+
+    # the usual case
+    sel = trace > 1e-4
+    s = np.sqrt(trace[sel])
+    quaternions[sel, 0] = s
+    s = 1 / (4 * s)
+    quaternions[sel, 1] = (m[sel, 2, 1] - m[sel, 1, 2]) * s
+    quaternions[sel, 2] = (m[sel, 0, 2] - m[sel, 2, 0]) * s
+    quaternions[sel, 3] = (m[sel, 1, 0] - m[sel, 0, 1]) * s
+
+    # near 180 degrees, pivot on the largest diagonal element
+    rest = ~sel
+    sel_x = rest & (m[:, 0, 0] > m[:, 1, 1]) & (m[:, 0, 0] > m[:, 2, 2])
+    sel_y = rest & ~sel_x & (m[:, 1, 1] > m[:, 2, 2])
+    sel_z = rest & ~sel_x & ~sel_y
+    for sel, (i, j, k) in ((sel_x, (0, 1, 2)), (sel_y, (1, 2, 0)), (sel_z, (2, 0, 1))):
+        s = 2 * np.sqrt(1 + m[sel, i, i] - m[sel, j, j] - m[sel, k, k])
+        quaternions[sel, 1 + i] = 0.25 * s
+        s = 1 / s
+        quaternions[sel, 0] = (m[sel, k, j] - m[sel, j, k]) * s
+        quaternions[sel, 1 + j] = (m[sel, j, i] + m[sel, i, j]) * s
+        quaternions[sel, 1 + k] = (m[sel, k, i] + m[sel, i, k]) * s
+
+    return quaternions / np.linalg.norm(quaternions, axis=1, keepdims=True)
+
+
+def eulers_to_matrices(eulers):
+    """Convert an (N, 3) array of XYZ euler angles to an (N, 3, 3) array of rotation matrices"""
+    x, y, z = np.asarray(eulers, dtype=np.float64).T
+    ci, cj, ch = np.cos(x), np.cos(y), np.cos(z)
+    si, sj, sh = np.sin(x), np.sin(y), np.sin(z)
+    cc, cs, sc, ss = ci * ch, ci * sh, si * ch, si * sh
+    matrices = np.empty((len(x), 3, 3))
+    matrices[:, 0, 0] = cj * ch
+    matrices[:, 0, 1] = sj * sc - cs
+    matrices[:, 0, 2] = sj * cc + ss
+    matrices[:, 1, 0] = cj * sh
+    matrices[:, 1, 1] = sj * ss + cc
+    matrices[:, 1, 2] = sj * cs - sc
+    matrices[:, 2, 0] = -sj
+    matrices[:, 2, 1] = cj * si
+    matrices[:, 2, 2] = cj * ci
+    return matrices
+
+
+def matrices_to_eulers(matrices):
+    """Convert an (N, 3, 3) array of rotation matrices to an (N, 3) array of XYZ euler angles.
+    Like Matrix.to_euler(), picks the solution with the smallest angles."""
+    m = np.asarray(matrices, dtype=np.float64)
+    cy = np.hypot(m[:, 0, 0], m[:, 1, 0])
+    eul1 = np.stack((np.arctan2(m[:, 2, 1], m[:, 2, 2]),
+                     np.arctan2(-m[:, 2, 0], cy),
+                     np.arctan2(m[:, 1, 0], m[:, 0, 0])), axis=1)
+    eul2 = np.stack((np.arctan2(-m[:, 2, 1], -m[:, 2, 2]),
+                     np.arctan2(-m[:, 2, 0], -cy),
+                     np.arctan2(-m[:, 1, 0], -m[:, 0, 0])), axis=1)
+    # gimbal lock
+    locked = cy <= 16 * np.finfo(np.float32).eps
+    eul1[locked, 0] = np.arctan2(-m[locked, 1, 2], m[locked, 1, 1])
+    eul1[locked, 2] = 0
+    eul2[locked] = eul1[locked]
+    use_eul2 = np.abs(eul1).sum(axis=1) > np.abs(eul2).sum(axis=1)
+    return np.where(use_eul2[:, None], eul2, eul1)
+
+
 def export_keymat(rest_rot, key_matrix, bone):
     """Handles space conversions for exported keys """
     if bone:
@@ -190,34 +294,36 @@ def find_property(n_block, property_type):
 
 def find_controller(n_block, controller_type):
     """Find a controller."""
-    ctrl = n_block.controller
-    while ctrl:
+    if NifData.index and NifData.index.contains(n_block):
+        controllers = NifData.index.get_controllers(n_block)
+    else:
+        controllers = _iter_chain(n_block.controller, "next_controller")
+    for ctrl in controllers:
         if isinstance(ctrl, controller_type):
             if ctrl.data or ctrl.interpolator:
                 return ctrl
-        ctrl = ctrl.next_controller
 
 
 def find_extra(n_block, extratype):
-    # TODO: 3.0 - Optimise
-
     """Find extra data."""
-    # pre-10.x.x.x system: extra data chain
-    extra = n_block.extra_data
-    while extra:
-        if isinstance(extra, extratype):
-            break
-        extra = extra.next_extra_data
-    if extra:
-        return extra
-
-    # post-10.x.x.x system: extra data list
-    for extra in n_block.extra_data_list:
+    if NifData.index and NifData.index.contains(n_block):
+        extras = NifData.index.get_extras(n_block)
+    else:
+        # pre-10.x.x.x system: extra data chain
+        # post-10.x.x.x system: extra data list
+        extras = itertools.chain(_iter_chain(n_block.extra_data, "next_extra_data"), n_block.extra_data_list)
+    for extra in extras:
         if isinstance(extra, extratype):
             return extra
     return None
 
 
+def _iter_chain(n_block, next_attr):
+    while n_block:
+        yield n_block
+        n_block = getattr(n_block, next_attr)
+
+
 def set_object_matrix(b_obj, block):
     """Set a blender object's transform matrix to a NIF object's transformation matrix in rest pose."""
     block.set_transform(get_object_matrix(b_obj))
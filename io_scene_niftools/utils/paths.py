@@ -0,0 +1,152 @@
+"""Case insensitive file lookups from cached directory listings, to find files such as textures without probing the
+file system for every spelling of their name."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2021, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import json
+import os
+from collections import OrderedDict
+
+
+class DirectoryCache:
+    """Lower case listings of the directories that were searched, checked against their modification time once per
+    refresh and optionally kept in a json file between sessions. Only the directories along the searched paths are
+    listed, so searching the folder of a nif does not scan everything below it. At most max_listings listings are kept,
+    dropping the least recently used ones."""
+
+    def __init__(self, cache_path=None, max_listings=256):
+        self.cache_path = cache_path
+        self.max_listings = max_listings
+        # directory -> [modification time, names, {lower case name or name: name}], least recently used first
+        # names and lookup are None for missing directories
+        self.listings = OrderedDict()
+        # directories whose modification time was checked since the last refresh
+        self.checked = set()
+        self.changed = False
+        self.load()
+
+    @staticmethod
+    def get_lookup(names):
+        """Map each name and its lower case version to the name, exact names win if several names only differ in
+        case."""
+        lookup = {name.lower(): name for name in names}
+        lookup.update((name, name) for name in names)
+        return lookup
+
+    def load(self):
+        """Read the listings from the cache file, if there is one."""
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as stream:
+                # the file only stores the names, as a list of [directory, modification time, names]
+                for directory, mtime, names in json.load(stream):
+                    self.listings[directory] = [mtime, names, self.get_lookup(names)]
+        except (OSError, ValueError, TypeError):
+            # a broken or outdated cache is simply rebuilt
+            self.listings.clear()
+
+    def save(self):
+        """Write the listings of existing directories to the cache file if they changed. Return whether the file was
+        written."""
+        if not self.cache_path or not self.changed:
+            return False
+        entries = [[directory, mtime, names] for directory, (mtime, names, lookup) in self.listings.items()
+                   if names is not None]
+        temp_path = self.cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or os.curdir, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as stream:
+                json.dump(entries[-self.max_listings:], stream)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            return False
+        self.changed = False
+        return True
+
+    def refresh(self):
+        """Check the modification time of each directory again when it is next used."""
+        self.checked.clear()
+
+    def get_listing(self, directory):
+        """Return the listing of directory as a mapping of each name and its lower case version to the name, or None if
+        it is not a readable directory."""
+        directory = os.path.normpath(directory or os.curdir)
+        if directory not in self.checked:
+            self.checked.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime = None
+            listing = self.listings.get(directory)
+            if listing is None or listing[0] != mtime:
+                try:
+                    names = sorted(os.listdir(directory))
+                    listing = [mtime, names, self.get_lookup(names)]
+                except OSError:
+                    # missing or not a directory
+                    listing = [mtime, None, None]
+                self.listings[directory] = listing
+                self.changed = True
+        self.listings.move_to_end(directory)
+        while len(self.listings) > self.max_listings:
+            evicted, _ = self.listings.popitem(last=False)
+            self.checked.discard(evicted)
+        return self.listings[directory][2]
+
+    def find(self, directory, rel_path):
+        """Return the path of rel_path below directory, matching each part of rel_path case insensitively,
+        or None if there is no such file or folder."""
+        path = os.path.normpath(directory or os.curdir)
+        if os.path.isabs(rel_path):
+            drive, rel_path = os.path.splitdrive(rel_path)
+            path = drive + os.sep
+        for part in rel_path.replace("\\", "/").split("/"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                path = os.path.dirname(path)
+                continue
+            listing = self.get_listing(path)
+            if listing is None:
+                return None
+            name = listing.get(part) or listing.get(part.lower())
+            if name is None:
+                return None
+            path = os.path.join(path, name)
+        return path
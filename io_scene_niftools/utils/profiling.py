@@ -0,0 +1,191 @@
+"""Nested timing of the phases of an import or export, with optional Chrome trace and cProfile output"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from io_scene_niftools.utils.logging import NifLog
+
+# environment variables that turn on profiling for every import and export, e.g. for batch runs
+ENV_TIMINGS = "NIFTOOLS_TIMINGS"
+ENV_TRACE = "NIFTOOLS_TRACE"
+ENV_PROFILE = "NIFTOOLS_PROFILE"
+
+# returned by phase() when timing is off, so that disabled timers cost a single check
+_NO_PHASE = nullcontext()
+
+
+class NifProfiler:
+    """Collects the time spent in nested phases of a single import or export. A session is started by the operator,
+    phases are timed with::
+
+        with NifProfiler.phase("armature"):
+            ...
+
+    Each phase is keyed by its path of enclosing phases, and counts its calls, its total time and the time spent in its
+    own body. At the end of the session a summary table is logged, and optionally the phases are written as a Chrome
+    trace (chrome://tracing, Perfetto) and the whole session is dumped by cProfile."""
+
+    enabled = False
+    # path of phase names -> [calls, total seconds, seconds in child phases]
+    stats = {}
+    # named counters, such as the number of blocks that were read
+    counters = {}
+    stack = []
+    events = []
+    origin = 0.0
+
+    @staticmethod
+    def get_settings(timings=False, trace_path="", profile_path=""):
+        """Return (timings, trace_path, profile_path), filling unset options from the environment."""
+        trace_path = trace_path or os.environ.get(ENV_TRACE, "")
+        profile_path = profile_path or os.environ.get(ENV_PROFILE, "")
+        timings = timings or os.environ.get(ENV_TIMINGS, "0") not in ("", "0") or bool(trace_path)
+        return timings, trace_path, profile_path
+
+    @staticmethod
+    @contextmanager
+    def session(name, timings=False, trace_path="", profile_path=""):
+        """Time an import or export as the outermost phase. Nested sessions are timed as ordinary phases."""
+        timings, trace_path, profile_path = NifProfiler.get_settings(timings, trace_path, profile_path)
+        if NifProfiler.stack or not (timings or profile_path):
+            with NifProfiler.phase(name):
+                yield
+            return
+
+        NifProfiler.enabled = timings
+        NifProfiler.stats = {}
+        NifProfiler.counters = {}
+        NifProfiler.events = []
+        NifProfiler.origin = time.perf_counter()
+        profiler = cProfile.Profile() if profile_path else None
+        try:
+            if profiler:
+                profiler.enable()
+            with NifProfiler.phase(name):
+                yield
+        finally:
+            if profiler:
+                profiler.disable()
+            NifProfiler.enabled = False
+            NifProfiler.stack = []
+            if timings:
+                NifLog.info(NifProfiler.get_summary())
+            if trace_path:
+                NifProfiler.write_trace(trace_path)
+            if profiler:
+                NifLog.info(f"Writing profile to {profile_path}")
+                profiler.dump_stats(profile_path)
+
+    @staticmethod
+    def phase(name, detail=None):
+        """Return a context manager that times its body as a phase nested in the current one. The detail, such as an
+        object name, only shows up in the trace, so that repeated phases are summed up in the table."""
+        if not NifProfiler.enabled:
+            return _NO_PHASE
+        return NifProfiler._time_phase(name, detail)
+
+    @staticmethod
+    @contextmanager
+    def _time_phase(name, detail):
+        stack = NifProfiler.stack
+        path = (stack[-1][0] if stack else ()) + (name,)
+        # entered before the phase runs, so that parents are ordered before their children
+        NifProfiler.stats.setdefault(path, [0, 0.0, 0.0])
+        start = time.perf_counter()
+        # the second item accumulates the time spent in child phases
+        stack.append([path, 0.0])
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            _, child_time = stack.pop()
+            if stack:
+                stack[-1][1] += duration
+            stat = NifProfiler.stats[path]
+            stat[0] += 1
+            stat[1] += duration
+            stat[2] += child_time
+            event = {"name": name, "cat": "niftools", "ph": "X",
+                     "ts": (start - NifProfiler.origin) * 1e6, "dur": duration * 1e6,
+                     "pid": os.getpid(), "tid": threading.get_ident()}
+            if detail is not None:
+                event["args"] = {"detail": str(detail)}
+            NifProfiler.events.append(event)
+
+    @staticmethod
+    def count(name, amount=1):
+        """Add amount to a named counter of the current session."""
+        if NifProfiler.enabled:
+            NifProfiler.counters[name] = NifProfiler.counters.get(name, 0) + amount
+
+    @staticmethod
+    def get_summary():
+        """Return the table of phases, each indented below its parent, followed by the counters."""
+        if not NifProfiler.stats:
+            return "No phases were timed"
+        session_time = sum(total for path, (calls, total, child_time) in NifProfiler.stats.items() if len(path) == 1)
+        width = max(len(path[-1]) + 2 * len(path) for path in NifProfiler.stats)
+        lines = [f"{'Phase':<{width}} {'Calls':>7} {'Total ms':>10} {'Self ms':>10} {'%':>6}"]
+        # phases are stored in order of their first call, list each one directly below its parent in that order
+        order = {path: i for i, path in enumerate(NifProfiler.stats)}
+        for path in sorted(NifProfiler.stats, key=lambda path: [order[path[:i]] for i in range(1, len(path) + 1)]):
+            calls, total, child_time = NifProfiler.stats[path]
+            label = "  " * (len(path) - 1) + path[-1]
+            percent = 100 * total / session_time if session_time else 0.0
+            lines.append(f"{label:<{width}} {calls:>7d} {total * 1e3:>10.1f} {(total - child_time) * 1e3:>10.1f} "
+                         f"{percent:>6.1f}")
+        for name, amount in NifProfiler.counters.items():
+            lines.append(f"{name}: {amount}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def write_trace(trace_path):
+        """Write the timed phases in the Chrome trace event format."""
+        NifLog.info(f"Writing trace to {trace_path}")
+        events = sorted(NifProfiler.events, key=lambda event: event["ts"])
+        if NifProfiler.counters:
+            events.append({"name": "counters", "cat": "niftools", "ph": "C", "ts": 0,
+                           "pid": os.getpid(), "args": dict(NifProfiler.counters)})
+        with open(trace_path, "w") as stream:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, stream)
@@ -0,0 +1,93 @@
+"""Registry of imported datablocks that are shared by identical blocks, keyed by their content."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+
+import bpy
+
+from io_scene_niftools.utils.consts import SHARED_DATA_KEY, SHARED_DATA_DIGEST
+
+
+def get_folder_key(file_path):
+    """Return the part of a shared data key for the folder of file_path. Texture paths are resolved against the folder
+    of the nif, so data is only shared within a folder."""
+    return os.path.normcase(os.path.dirname(os.path.abspath(file_path)))
+
+
+class SharedData:
+    """Names of the imported datablocks of a bpy.data collection by key, also across imports. Filled from the keys
+    stored on the datablocks of the blend file at the first lookup after clear, so names of datablocks that were since
+    removed or replaced are never trusted."""
+
+    def __init__(self, collection, get_digest=None):
+        # name of the bpy.data collection, looked up every time as bpy.data is replaced when a file is loaded
+        self.collection = collection
+        # optional function that returns a digest of the content of a datablock, to tell whether it was edited
+        self.get_digest = get_digest
+        self.names = None
+
+    def get_collection(self):
+        return getattr(bpy.data, self.collection)
+
+    def clear(self):
+        """Forget the names, to be gathered again from the blend file at the next lookup."""
+        self.names = None
+
+    def add(self, key, b_id):
+        """Store the key on the datablock, so later lookups can check that a datablock of that name is still this one."""
+        b_id[SHARED_DATA_KEY] = key
+        if self.get_digest:
+            b_id[SHARED_DATA_DIGEST] = self.get_digest(b_id)
+        if self.names is not None:
+            self.names[key] = b_id.name
+
+    def get(self, key):
+        """Return the datablock that was imported for key, if it still exists and was not edited since."""
+        if key is None:
+            return None
+        if self.names is None:
+            self.names = {b_id[SHARED_DATA_KEY]: b_id.name for b_id in self.get_collection() if SHARED_DATA_KEY in b_id}
+        if key not in self.names:
+            return None
+        b_id = self.get_collection().get(self.names[key])
+        if (b_id and b_id.get(SHARED_DATA_KEY) == key and
+                (not self.get_digest or b_id.get(SHARED_DATA_DIGEST) == self.get_digest(b_id))):
+            return b_id
+        del self.names[key]
+        return None
@@ -37,6 +37,7 @@
 #
 # ***** END LICENSE BLOCK *****
 
+from io_scene_niftools.utils.blocks import BlockIndex
 from io_scene_niftools.utils.logging import NifLog
 
 
@@ -64,6 +65,7 @@ class NifOp:
 class NifData:
 
     data = None
+    index = None
 
     def __init__(self):
         pass
@@ -71,18 +73,7 @@ class NifData:
     @staticmethod
     def init(data):
         NifData.data = data
-
-
-class KFData:
-
-    data = None
-
-    def __init__(self):
-        pass
-
-    @staticmethod
-    def init(data):
-        KFData.data = data
+        NifData.index = BlockIndex(data.roots)
 
 
 class EGMData:
@@ -0,0 +1,111 @@
+"""Module for unit testing the cache of parsed files"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import io
+import os
+import shutil
+import tempfile
+
+import nose
+
+from io_scene_niftools.file_io.cache import DataCopier, FileCache, ENV_FILE_CACHE, DEFAULT_MAX_FILES
+from io_scene_niftools.file_io.nif import NifFile
+
+
+class TestFileCache:
+
+    @classmethod
+    def setup_class(cls):
+        cls.nif_path = os.path.join(os.path.dirname(__file__), "nif", "readable.nif")
+
+    def setup(self):
+        self.file_cache = FileCache(max_files=1)
+        self.reads = 0
+
+    def read(self, file_path):
+        self.reads += 1
+        return NifFile.read_nif(file_path)
+
+    @staticmethod
+    def to_bytes(data):
+        stream = io.BytesIO()
+        data.write(stream)
+        return stream.getvalue()
+
+    def test_load_once(self):
+        first = self.file_cache.load(self.nif_path, self.read, DataCopier.copy_nif)
+        second = self.file_cache.load(self.nif_path, self.read, DataCopier.copy_nif)
+        nose.tools.assert_equal(self.reads, 1)
+        nose.tools.assert_equal(self.to_bytes(first), self.to_bytes(second))
+
+    def test_copies_are_independent(self):
+        first = self.file_cache.load(self.nif_path, self.read, DataCopier.copy_nif)
+        first.roots[0].scale = 10.0
+        second = self.file_cache.load(self.nif_path, self.read, DataCopier.copy_nif)
+        nose.tools.assert_equal(second.roots[0].scale, 1.0)
+        nose.tools.assert_not_equal(set(map(id, first.blocks)), set(map(id, second.blocks)))
+
+    def test_changed_file_is_read_again(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            nif_path = shutil.copy(self.nif_path, temp_dir)
+            self.file_cache.load(nif_path, self.read, DataCopier.copy_nif)
+            stat = os.stat(nif_path)
+            os.utime(nif_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+            self.file_cache.load(nif_path, self.read, DataCopier.copy_nif)
+            nose.tools.assert_equal(self.reads, 2)
+            nose.tools.assert_equal(len(self.file_cache.files), 1)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_disabled(self):
+        self.file_cache.resize(0)
+        first = self.file_cache.load(self.nif_path, self.read, DataCopier.copy_nif)
+        second = self.file_cache.load(self.nif_path, self.read, DataCopier.copy_nif)
+        nose.tools.assert_equal(self.reads, 2)
+        nose.tools.assert_equal(len(self.file_cache.files), 0)
+        nose.tools.assert_not_equal(id(first), id(second))
+
+    def test_size_from_environment(self):
+        os.environ[ENV_FILE_CACHE] = "0"
+        try:
+            nose.tools.assert_equal(FileCache().max_files, 0)
+        finally:
+            del os.environ[ENV_FILE_CACHE]
+        nose.tools.assert_equal(FileCache().max_files, DEFAULT_MAX_FILES)
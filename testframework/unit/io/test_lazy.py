@@ -0,0 +1,101 @@
+"""Module for unit testing the partial reading of nifs"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import tempfile
+
+import nose
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.file_io.lazy import LazyNifReader
+from io_scene_niftools.file_io.nif import NifFile
+
+
+class TestLazyNifReader:
+
+    @classmethod
+    def setup_class(cls):
+        cls.working_dir = os.path.dirname(__file__)
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.nif_path = os.path.join(cls.temp_dir, "skinned.nif")
+
+        n_root = NifFormat.NiNode()
+        n_root.name = b"Scene Root"
+        n_bone = NifFormat.NiNode()
+        n_bone.name = b"Bip01"
+        n_root.add_child(n_bone)
+        for skinned in (False, True):
+            n_geom = NifFormat.NiTriShape()
+            n_geom.data = NifFormat.NiTriShapeData()
+            n_geom.add_property(NifFormat.NiMaterialProperty())
+            if skinned:
+                n_geom.skin_instance = NifFormat.NiSkinInstance()
+                n_geom.skin_instance.skeleton_root = n_root
+                n_geom.skin_instance.data = NifFormat.NiSkinData()
+            n_root.add_child(n_geom)
+
+        data = NifFormat.Data(version=0x14020007, user_version=11)
+        data.roots = [n_root]
+        with open(cls.nif_path, "wb") as stream:
+            data.write(stream)
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.temp_dir)
+
+    def test_read_all(self):
+        with LazyNifReader(self.nif_path) as reader:
+            data = reader.read()
+        nose.tools.assert_equal(len(data.blocks), NifFile.read_nif(self.nif_path).header.num_blocks)
+
+    def test_read_skeleton(self):
+        data = NifFile.read_skeleton(self.nif_path)
+        n_root = data.roots[0]
+        n_bone, n_unskinned, n_skinned = n_root.children
+        nose.tools.assert_equal(n_bone.name, b"Bip01")
+        nose.tools.assert_is_none(n_unskinned.data)
+        nose.tools.assert_is_not_none(n_skinned.data)
+        nose.tools.assert_is(n_skinned.skin_instance.skeleton_root, n_root)
+        nose.tools.assert_false(any(isinstance(n_block, NifFormat.NiProperty) for n_block in data.blocks))
+
+    def test_read_skeleton_without_block_sizes(self):
+        nif_path = os.path.join(self.working_dir, "nif", "readable.nif")
+        data = NifFile.read_skeleton(nif_path)
+        nose.tools.assert_equal(len(data.blocks), len(NifFile.read_nif(nif_path).blocks))
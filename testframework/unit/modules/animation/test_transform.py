@@ -0,0 +1,115 @@
+"""Unit tests for resampling euler rotation keys"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import nose
+import numpy as np
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.utils.keys import interpolate, get_tangents, resample
+
+
+def build_key_group(interpolation, times, values, tangents=None, tbcs=None):
+    n_key_group = NifFormat.KeyGroup(template=NifFormat.float)
+    n_key_group.num_keys = len(times)
+    n_key_group.interpolation = interpolation
+    n_key_group.keys.update_size()
+    for i, (key, time, value) in enumerate(zip(n_key_group.keys, times, values)):
+        key.time = time
+        key.value = value
+        if tangents:
+            key.forward, key.backward = tangents[i]
+        if tbcs:
+            key.tbc.t, key.tbc.b, key.tbc.c = tbcs[i]
+    return n_key_group
+
+
+class TestInterpolate:
+
+    def test_linear(self):
+        result = interpolate([0.0, 0.5, 1.0, 1.5, 3.0], [0.0, 1.0, 2.0], [0.0, 2.0, 0.0])
+        np.testing.assert_allclose(result, [0.0, 1.0, 2.0, 1.0, 0.0])
+
+    def test_hold_outside(self):
+        result = interpolate([-1.0, 5.0], [0.0, 1.0], [1.0, 3.0])
+        np.testing.assert_allclose(result, [1.0, 3.0])
+
+    def test_single_key(self):
+        np.testing.assert_allclose(interpolate([0.0, 1.0], [0.5], [2.0]), [2.0, 2.0])
+
+    def test_hermite(self):
+        # tangents of a straight line reproduce the line
+        tangents = np.array([1.0, 1.0]), np.array([1.0, 1.0])
+        result = interpolate([0.0, 0.25, 0.5, 1.0], [0.0, 1.0], [0.0, 1.0], tangents)
+        np.testing.assert_allclose(result, [0.0, 0.25, 0.5, 1.0])
+        # zero tangents ease in and out
+        tangents = np.array([0.0, 0.0]), np.array([0.0, 0.0])
+        result = interpolate([0.25, 0.5], [0.0, 1.0], [0.0, 1.0], tangents)
+        np.testing.assert_allclose(result, [0.15625, 0.5])
+
+    def test_step(self):
+        result = interpolate([0.0, 0.5, 1.0], [0.0, 1.0], [0.0, 1.0], step=True)
+        np.testing.assert_allclose(result, [0.0, 0.0, 1.0])
+
+
+class TestKeyGroups:
+
+    def test_quadratic_tangents(self):
+        n_key_group = build_key_group(NifFormat.KeyType.QUADRATIC_KEY, [0.0, 1.0], [0.0, 1.0],
+                                      tangents=[(0.5, 0.25), (0.75, 1.0)])
+        forward, backward = get_tangents(n_key_group)
+        np.testing.assert_allclose(forward, [0.5, 0.75])
+        np.testing.assert_allclose(backward, [0.25, 1.0])
+
+    def test_tbc_tangents(self):
+        # zero tension, bias and continuity gives catmull-rom tangents
+        n_key_group = build_key_group(NifFormat.KeyType.TBC_KEY, [0.0, 1.0, 2.0], [0.0, 1.0, 4.0],
+                                      tbcs=[(0.0, 0.0, 0.0)] * 3)
+        forward, backward = get_tangents(n_key_group)
+        np.testing.assert_allclose(forward, [0.5, 2.0, 1.5])
+        np.testing.assert_allclose(backward, forward)
+
+    def test_linear_has_no_tangents(self):
+        n_key_group = build_key_group(NifFormat.KeyType.LINEAR_KEY, [0.0, 1.0], [0.0, 1.0])
+        nose.tools.assert_is_none(get_tangents(n_key_group))
+
+    def test_resample_passes_keys(self):
+        n_key_group = build_key_group(NifFormat.KeyType.QUADRATIC_KEY, [0.0, 1.0, 3.0], [0.0, 2.0, -1.0],
+                                      tangents=[(1.0, 1.0), (0.0, 0.0), (-1.0, -1.0)])
+        np.testing.assert_allclose(resample([0.0, 1.0, 3.0], n_key_group), [0.0, 2.0, -1.0])
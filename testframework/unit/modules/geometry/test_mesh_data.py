@@ -0,0 +1,61 @@
+"""Tests for the geometry data keys that let identical meshes share a data block on export."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import nose
+import numpy as np
+
+from io_scene_niftools.modules.nif_export.geometry.mesh import Mesh
+
+
+class TestDataKey:
+
+    def setup(self):
+        self.vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float32)
+        self.triangles = np.array([[0, 1, 2]], dtype=np.int32)
+
+    def test_identical(self):
+        key = Mesh.get_data_key("NiTriShape", (0, 'OBLIVION'), self.vertices, self.triangles, None)
+        nose.tools.assert_equal(key, Mesh.get_data_key("NiTriShape", (0, 'OBLIVION'), self.vertices.copy(), self.triangles.copy(), None))
+
+    def test_different(self):
+        key = Mesh.get_data_key("NiTriShape", (0, 'OBLIVION'), self.vertices, self.triangles, None)
+        flipped = self.triangles[:, (0, 2, 1)]
+        nose.tools.assert_not_equal(key, Mesh.get_data_key("NiTriShape", (0, 'OBLIVION'), self.vertices, flipped, None))
+        nose.tools.assert_not_equal(key, Mesh.get_data_key("NiTriStrips", (0, 'OBLIVION'), self.vertices, self.triangles, None))
+        nose.tools.assert_not_equal(key, Mesh.get_data_key("NiTriShape", (0, 'OBLIVION'), self.vertices, self.triangles, self.vertices))
@@ -0,0 +1,71 @@
+"""Module for unit testing the meshes that imports share"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import bpy
+import nose
+import numpy as np
+
+from io_scene_niftools.modules.nif_import.geometry.mesh import Mesh
+
+
+class TestSharedMesh:
+
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]], dtype=np.float32)
+    triangles = np.array([[0, 1, 2], [2, 1, 3]], dtype=np.int32)
+
+    def setup(self):
+        Mesh.shared_meshes.clear()
+        self.b_meshes = [self.new_mesh("Box01")]
+        Mesh.shared_meshes.add("key", self.b_meshes[0])
+
+    def teardown(self):
+        for b_mesh in self.b_meshes:
+            if b_mesh.name in bpy.data.meshes:
+                bpy.data.meshes.remove(b_mesh)
+        Mesh.shared_meshes.clear()
+
+    def new_mesh(self, name):
+        b_mesh = bpy.data.meshes.new(name)
+        Mesh.build_mesh(b_mesh, self.vertices, self.triangles)
+        return b_mesh
+
+    def test_edited(self):
+        nose.tools.assert_equal(Mesh.shared_meshes.get("key"), self.b_meshes[0])
+        self.b_meshes[0].vertices[0].co = (0.5, 0.5, 0.5)
+        nose.tools.assert_is_none(Mesh.shared_meshes.get("key"))
@@ -0,0 +1,207 @@
+"""Unit tests and benchmark for the skin partitioner"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import math
+import random
+import time
+
+import nose
+
+from io_scene_niftools.modules.nif_export.geometry.mesh.skin_partition import create_partitions
+
+
+def build_skin(size, num_bones, num_parts=1, seed=0):
+    """Build a synthetic skin: a grid of size x size vertices, split into triangles, with bones spread over the grid.
+    Every vertex is weighted to its (up to) four closest bones, and every triangle gets a body part by grid row.
+
+    :return: triangles, trianglepartmap, weights, in the format used by update_skin_partition
+    """
+    rng = random.Random(seed)
+    bone_centers = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(num_bones)]
+    weights = []
+    for y in range(size):
+        for x in range(size):
+            distances = sorted((math.hypot(x - bx, y - by), bonenum) for bonenum, (bx, by) in enumerate(bone_centers))
+            closest = distances[:rng.randint(1, 4)]
+            inv = [1.0 / (distance + 1.0) for distance, bonenum in closest]
+            weights.append([[bonenum, w / sum(inv)] for (distance, bonenum), w in zip(closest, inv)])
+    triangles = []
+    trianglepartmap = []
+    for y in range(size - 1):
+        for x in range(size - 1):
+            v = y * size + x
+            part = y * num_parts // (size - 1)
+            triangles.extend(((v, v + 1, v + size), (v + 1, v + size + 1, v + size)))
+            trianglepartmap.extend((part, part))
+    return triangles, trianglepartmap, weights
+
+def create_partitions_legacy(triangles, trianglepartmap, weights, maxbonesperpartition):
+    """Split triangles into partitions by rescanning all remaining triangles for every partition.
+    This is the original algorithm, kept as reference for create_partitions in the equivalence test and benchmark."""
+    parts = []
+    # keep creating partitions as long as there are triangles left
+    while triangles:
+        # create a partition
+        part = [set(), [], None] # bones, triangles, partition index
+        usedverts = set()
+        addtriangles = True
+        # keep adding triangles to it as long as the flag is set
+        while addtriangles:
+            # newtriangles is a list of triangles that have not been added to
+            # the partition, similar for newtrianglepartmap
+            newtriangles = []
+            newtrianglepartmap = []
+            for tri, partindex in zip(triangles, trianglepartmap):
+                # find the bones influencing this triangle
+                tribones = []
+                for t in tri:
+                    tribones.extend([
+                        bonenum for bonenum, boneweight in weights[t]])
+                tribones = set(tribones)
+                # if part has no bones,
+                # or if part has all bones of tribones and index coincides
+                # then add this triangle to this part
+                if ((not part[0])
+                    or ((part[0] >= tribones) and (part[2] == partindex))):
+                    part[0] |= tribones
+                    part[1].append(tri)
+                    usedverts |= set(tri)
+                    # if part was empty, assign it the index
+                    if part[2] is None:
+                        part[2] = partindex
+                else:
+                    newtriangles.append(tri)
+                    newtrianglepartmap.append(partindex)
+            triangles = newtriangles
+            trianglepartmap = newtrianglepartmap
+
+            # if we have room left in the partition
+            # then add adjacent triangles
+            addtriangles = False
+            newtriangles = []
+            newtrianglepartmap = []
+            if len(part[0]) < maxbonesperpartition:
+                for tri, partindex in zip(triangles, trianglepartmap):
+                    # if triangle is adjacent, and has same index
+                    # then check if it can be added to the partition
+                    if (usedverts & set(tri)) and (part[2] == partindex):
+                        # find the bones influencing this triangle
+                        tribones = []
+                        for t in tri:
+                            tribones.extend([
+                                bonenum for bonenum, boneweight in weights[t]])
+                        tribones = set(tribones)
+                        # and check if we exceed the maximum number of allowed
+                        # bones
+                        if len(part[0] | tribones) <= maxbonesperpartition:
+                            part[0] |= tribones
+                            part[1].append(tri)
+                            usedverts |= set(tri)
+                            # signal another try in adding triangles to
+                            # the partition
+                            addtriangles = True
+                        else:
+                            newtriangles.append(tri)
+                            newtrianglepartmap.append(partindex)
+                    else:
+                        newtriangles.append(tri)
+                        newtrianglepartmap.append(partindex)
+                triangles = newtriangles
+                trianglepartmap = newtrianglepartmap
+
+        parts.append(part)
+
+    return parts
+
+
+class TestSkinPartition:
+
+    def check_partitions(self, parts, triangles, trianglepartmap, weights, max_bones):
+        tri_part = dict(zip(triangles, trianglepartmap))
+        partitioned = [tri for bones, part_tris, partindex in parts for tri in part_tris]
+        # every triangle ends up in exactly one partition
+        nose.tools.assert_equal(sorted(partitioned), sorted(triangles))
+        for bones, part_tris, partindex in parts:
+            nose.tools.assert_true(len(bones) <= max_bones)
+            for tri in part_tris:
+                nose.tools.assert_equal(tri_part[tri], partindex)
+                nose.tools.assert_true({bonenum for t in tri for bonenum, weight in weights[t]} <= bones)
+
+    def test_partitions(self):
+        triangles, trianglepartmap, weights = build_skin(20, 30)
+        parts = create_partitions(triangles, trianglepartmap, weights, 18)
+        self.check_partitions(parts, triangles, trianglepartmap, weights, 18)
+
+    def test_partition_index(self):
+        triangles, trianglepartmap, weights = build_skin(20, 30, num_parts=4)
+        parts = create_partitions(triangles, trianglepartmap, weights, 18)
+        self.check_partitions(parts, triangles, trianglepartmap, weights, 18)
+        nose.tools.assert_equal({partindex for bones, part_tris, partindex in parts}, set(range(4)))
+
+    def test_single_partition(self):
+        triangles, trianglepartmap, weights = build_skin(10, 4)
+        parts = create_partitions(triangles, trianglepartmap, weights, 4)
+        nose.tools.assert_equal(len(parts), 1)
+
+    def test_legacy_equivalence(self):
+        """Both partitioners produce valid partitions for the same skin."""
+        triangles, trianglepartmap, weights = build_skin(20, 30, num_parts=3)
+        for partitioner in (create_partitions_legacy, create_partitions):
+            parts = partitioner(list(triangles), list(trianglepartmap), weights, 18)
+            self.check_partitions(parts, triangles, trianglepartmap, weights, 18)
+
+
+def benchmark():
+    """Compare the indexed partitioner with the legacy one on synthetic skins of increasing size."""
+    for size, num_bones in ((20, 30), (50, 60), (100, 60)):
+        triangles, trianglepartmap, weights = build_skin(size, num_bones, num_parts=3)
+        results = []
+        for partitioner in (create_partitions_legacy, create_partitions):
+            start = time.perf_counter()
+            parts = partitioner(list(triangles), list(trianglepartmap), weights, 18)
+            results.append((time.perf_counter() - start, len(parts)))
+        (legacy_time, legacy_parts), (indexed_time, indexed_parts) = results
+        print(f"{len(triangles)} triangles, {num_bones} bones: "
+              f"legacy {legacy_time:.3f}s ({legacy_parts} partitions), "
+              f"indexed {indexed_time:.3f}s ({indexed_parts} partitions)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,224 @@
+"""Unit tests and benchmark for importing skin weights as vertex groups"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import random
+
+import nose
+import numpy as np
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.modules.nif_import.geometry.vertex.groups import VertexGroup
+
+
+class FakeVertexGroup:
+    """Records the weights added to it, like a blender vertex group with the REPLACE mode."""
+
+    def __init__(self):
+        self.weights = {}
+        self.calls = 0
+
+    def add(self, index, weight, type):
+        self.calls += 1
+        for vert in index:
+            self.weights[vert] = weight
+
+
+def build_skin(num_vertices, num_bones, seed=0):
+    """Build a synthetic skin where every vertex is weighted to four random bones.
+    Weights are quantized to bytes, as they would be for a partition.
+
+    :return: dict mapping each bone to its list of (vertex, weight) tuples
+    """
+    rng = random.Random(seed)
+    bone_weights = {bone: [] for bone in range(num_bones)}
+    for vert in range(num_vertices):
+        raw = [rng.random() for _ in range(4)]
+        total = sum(raw)
+        for bone, weight in zip(rng.sample(range(num_bones), 4), raw):
+            bone_weights[bone].append((vert, round(255 * weight / total) / 255))
+    return bone_weights
+
+
+def add_per_weight(bone_weights):
+    """The old way, one add call per weight."""
+    v_groups = {bone: FakeVertexGroup() for bone in bone_weights}
+    for bone, vertex_weights in bone_weights.items():
+        for vert, weight in vertex_weights:
+            v_groups[bone].add([vert], weight, 'REPLACE')
+    return v_groups
+
+
+def add_batched(bone_weights):
+    v_groups = {bone: FakeVertexGroup() for bone in bone_weights}
+    for bone, vertex_weights in bone_weights.items():
+        vertices, weights = zip(*vertex_weights)
+        VertexGroup.add_weights(v_groups[bone], vertices, weights)
+    return v_groups
+
+
+class TestWeightBuckets:
+
+    def test_buckets(self):
+        buckets = VertexGroup.get_weight_buckets([0, 1, 2, 3], [0.5, 0.25, 0.5, 1.0])
+        nose.tools.assert_equal(buckets, [(0.25, [1]), (0.5, [0, 2]), (1.0, [3])])
+
+    def test_last_weight_wins(self):
+        buckets = VertexGroup.get_weight_buckets([0, 1, 0], [0.5, 0.25, 1.0])
+        nose.tools.assert_equal(buckets, [(0.25, [1]), (1.0, [0])])
+
+    def test_empty(self):
+        nose.tools.assert_equal(VertexGroup.get_weight_buckets([], []), [])
+
+    def test_same_weights(self):
+        bone_weights = build_skin(2000, 100)
+        expected = add_per_weight(bone_weights)
+        result = add_batched(bone_weights)
+        for bone in bone_weights:
+            nose.tools.assert_equal(set(expected[bone].weights), set(result[bone].weights))
+            for vert, weight in expected[bone].weights.items():
+                nose.tools.assert_almost_equal(weight, result[bone].weights[vert], places=6)
+            nose.tools.assert_true(result[bone].calls <= 256)
+
+
+class TestPartitionWeights:
+
+    @staticmethod
+    def fill_partition_block(block, bones, vertex_map, vertex_weights, bone_indices):
+        block.num_vertices = len(vertex_map)
+        block.num_bones = len(bones)
+        block.num_weights_per_vertex = len(vertex_weights[0])
+        block.has_vertex_map = True
+        block.has_vertex_weights = True
+        block.has_bone_indices = True
+        block.bones.update_size()
+        block.vertex_map.update_size()
+        block.vertex_weights.update_size()
+        block.bone_indices.update_size()
+        for i, bone in enumerate(bones):
+            block.bones[i] = bone
+        for i, vert in enumerate(vertex_map):
+            block.vertex_map[i] = vert
+            for j, (weight, bone_index) in enumerate(zip(vertex_weights[i], bone_indices[i])):
+                block.vertex_weights[i][j] = weight
+                block.bone_indices[i][j] = bone_index
+
+    def test_partition_weights(self):
+        skin_partition = NifFormat.NiSkinPartition()
+        skin_partition.num_skin_partition_blocks = 2
+        skin_partition.skin_partition_blocks.update_size()
+        self.fill_partition_block(
+            skin_partition.skin_partition_blocks[0], [4, 7], [0, 1], [[0.75, 0.25], [1.0, 0.0]], [[0, 1], [1, 0]])
+        self.fill_partition_block(
+            skin_partition.skin_partition_blocks[1], [2], [2], [[1.0, 0.0]], [[0, 0]])
+        vertices, bone_indices, weights = VertexGroup.get_partition_weights(skin_partition)
+        nose.tools.assert_equal(vertices.tolist(), [0, 0, 1, 2])
+        nose.tools.assert_equal(bone_indices.tolist(), [4, 7, 7, 2])
+        nose.tools.assert_equal(weights.tolist(), [0.75, 0.25, 1.0, 1.0])
+
+    def test_first_block_only(self):
+        skin_partition = NifFormat.NiSkinPartition()
+        skin_partition.num_skin_partition_blocks = 2
+        skin_partition.skin_partition_blocks.update_size()
+        self.fill_partition_block(
+            skin_partition.skin_partition_blocks[0], [0, 1], [0, 1], [[0.5, 0.5], [1.0, 0.0]], [[0, 1], [0, 1]])
+        self.fill_partition_block(
+            skin_partition.skin_partition_blocks[1], [1, 2], [1, 2], [[1.0, 0.0], [1.0, 0.0]], [[1, 0], [0, 1]])
+        vertices, bone_indices, weights = VertexGroup.get_partition_weights(skin_partition, first_only=True)
+        nose.tools.assert_equal(vertices.tolist(), [0, 0, 1, 2])
+        nose.tools.assert_equal(bone_indices.tolist(), [0, 1, 0, 1])
+
+
+class TestSkinDeformation:
+
+    def test_blend(self):
+        vertices = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+        # bone 0 translates by (1, 2, 3), bone 1 scales by 2, acting on row vectors
+        bone_transforms = np.array([np.eye(4), np.diag([2.0, 2.0, 2.0, 1.0])])
+        bone_transforms[0, 3, :3] = (1.0, 2.0, 3.0)
+        vertex_indices = np.array([0, 1, 1, 2])
+        bone_indices = np.array([0, 0, 1, 1])
+        weights = np.array([1.0, 0.5, 0.5, 0.0])
+        skinned, normals, sum_weights = VertexGroup.get_skin_deformation(vertices, bone_transforms,
+                                                                         vertex_indices, bone_indices, weights)
+        np.testing.assert_allclose(skinned, [[2.0, 2.0, 3.0], [0.5, 2.5, 1.5], [0.0, 0.0, 0.0]])
+        nose.tools.assert_is_none(normals)
+        np.testing.assert_allclose(sum_weights, [1.0, 1.0, 0.0])
+
+    def test_blend_normals(self):
+        vertices = np.zeros((3, 3))
+        normals = np.array([[1.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        # bone 0 translates by (1, 2, 3) and rotates by 90 degrees about z, bone 1 scales by 2
+        rotation = np.array([[0.0, 1.0, 0.0], [-1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        bone_transforms = np.array([np.eye(4), np.diag([2.0, 2.0, 2.0, 1.0])])
+        bone_transforms[0, :3, :3] = rotation
+        bone_transforms[0, 3, :3] = (1.0, 2.0, 3.0)
+        vertex_indices = np.array([0, 1, 1, 2])
+        bone_indices = np.array([0, 0, 1, 1])
+        weights = np.array([1.0, 0.5, 0.5, 0.0])
+        skinned, skinned_normals, sum_weights = VertexGroup.get_skin_deformation(
+            vertices, bone_transforms, vertex_indices, bone_indices, weights, normals)
+        # translations do not move normals, and blended normals are of unit length again
+        np.testing.assert_allclose(skinned_normals[0], [0.0, 1.0, 0.0], atol=1e-12)
+        np.testing.assert_allclose(skinned_normals[1], np.array([2.0, 1.0, 0.0]) / np.sqrt(5.0))
+        # unweighted vertices keep a zero normal
+        np.testing.assert_allclose(skinned_normals[2], [0.0, 0.0, 0.0])
+        np.testing.assert_allclose(skinned, [[1.0, 2.0, 3.0], [0.5, 1.0, 1.5], [0.0, 0.0, 0.0]])
+
+
+class TestBodyPartTriangles:
+
+    def test_keys_ignore_order(self):
+        keys = VertexGroup.get_triangle_keys([[0, 1, 2], [2, 0, 1], [1, 2, 0], [0, 1, 3]], 4)
+        nose.tools.assert_equal(len(set(keys[:3].tolist())), 1)
+        nose.tools.assert_not_equal(keys[0], keys[3])
+
+    def test_match(self):
+        polygons = np.array([[0, 1, 2], [1, 2, 3], [2, 3, 4], [2, 1, 0]])
+        polygon_keys = VertexGroup.get_triangle_keys(polygons, 5)
+        # a quad that is not a triangle
+        polygon_keys = np.append(polygon_keys, -1)
+        triangle_keys = VertexGroup.get_triangle_keys([[2, 0, 1], [4, 3, 2], [0, 3, 4]], 5)
+        matched = VertexGroup.match_triangles(polygon_keys, triangle_keys)
+        nose.tools.assert_equal(matched.tolist(), [0, 2, 3])
+
+    def test_no_match(self):
+        polygon_keys = VertexGroup.get_triangle_keys([[0, 1, 2]], 4)
+        triangle_keys = VertexGroup.get_triangle_keys([[1, 2, 3]], 4)
+        nose.tools.assert_equal(VertexGroup.match_triangles(polygon_keys, triangle_keys).tolist(), [])
@@ -0,0 +1,74 @@
+"""Module for unit testing the materials that imports share"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import nose
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.modules.nif_import.property.geometry.mesh import MeshPropertyProcessor
+
+
+class TestMaterialKey:
+
+    def setup(self):
+        self.n_mat_prop = NifFormat.NiMaterialProperty()
+        self.n_mat_prop.diffuse_color.r = 0.5
+        self.n_alpha_prop = NifFormat.NiAlphaProperty()
+        self.key = MeshPropertyProcessor.hash_material_key([self.n_mat_prop, self.n_alpha_prop], False, 0x14000005, "a")
+
+    def test_identical(self):
+        n_mat_prop = NifFormat.NiMaterialProperty()
+        n_mat_prop.diffuse_color.r = 0.5
+        nose.tools.assert_equal(self.key, MeshPropertyProcessor.hash_material_key(
+            [n_mat_prop, NifFormat.NiAlphaProperty()], False, 0x14000005, "a"))
+
+    def test_wireframe_excluded(self):
+        # wireframe changes the object, not the material
+        nose.tools.assert_equal(self.key, MeshPropertyProcessor.hash_material_key(
+            [self.n_mat_prop, self.n_alpha_prop, NifFormat.NiWireframeProperty()], False, 0x14000005, "a"))
+
+    def test_different(self):
+        props = [self.n_mat_prop, self.n_alpha_prop]
+        nose.tools.assert_not_equal(self.key, MeshPropertyProcessor.hash_material_key(props, True, 0x14000005, "a"))
+        nose.tools.assert_not_equal(self.key, MeshPropertyProcessor.hash_material_key(props, False, 0x04000002, "a"))
+        nose.tools.assert_not_equal(self.key, MeshPropertyProcessor.hash_material_key(props, False, 0x14000005, "b"))
+        nose.tools.assert_not_equal(self.key, MeshPropertyProcessor.hash_material_key(
+            [self.n_mat_prop], False, 0x14000005, "a"))
+        self.n_mat_prop.diffuse_color.r = 1.0
+        nose.tools.assert_not_equal(self.key, MeshPropertyProcessor.hash_material_key(props, False, 0x14000005, "a"))
+
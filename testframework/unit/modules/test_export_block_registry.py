@@ -0,0 +1,111 @@
+"""Unit tests for the indexes of the export block registry"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import nose
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.modules.nif_export.block_registry import ExportBlockRegistry
+
+
+class TestExportBlockRegistry:
+
+    def setup(self):
+        self.registry = ExportBlockRegistry()
+        self.root = self.registry.create_block("NiNode", "root_obj")
+        self.root.name = "Scene Root"
+        self.bone = self.registry.create_block("NiNode", "bone_obj")
+        self.bone.name = "Bip01"
+        self.shape = self.registry.create_block("NiTriShape", "mesh_obj")
+        self.shape.name = "Bip01"
+        self.body = self.registry.create_block("bhkRigidBody", "mesh_obj")
+
+    def test_types(self):
+        nose.tools.assert_equal(self.registry.get_blocks(NifFormat.NiNode), [self.root, self.bone])
+        nose.tools.assert_equal(self.registry.get_blocks(NifFormat.NiAVObject), [self.root, self.bone, self.shape])
+        nose.tools.assert_equal(self.registry.get_blocks(NifFormat.NiKeyframeController), [])
+
+    def test_objects(self):
+        nose.tools.assert_equal(self.registry.get_blocks_for_obj("mesh_obj"), [self.shape, self.body])
+        nose.tools.assert_equal(self.registry.get_blocks_for_obj("mesh_obj", NifFormat.bhkRigidBody), [self.body])
+        nose.tools.assert_equal(self.registry.get_blocks_for_obj("other_obj"), [])
+
+    def test_names(self):
+        nose.tools.assert_equal(self.registry.get_blocks_by_name("Bip01"), [self.bone, self.shape])
+        nose.tools.assert_equal(self.registry.get_blocks_by_name(b"Bip01", NifFormat.NiNode), [self.bone])
+        nose.tools.assert_equal(self.registry.get_blocks_by_name("Bip02"), [])
+
+    def test_renamed(self):
+        nose.tools.assert_equal(self.registry.get_blocks_by_name("Bip01", NifFormat.NiNode), [self.bone])
+        self.bone.name = "Bip02"
+        nose.tools.assert_equal(self.registry.get_blocks_by_name("Bip01", NifFormat.NiNode), [])
+        nose.tools.assert_equal(self.registry.get_blocks_by_name("Bip02"), [self.bone])
+
+    def test_reset(self):
+        self.registry.block_to_obj = {}
+        nose.tools.assert_equal(self.registry.get_blocks(NifFormat.NiNode), [])
+        nose.tools.assert_equal(self.registry.get_blocks_by_name("Bip01"), [])
+
+    def test_register_again(self):
+        self.registry.register_block(self.body, "other_obj")
+        nose.tools.assert_equal(self.registry.get_blocks(NifFormat.bhkRigidBody), [self.body])
+        nose.tools.assert_equal(self.registry.get_blocks_for_obj("mesh_obj"), [self.shape])
+        nose.tools.assert_equal(self.registry.get_blocks_for_obj("other_obj"), [self.body])
+
+    def test_intern(self):
+        n_texset = NifFormat.BSShaderTextureSet()
+        n_texset.textures[0] = "textures/base.dds"
+        nose.tools.assert_is(self.registry.intern_block(n_texset), n_texset)
+        n_copy = NifFormat.BSShaderTextureSet()
+        n_copy.textures[0] = "textures/base.dds"
+        nose.tools.assert_is(self.registry.intern_block(n_copy), n_texset)
+        n_other = NifFormat.BSShaderTextureSet()
+        n_other.textures[0] = "textures/other.dds"
+        nose.tools.assert_is(self.registry.intern_block(n_other), n_other)
+        # interning does not register
+        nose.tools.assert_equal(self.registry.get_blocks(NifFormat.BSShaderTextureSet), [])
+
+    def test_intern_key(self):
+        key = ("NiAlphaProperty", (("flags", 237), ("threshold", 0)))
+        nose.tools.assert_is_none(self.registry.get_interned(key))
+        n_alpha = self.registry.create_block("NiAlphaProperty")
+        self.registry.intern_block(n_alpha, key)
+        nose.tools.assert_is(self.registry.get_interned(key), n_alpha)
+        self.registry.block_to_obj = {}
+        nose.tools.assert_is_none(self.registry.get_interned(key))
@@ -0,0 +1,90 @@
+"""Unit tests for the bulk array copy utility"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import nose
+import numpy as np
+
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.utils import arrays
+
+
+class TestArrays:
+
+    def setup(self):
+        self.n_data = NifFormat.NiTriShapeData()
+        self.n_data.num_vertices = 4
+        self.n_data.has_vertices = True
+        self.n_data.has_vertex_colors = True
+        self.n_data.num_uv_sets = 1
+        self.n_data.has_uv = True
+        self.n_data.vertices.update_size()
+        self.n_data.vertex_colors.update_size()
+        self.n_data.uv_sets.update_size()
+
+    def test_write_vectors(self):
+        b_array = np.arange(12, dtype=np.float32).reshape(4, 3)
+        arrays.write_array(self.n_data.vertices, b_array)
+        nose.tools.assert_equal(self.n_data.vertices[2].y, 7.0)
+        nose.tools.assert_true(np.array_equal(arrays.read_array(self.n_data.vertices), b_array))
+
+    def test_write_colors(self):
+        b_array = np.linspace(0, 1, 16, dtype=np.float32).reshape(4, 4)
+        arrays.write_array(self.n_data.vertex_colors, b_array, arrays.COLOR4)
+        nose.tools.assert_true(np.array_equal(arrays.read_array(self.n_data.vertex_colors, arrays.COLOR4), b_array))
+
+    def test_write_uvs(self):
+        b_array = np.linspace(0, 1, 8, dtype=np.float32).reshape(4, 2)
+        arrays.write_array(self.n_data.uv_sets[0], b_array, arrays.TEXCOORD)
+        nose.tools.assert_equal(self.n_data.uv_sets[0][3].v, b_array[3, 1])
+        nose.tools.assert_true(np.array_equal(arrays.read_array(self.n_data.uv_sets[0], arrays.TEXCOORD), b_array))
+
+    @nose.tools.raises(ValueError)
+    def test_write_wrong_size(self):
+        arrays.write_array(self.n_data.vertices, np.zeros((3, 3)))
+
+    def test_hash_arrays(self):
+        vertices = np.arange(12, dtype=np.float32).reshape(4, 3)
+        digest = arrays.hash_arrays(vertices, None)
+        nose.tools.assert_equal(digest, arrays.hash_arrays(vertices.copy(), None))
+        # the same bytes in another shape or type, or a missing array, give another digest
+        nose.tools.assert_not_equal(digest, arrays.hash_arrays(vertices.reshape(3, 4), None))
+        nose.tools.assert_not_equal(digest, arrays.hash_arrays(vertices.view(np.int32), None))
+        nose.tools.assert_not_equal(digest, arrays.hash_arrays(vertices))
@@ -0,0 +1,111 @@
+"""Module for unit testing the batch import and export driver"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import sys
+import tempfile
+
+import nose
+
+from io_scene_niftools import batch
+
+# stands in for a blender worker: crashes or hangs on request, and succeeds otherwise
+FAKE_WORKER = f"""
+import json, os, sys, time
+print({batch.READY_PREFIX!r}, flush=True)
+for line in sys.stdin:
+    job = json.loads(line)
+    if job["input"].endswith("crash.nif"):
+        os._exit(3)
+    if job["input"].endswith("hang.nif"):
+        time.sleep(30)
+    print("blender output")
+    result = {{"status": "ok", "seconds": 0.0, "warnings": [], "errors": []}}
+    print({batch.RESULT_PREFIX!r} + json.dumps(result), flush=True)
+"""
+
+
+class TestBatch:
+
+    @classmethod
+    def setup_class(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        for name in ("a.nif", os.path.join("sub", "b.nif")):
+            os.makedirs(os.path.join(cls.temp_dir, "meshes", os.path.dirname(name)), exist_ok=True)
+            open(os.path.join(cls.temp_dir, "meshes", name), "wb").close()
+        cls.worker_path = os.path.join(cls.temp_dir, "worker.py")
+        with open(cls.worker_path, "w") as worker_file:
+            worker_file.write(FAKE_WORKER)
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.temp_dir)
+
+    def test_glob_jobs(self):
+        manifest = {"glob": ["meshes/**/*.nif"], "operation": "reexport", "output_dir": "out",
+                    "export": {"game": "SKYRIM"}}
+        jobs = batch.get_jobs(manifest, self.temp_dir)
+        outputs = sorted(os.path.relpath(job["output"], self.temp_dir) for job in jobs)
+        nose.tools.assert_equal(outputs, [os.path.join("out", "a.nif"), os.path.join("out", "sub", "b.nif")])
+        nose.tools.assert_equal(jobs[0]["export"], {"game": "SKYRIM"})
+
+    def test_file_overrides(self):
+        manifest = {"files": ["meshes/a.nif", {"input": "meshes/sub/b.nif", "operation": "import",
+                                               "import": {"process": "SKELETON_ONLY"}}],
+                    "operation": "reexport", "output_dir": "out", "import": {"scale_correction": 0.1}}
+        first, second = batch.get_jobs(manifest, self.temp_dir)
+        nose.tools.assert_equal(first["import"], {"scale_correction": 0.1})
+        nose.tools.assert_equal(second["import"], {"scale_correction": 0.1, "process": "SKELETON_ONLY"})
+        nose.tools.assert_equal(os.path.relpath(second["output"], self.temp_dir), os.path.join("out", "sub", "b.blend"))
+
+    @nose.tools.raises(ValueError)
+    def test_export_needs_output(self):
+        batch.get_jobs({"files": ["meshes/a.nif"], "operation": "export"}, self.temp_dir)
+
+    def test_run_jobs(self):
+        manifest = {"files": ["ok.nif", "crash.nif", "hang.nif", "ok_too.nif"]}
+        jobs = batch.get_jobs(manifest, self.temp_dir)
+        results = batch.run_jobs(jobs, [sys.executable, self.worker_path], workers=2, timeout=2.0, retries=1)
+        statuses = {os.path.basename(result["input"]): (result["status"], result["attempts"]) for result in results}
+        nose.tools.assert_equal(statuses, {"ok.nif": ("ok", 1), "crash.nif": ("crashed", 2),
+                                           "hang.nif": ("timeout", 2), "ok_too.nif": ("ok", 1)})
+        report = batch.get_report(results, 1.0, 2)
+        nose.tools.assert_equal(report["summary"], {"ok": 2, "crashed": 1, "timeout": 1})
+        nose.tools.assert_equal([result["id"] for result in report["files"]], [0, 1, 2, 3])
@@ -0,0 +1,111 @@
+"""Unit tests for the block index"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import nose
+from pyffi.formats.nif import NifFormat
+
+from io_scene_niftools.utils.blocks import BlockIndex
+
+
+class TestBlockIndex:
+
+    @classmethod
+    def setup_class(cls):
+        # root -> (node -> (shape, shared), shared), with a controller chain and extra data on root
+        cls.root = NifFormat.NiNode()
+        cls.root.name = b"root"
+        cls.node = NifFormat.NiNode()
+        cls.node.name = b"node"
+        cls.shape = NifFormat.NiTriShape()
+        cls.shape.name = b"shape"
+        cls.shared = NifFormat.NiTriStrips()
+        cls.shared.name = b"shape"
+        cls.node.add_child(cls.shape)
+        cls.node.add_child(cls.shared)
+        cls.root.add_child(cls.node)
+        cls.root.add_child(cls.shared)
+
+        cls.vis_ctrl = NifFormat.NiVisController()
+        cls.alpha_ctrl = NifFormat.NiAlphaController()
+        cls.vis_ctrl.next_controller = cls.alpha_ctrl
+        cls.root.controller = cls.vis_ctrl
+        cls.extra = NifFormat.NiStringExtraData()
+        cls.root.add_extra_data(cls.extra)
+
+        cls.index = BlockIndex([cls.root])
+
+    def test_each_block_once(self):
+        nose.tools.assert_equal(len(self.index.blocks), len(set(map(id, self.index.blocks))))
+
+    def test_tree_order(self):
+        expected = [block for block in self.root.tree(block_type=NifFormat.NiTriBasedGeom)]
+        nose.tools.assert_equal(self.index.get_blocks(NifFormat.NiTriBasedGeom), expected[:2])
+
+    def test_types(self):
+        nose.tools.assert_equal(self.index.get_blocks(NifFormat.NiTriShape), [self.shape])
+        nose.tools.assert_equal(self.index.get_blocks((NifFormat.NiTriStrips, NifFormat.NiTriShape)),
+                                [self.shape, self.shared])
+        nose.tools.assert_equal(self.index.get_blocks(NifFormat.NiCamera), [])
+
+    def test_subtree(self):
+        nose.tools.assert_equal(self.index.get_blocks(NifFormat.NiNode, self.node), [self.node])
+        nose.tools.assert_true(self.index.is_in_tree(self.shared, self.node))
+        nose.tools.assert_false(self.index.is_in_tree(self.root, self.node))
+
+    def test_parents(self):
+        nose.tools.assert_equal(self.index.get_parents(self.shared), [self.root, self.node])
+        nose.tools.assert_equal(self.index.get_parents(self.root), [])
+
+    def test_names(self):
+        nose.tools.assert_equal(self.index.get_blocks_by_name(b"shape"), [self.shape, self.shared])
+
+    def test_controllers_and_extras(self):
+        nose.tools.assert_equal(self.index.get_controllers(self.root), [self.vis_ctrl, self.alpha_ctrl])
+        nose.tools.assert_equal(self.index.get_extras(self.root), [self.extra])
+
+    def test_update(self):
+        index = BlockIndex([self.root])
+        self.root.remove_child(self.shared)
+        self.node.remove_child(self.shared)
+        index.update([self.root])
+        nose.tools.assert_false(index.contains(self.shared))
+        nose.tools.assert_true(index.contains(self.shape))
+        self.node.add_child(self.shared)
+        self.root.add_child(self.shared)
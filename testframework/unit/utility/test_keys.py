@@ -0,0 +1,79 @@
+"""Module for unit testing the decoding of animation keys"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import pickle
+
+import nose
+import numpy as np
+
+from io_scene_niftools.file_io.kf import KFFile
+from io_scene_niftools.utils.keys import estimate_fps
+
+
+class TestKeys:
+
+    @classmethod
+    def setup_class(cls):
+        cls.kf_path = os.path.join(os.path.dirname(__file__), "test.kf")
+        cls.key_times, cls.sequences = KFFile.read_kf_keys(cls.kf_path, 1.0)
+
+    def test_sequence_keys(self):
+        nose.tools.assert_equal(len(self.sequences), 1)
+        sequence_keys = self.sequences[0]
+        nose.tools.assert_equal(sequence_keys.root_type, "NiSequenceStreamHelper")
+        nose.tools.assert_true(sequence_keys.channels)
+        n_name, transform_keys = sequence_keys.channels[0]
+        nose.tools.assert_equal(n_name, b"Bip01")
+        times, translations = transform_keys.translations
+        nose.tools.assert_equal(translations.shape, (len(times), 3))
+
+    def test_key_times(self):
+        nose.tools.assert_equal(list(self.key_times), sorted(set(self.key_times)))
+
+    def test_pickle(self):
+        # the keys are passed between processes
+        key_times, sequences = pickle.loads(pickle.dumps((self.key_times, self.sequences)))
+        n_name, transform_keys = sequences[0].channels[0]
+        np.testing.assert_array_equal(transform_keys.translations[1],
+                                      self.sequences[0].channels[0][1].translations[1])
+
+    def test_estimate_fps(self):
+        nose.tools.assert_equal(estimate_fps([0.0, 0.04, 0.08], 30), 25)
+        nose.tools.assert_equal(estimate_fps([], 30), 30)
@@ -0,0 +1,81 @@
+"""Tests for the batched key space conversions, against the per key mathutils versions"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+
+import random
+
+import mathutils
+import nose
+import numpy as np
+
+from io_scene_niftools.utils import math
+
+
+class TestBatchedKeymats:
+
+    @classmethod
+    def setup_class(cls):
+        math.set_bone_orientation("X", "Y")
+        rng = random.Random(0)
+        cls.bind_rot_inv = mathutils.Euler([rng.uniform(-3, 3) for _ in range(3)]).to_matrix().to_4x4()
+        cls.bind_trans = mathutils.Vector([rng.uniform(-10, 10) for _ in range(3)])
+        cls.eulers = [[rng.uniform(-3, 3) for _ in range(3)] for _ in range(100)]
+        cls.quaternions = [mathutils.Euler(euler).to_quaternion()[:] for euler in cls.eulers]
+        cls.translations = [[rng.uniform(-10, 10) for _ in range(3)] for _ in range(100)]
+
+    def test_eulers(self):
+        expected = [math.import_keymat(self.bind_rot_inv, mathutils.Euler(euler).to_matrix().to_4x4()).to_euler()[:]
+                    for euler in self.eulers]
+        result = math.matrices_to_eulers(math.import_keymats(self.bind_rot_inv, math.eulers_to_matrices(self.eulers)))
+        np.testing.assert_allclose(result, expected, atol=1e-5)
+
+    def test_quaternions(self):
+        expected = np.array([math.import_keymat(self.bind_rot_inv, mathutils.Quaternion(quat).to_matrix().to_4x4())
+                            .to_quaternion()[:] for quat in self.quaternions])
+        result = math.matrices_to_quaternions(
+            math.import_keymats(self.bind_rot_inv, math.quaternions_to_matrices(self.quaternions)))
+        # q and -q are the same rotation
+        nose.tools.assert_true(np.allclose(np.abs((result * expected).sum(axis=1)), 1, atol=1e-5))
+
+    def test_translations(self):
+        expected = [math.import_keymat(self.bind_rot_inv,
+                                       mathutils.Matrix.Translation(mathutils.Vector(trans) - self.bind_trans))
+                    .to_translation()[:] for trans in self.translations]
+        result = math.import_key_translations(self.bind_rot_inv, self.bind_trans, self.translations)
+        np.testing.assert_allclose(result, expected, atol=1e-4)
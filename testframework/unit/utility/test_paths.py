@@ -0,0 +1,120 @@
+"""Unit tests for the cached directory listings"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import json
+import os
+import shutil
+import tempfile
+
+import nose
+
+from io_scene_niftools.utils.paths import DirectoryCache
+
+
+class TestDirectoryCache:
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "Textures", "Architecture"))
+        self.texture = os.path.join(self.root, "Textures", "Architecture", "Wall01.dds")
+        open(self.texture, "wb").close()
+        # keep the cache out of the searched folders, it would change their modification time
+        self.cache_folder = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.cache_folder, "cache", "folders.json")
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_folder)
+
+    def test_find(self):
+        cache = DirectoryCache()
+        nose.tools.assert_equal(cache.find(self.root, os.path.join("textures", "architecture", "wall01.DDS")), self.texture)
+        nose.tools.assert_equal(cache.find(self.root, "textures\\Architecture\\Wall01.dds"), self.texture)
+        nose.tools.assert_equal(cache.find(os.path.join(self.root, "Textures", "Other"), "../architecture/wall01.dds"), self.texture)
+        nose.tools.assert_is_none(cache.find(self.root, os.path.join("textures", "wall01.dds")))
+        nose.tools.assert_is_none(cache.find(os.path.join(self.root, "missing"), "wall01.dds"))
+
+    def test_cached(self):
+        cache = DirectoryCache()
+        cache.find(self.root, os.path.join("textures", "architecture", "wall02.dds"))
+        open(os.path.join(self.root, "Textures", "Architecture", "Wall02.dds"), "wb").close()
+        # the listing is only checked again after a refresh
+        nose.tools.assert_is_none(cache.find(self.root, os.path.join("textures", "architecture", "wall02.dds")))
+        cache.refresh()
+        # make sure the modification time differs, whatever the resolution of the file system
+        folder = os.path.join(self.root, "Textures", "Architecture")
+        os.utime(folder, ns=(0, 0))
+        nose.tools.assert_is_not_none(cache.find(self.root, os.path.join("textures", "architecture", "wall02.dds")))
+
+    def test_save(self):
+        cache = DirectoryCache(self.cache_path)
+        cache.find(self.root, os.path.join("textures", "architecture", "wall01.dds"))
+        nose.tools.assert_true(cache.save())
+        # nothing changed, so nothing to write
+        nose.tools.assert_false(cache.save())
+        loaded = DirectoryCache(self.cache_path)
+        nose.tools.assert_equal(loaded.listings, cache.listings)
+        nose.tools.assert_equal(loaded.find(self.root, os.path.join("textures", "architecture", "wall01.dds")), self.texture)
+        # the loaded listings are still valid, so they are not changed
+        nose.tools.assert_false(loaded.changed)
+
+    def test_save_names_once(self):
+        cache = DirectoryCache(self.cache_path)
+        cache.find(self.root, os.path.join("textures", "architecture", "wall01.dds"))
+        cache.find(self.root, os.path.join("missing", "wall01.dds"))
+        cache.save()
+        with open(self.cache_path, encoding="utf-8") as stream:
+            entries = json.load(stream)
+        # missing folders are not saved
+        nose.tools.assert_equal(sorted(directory for directory, mtime, names in entries),
+                                [self.root, os.path.join(self.root, "Textures"),
+                                 os.path.join(self.root, "Textures", "Architecture")])
+        names = {directory: names for directory, mtime, names in entries}
+        nose.tools.assert_equal(names[os.path.join(self.root, "Textures", "Architecture")], ["Wall01.dds"])
+
+    def test_max_listings(self):
+        cache = DirectoryCache(self.cache_path, max_listings=2)
+        cache.find(self.root, os.path.join("textures", "architecture", "wall01.dds"))
+        # the least recently used listing is dropped
+        nose.tools.assert_equal(list(cache.listings), [os.path.join(self.root, "Textures"),
+                                                       os.path.join(self.root, "Textures", "Architecture")])
+        # and listed again when it is needed
+        nose.tools.assert_equal(cache.find(self.root, os.path.join("textures", "architecture", "wall01.dds")),
+                                self.texture)
+        nose.tools.assert_equal(len(cache.listings), 2)
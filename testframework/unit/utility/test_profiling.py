@@ -0,0 +1,132 @@
+"""Module for unit testing the phase timings of imports and exports"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2016, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import json
+import os
+import pstats
+import shutil
+import tempfile
+
+import nose
+
+from io_scene_niftools.utils.profiling import NifProfiler, ENV_TIMINGS
+
+
+class TestProfiling:
+
+    def setup(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown(self):
+        shutil.rmtree(self.temp_dir)
+
+    @staticmethod
+    def run_session(**options):
+        with NifProfiler.session("export", **options):
+            for name in ("a", "b"):
+                with NifProfiler.phase("mesh", name):
+                    with NifProfiler.phase("skin partition"):
+                        pass
+            with NifProfiler.phase("write"):
+                NifProfiler.count("blocks", 3)
+
+    def test_disabled(self):
+        os.environ.pop(ENV_TIMINGS, None)
+        self.run_session()
+        nose.tools.assert_false(NifProfiler.enabled)
+        nose.tools.assert_equal(NifProfiler.stats, {})
+        nose.tools.assert_equal(NifProfiler.counters, {})
+
+    def test_nested_phases(self):
+        self.run_session(timings=True)
+        stats = NifProfiler.stats
+        nose.tools.assert_equal(list(stats), [("export",), ("export", "mesh"), ("export", "mesh", "skin partition"),
+                                              ("export", "write")])
+        nose.tools.assert_equal(stats[("export", "mesh")][0], 2)
+        nose.tools.assert_equal(stats[("export", "mesh", "skin partition")][0], 2)
+        calls, total, child_time = stats[("export",)]
+        nose.tools.assert_equal(calls, 1)
+        nose.tools.assert_almost_equal(child_time, stats[("export", "mesh")][1] + stats[("export", "write")][1])
+        nose.tools.assert_equal(NifProfiler.counters, {"blocks": 3})
+        nose.tools.assert_false(NifProfiler.stack)
+
+    def test_summary(self):
+        self.run_session(timings=True)
+        lines = NifProfiler.get_summary().splitlines()
+        nose.tools.assert_equal([line.split()[0] for line in lines[1:5]], ["export", "mesh", "skin", "write"])
+        nose.tools.assert_true(lines[3].startswith("    skin partition"))
+        nose.tools.assert_equal(lines[5], "blocks: 3")
+
+    def test_environment(self):
+        os.environ[ENV_TIMINGS] = "1"
+        try:
+            self.run_session()
+        finally:
+            del os.environ[ENV_TIMINGS]
+        nose.tools.assert_equal(NifProfiler.stats[("export", "mesh")][0], 2)
+
+    def test_phase_error(self):
+        with nose.tools.assert_raises(ValueError):
+            with NifProfiler.session("import", timings=True):
+                with NifProfiler.phase("load"):
+                    raise ValueError
+        nose.tools.assert_equal(NifProfiler.stats[("import", "load")][0], 1)
+        nose.tools.assert_false(NifProfiler.stack)
+
+    def test_trace(self):
+        trace_path = os.path.join(self.temp_dir, "trace.json")
+        self.run_session(trace_path=trace_path)
+        with open(trace_path) as stream:
+            events = json.load(stream)["traceEvents"]
+        phases = [event for event in events if event["ph"] == "X"]
+        nose.tools.assert_equal([event["name"] for event in phases],
+                                ["export", "mesh", "skin partition", "mesh", "skin partition", "write"])
+        nose.tools.assert_equal([event["args"]["detail"] for event in phases if event["name"] == "mesh"], ["a", "b"])
+        root = phases[0]
+        for event in phases[1:]:
+            nose.tools.assert_true(root["ts"] <= event["ts"])
+            nose.tools.assert_true(event["ts"] + event["dur"] <= root["ts"] + root["dur"] + 1)
+
+    def test_profile(self):
+        profile_path = os.path.join(self.temp_dir, "profile.prof")
+        self.run_session(profile_path=profile_path)
+        # profiling alone does not time the phases
+        nose.tools.assert_equal(NifProfiler.stats, {})
+        functions = [function for (path, line, function) in pstats.Stats(profile_path).stats]
+        nose.tools.assert_in("count", functions)
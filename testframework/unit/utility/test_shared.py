@@ -0,0 +1,75 @@
+"""Unit tests for the registry of shared imported data"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2019, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import bpy
+import nose
+
+from io_scene_niftools.utils.shared import SharedData
+
+
+class TestSharedData:
+
+    def setup(self):
+        self.shared = SharedData("materials")
+        self.b_mats = [bpy.data.materials.new("Box01_nt_mat")]
+        self.shared.add("key", self.b_mats[0])
+
+    def teardown(self):
+        for b_mat in self.b_mats:
+            if b_mat.name in bpy.data.materials:
+                bpy.data.materials.remove(b_mat)
+
+    def test_shared(self):
+        nose.tools.assert_equal(self.shared.get("key"), self.b_mats[0])
+        nose.tools.assert_is_none(self.shared.get("other key"))
+        nose.tools.assert_is_none(self.shared.get(None))
+
+    def test_from_blend_file(self):
+        # the names are gathered again from the keys stored on the datablocks
+        self.shared.clear()
+        nose.tools.assert_equal(self.shared.get("key"), self.b_mats[0])
+
+    def test_stale_name(self):
+        nose.tools.assert_equal(self.shared.get("key"), self.b_mats[0])
+        name = self.b_mats[0].name
+        bpy.data.materials.remove(self.b_mats.pop())
+        # an unrelated datablock of the same name, as after loading another file
+        self.b_mats.append(bpy.data.materials.new(name))
+        nose.tools.assert_equal(self.b_mats[0].name, name)
+        nose.tools.assert_is_none(self.shared.get("key"))